@@ -0,0 +1,9 @@
+from django.urls import path
+
+from . import views
+
+app_name = "app_api"
+
+urlpatterns = [
+    path("v1/<str:recurso>/", views.listar, name="listar"),
+]
@@ -0,0 +1,213 @@
+# app_api/views.py
+"""
+API JSON somente leitura (v1) para integrações de BI e RH.
+
+    GET /api/v1/<entregas|solicitacoes|epis|colaboradores>/
+
+- fields=id,status,...   só esses campos (o SELECT traz apenas as colunas pedidas);
+- updated_since=<ISO>    só registros alterados a partir desse instante;
+- cursor=<opaco>         continuação: `proximo_cursor` da página anterior;
+- limit=<n>              itens por página (padrão 100, máximo 500);
+- format=ndjson          fluxo NDJSON (um objeto por linha), sem paginação.
+
+A ordem é sempre (data de alteração, id) crescente: uma carga interrompida
+continua do último cursor sem perder nem repetir registros. Entregas aceitam
+também os filtros do relatório (data_de, data_ate, colaborador, epi, status).
+Em EPIs, movimentações e reservas marcam `updated_at`; nos engines ledger e
+fatiado a marca vem na compactação/rebalanceamento seguinte.
+"""
+
+import json
+from datetime import datetime, time
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.views.decorators.http import require_GET
+
+from app_colaboradores.models import Colaborador
+from app_core.paginacao import CursorPaginator
+from app_entregas.models import Solicitacao
+from app_entregas.services import anota_saldo
+from app_epis.models import EPI
+from app_relatorios.views import _filtrar_qs
+
+LIMITE_PADRAO = 100
+LIMITE_MAXIMO = 500
+LOTE_NDJSON = 1000
+
+
+def _entregas(request):
+    form, qs = _filtrar_qs(request)
+    if form.is_bound and not form.is_valid():
+        return qs, form.errors
+    return qs, None
+
+
+# recurso -> permissão, queryset base, campo de alteração e campos expostos (nome -> caminho ORM)
+RECURSOS = {
+    "entregas": {
+        "permissao": "app_entregas.view_entrega",
+        "base": _entregas,
+        "atualizado": "updated_at",
+        "campos": {
+            "id": "id",
+            "colaborador_id": "colaborador_id",
+            "colaborador_nome": "colaborador__nome",
+            "colaborador_matricula": "colaborador__matricula",
+            "epi_id": "epi_id",
+            "epi_codigo": "epi__codigo",
+            "epi_nome": "epi__nome",
+            "solicitacao_id": "solicitacao_id",
+            "quantidade": "quantidade",
+            "status": "status",
+            "data_entrega": "data_entrega",
+            "data_prevista_devolucao": "data_prevista_devolucao",
+            "data_devolucao": "data_devolucao",
+            "observacao": "observacao",
+            "observacao_devolucao": "observacao_devolucao",
+            "created_at": "created_at",
+            "updated_at": "updated_at",
+        },
+    },
+    "solicitacoes": {
+        "permissao": "app_entregas.view_solicitacao",
+        "base": lambda request: (Solicitacao.objects.all(), None),
+        "atualizado": "atualizado_em",
+        "campos": {
+            "id": "id",
+            "colaborador_id": "colaborador_id",
+            "epi_id": "epi_id",
+            "quantidade": "quantidade",
+            "observacao": "observacao",
+            "status": "status",
+            "criado_em": "criado_em",
+            "atualizado_em": "atualizado_em",
+        },
+    },
+    "epis": {
+        "permissao": "app_epis.view_epi",
+        # `estoque` é o saldo completo (fatias e lançamentos não compactados incluídos).
+        "base": lambda request: (anota_saldo(EPI.objects.all()), None),
+        "atualizado": "updated_at",
+        "campos": {
+            "id": "id",
+            "codigo": "codigo",
+            "nome": "nome",
+            "categoria_id": "categoria_id",
+            "categoria_nome": "categoria__nome",
+            "tamanho": "tamanho",
+            "ativo": "ativo",
+            "estoque": "saldo",
+            "estoque_minimo": "estoque_minimo",
+            "reservado": "reservado",
+            "created_at": "created_at",
+            "updated_at": "updated_at",
+        },
+    },
+    "colaboradores": {
+        "permissao": "app_colaboradores.view_colaborador",
+        "base": lambda request: (Colaborador.objects.all(), None),
+        "atualizado": "atualizado_em",
+        "campos": {
+            "id": "id",
+            "nome": "nome",
+            "email": "email",
+            "matricula": "matricula",
+            "cargo": "cargo",
+            "setor": "setor",
+            "telefone": "telefone",
+            "ativo": "ativo",
+            "user_id": "user_id",
+            "criado_em": "criado_em",
+            "atualizado_em": "atualizado_em",
+        },
+    },
+}
+
+
+def _erro(status: int, mensagem: str, **extra) -> JsonResponse:
+    return JsonResponse({"erro": mensagem, **extra}, status=status)
+
+
+def _instante(valor: str):
+    """Data/hora ISO 8601 (ou só a data) -> datetime aware; None se inválido."""
+    try:
+        # "+03:00" sem escape na querystring chega como " 03:00".
+        instante = parse_datetime(valor) or parse_datetime(valor.replace(" ", "+"))
+        if instante is None:
+            data = parse_date(valor)
+            instante = datetime.combine(data, time.min) if data else None
+    except ValueError:
+        return None
+    if instante is not None and timezone.is_naive(instante):
+        instante = timezone.make_aware(instante)
+    return instante
+
+
+def _limite(request) -> int:
+    try:
+        return min(max(int(request.GET.get("limit", LIMITE_PADRAO)), 1), LIMITE_MAXIMO)
+    except ValueError:
+        return LIMITE_PADRAO
+
+
+def _ndjson(qs, saida):
+    lote = []
+    for linha in qs.iterator(chunk_size=LOTE_NDJSON):
+        lote.append(linha)
+        if len(lote) >= LOTE_NDJSON:
+            yield _linhas_ndjson(saida(lote))
+            lote = []
+    if lote:
+        yield _linhas_ndjson(saida(lote))
+
+
+def _linhas_ndjson(objetos) -> str:
+    return "".join(json.dumps(o, cls=DjangoJSONEncoder, ensure_ascii=False) + "\n" for o in objetos)
+
+
+@require_GET
+def listar(request, recurso):
+    config = RECURSOS.get(recurso)
+    if config is None:
+        return _erro(404, f"Recurso desconhecido: {recurso}.")
+    if not request.user.is_authenticated:
+        return _erro(401, "Autenticação necessária.")
+    if not request.user.has_perm(config["permissao"]):
+        return _erro(403, "Sem permissão para este recurso.")
+
+    campos = config["campos"]
+    pedidos = [c.strip() for c in request.GET.get("fields", "").split(",") if c.strip()]
+    desconhecidos = [c for c in pedidos if c not in campos]
+    if desconhecidos:
+        return _erro(400, f"Campos desconhecidos: {', '.join(desconhecidos)}.")
+    pedidos = pedidos or list(campos)
+
+    qs, erros = config["base"](request)
+    if erros:
+        return _erro(400, "Filtros inválidos.", campos=erros)
+    if request.GET.get("updated_since"):
+        desde = _instante(request.GET["updated_since"])
+        if desde is None:
+            return _erro(400, "updated_since inválido: use ISO 8601.")
+        qs = qs.filter(**{f"{config['atualizado']}__gte": desde})
+
+    # Só as colunas pedidas, mais a chave do cursor.
+    chave = (config["atualizado"], "id")
+    colunas = list(dict.fromkeys([campos[c] for c in pedidos] + list(chave)))
+    paginator = CursorPaginator(qs.values(*colunas), _limite(request), chave, descendente=False)
+
+    def saida(linhas):
+        return [{c: linha[campos[c]] for c in pedidos} for linha in linhas]
+
+    cursor = request.GET.get("cursor")
+    if request.GET.get("format") == "ndjson":
+        return StreamingHttpResponse(
+            _ndjson(paginator.restante(cursor), saida), content_type="application/x-ndjson"
+        )
+    pagina = paginator.get_page(cursor)
+    return JsonResponse(
+        {"resultados": saida(pagina.object_list), "proximo_cursor": pagina.next_cursor}
+    )
@@ -1,5 +1,7 @@
 from django.contrib import admin
 
+from app_core.paginacao import PaginadorAproximado
+
 from .models import Colaborador
 
 
@@ -9,4 +11,6 @@ class ColaboradorAdmin(admin.ModelAdmin):
     search_fields = ("nome", "email", "matricula", "cargo", "setor", "telefone")
     list_filter = ("ativo", "setor", "cargo")
     list_per_page = 20
+    paginator = PaginadorAproximado
+    show_full_result_count = False
     ordering = ("nome",)
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:04
+
+from django.db import migrations, models
+
+from app_core.busca import documento
+
+
+def preenche_busca(apps, schema_editor):
+    Colaborador = apps.get_model("app_colaboradores", "Colaborador")
+    colaboradores = list(Colaborador.objects.all())
+    for c in colaboradores:
+        c.busca = documento(c.nome, c.email, c.matricula, c.cargo, c.setor)
+    Colaborador.objects.bulk_update(colaboradores, ["busca"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app_colaboradores", "0006_colaborador_foto"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="colaborador",
+            name="busca",
+            field=models.TextField(blank=True, default="", editable=False),
+        ),
+        migrations.RunPython(preenche_busca, migrations.RunPython.noop),
+    ]
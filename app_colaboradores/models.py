@@ -2,6 +2,10 @@
 from django.contrib.auth.models import User
 from django.db import models
 
+from app_core.busca import documento
+
+CAMPOS_BUSCA = {"nome", "email", "matricula", "cargo", "setor"}
+
 
 class Colaborador(models.Model):
     user = models.OneToOneField(
@@ -22,10 +26,23 @@ class Colaborador(models.Model):
 
     criado_em = models.DateTimeField(auto_now_add=True)
     atualizado_em = models.DateTimeField(auto_now=True)
+    # Documento normalizado para a busca textual (ver app_core.busca)
+    busca = models.TextField(blank=True, default="", editable=False)
 
     def __str__(self):
         return f"{self.nome} ({self.matricula})"
 
+    def documento_busca(self) -> str:
+        return documento(self.nome, self.email, self.matricula, self.cargo, self.setor)
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or CAMPOS_BUSCA.intersection(update_fields):
+            self.busca = self.documento_busca()
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "busca"}
+        super().save(*args, **kwargs)
+
 
 class Meta:
     ordering = ["nome"]
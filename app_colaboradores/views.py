@@ -17,6 +17,10 @@ from django.views.generic import (
     UpdateView,
 )
 
+from app_core import busca
+from app_core.fragmentos import FragmentoMixin
+from app_core.paginacao import PaginadorAproximado
+
 from .forms import (
     ColaboradorAdminForm,
     ColaboradorFotoForm,
@@ -44,15 +48,17 @@ class EntrarView(LoginView):
         return reverse_lazy("app_core:home")
 
 
-class ListaColaboradoresView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
+class ListaColaboradoresView(FragmentoMixin, LoginRequiredMixin, PermissionRequiredMixin, ListView):
     login_url = reverse_lazy("app_colaboradores:entrar")
     permission_required = "app_colaboradores.view_colaborador"
     raise_exception = True
 
     model = Colaborador
     template_name = "app_colaboradores/pages/list.html"
+    fragment_template_name = "app_colaboradores/partials/list_resultados.html"
     context_object_name = "colaboradores"
     paginate_by = 10
+    paginator_class = PaginadorAproximado
 
     def get_queryset(self):
         qs = super().get_queryset().select_related("user")
@@ -60,15 +66,7 @@ class ListaColaboradoresView(LoginRequiredMixin, PermissionRequiredMixin, ListVi
         ativo = self.request.GET.get("ativo", "").strip()
 
         if q:
-            from django.db.models import Q
-
-            qs = qs.filter(
-                Q(nome__icontains=q)
-                | Q(email__icontains=q)
-                | Q(matricula__icontains=q)
-                | Q(cargo__icontains=q)
-                | Q(setor__icontains=q)
-            )
+            qs = busca.filtra(qs, q)
 
         if ativo == "1":  # apenas ativos
             qs = qs.filter(ativo=True)
@@ -81,6 +79,9 @@ class ListaColaboradoresView(LoginRequiredMixin, PermissionRequiredMixin, ListVi
         ctx = super().get_context_data(**kwargs)
         ctx["q"] = self.request.GET.get("q", "")
         ctx["ativo"] = self.request.GET.get("ativo", "")
+        params = self.request.GET.copy()
+        params.pop("page", None)
+        ctx["base_query"] = params.urlencode()
         return ctx
 
     def handle_no_permission(self):
@@ -1,6 +1,19 @@
 from django.apps import AppConfig
+from django.core.management import call_command
+from django.db.models.signals import post_migrate
+
+
+def cria_tabela_cache(using="default", **kwargs):
+    """Tabela do DatabaseCache (settings.CACHES); sem efeito para outros backends."""
+    call_command("createcachetable", database=using)
 
 
 class AppCoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "app_core"
+
+    def ready(self):
+        from .busca import instala_indices
+
+        post_migrate.connect(instala_indices, sender=self, dispatch_uid="app_core_busca")
+        post_migrate.connect(cria_tabela_cache, sender=self, dispatch_uid="app_core_cache")
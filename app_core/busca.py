@@ -0,0 +1,186 @@
+# app_core/busca.py
+"""
+Busca textual indexada.
+
+Cada modelo buscável guarda em `busca` um documento normalizado (sem acentos,
+em minúsculas) com os campos pesquisáveis, atualizado no save(). O documento é
+indexado com FULLTEXT no MySQL e com uma tabela FTS5 (conteúdo externo +
+triggers) no SQLite; em outros bancos, ou sem o índice, cai em LIKE sobre a
+coluna única. Cada termo da busca casa por prefixo de palavra.
+
+No MySQL, termos menores que innodb_ft_min_token_size não estão no FULLTEXT:
+junto de um termo indexado, eles só refinam as linhas que ele já selecionou;
+sozinhos, casam pelo início do documento (o nome), com LIKE 'termo%' num
+índice B-tree de prefixo da coluna — nunca um LIKE '%termo%' na tabela toda.
+
+O FULLTEXT do InnoDB só enxerga linhas já commitadas: testes que buscam
+dados recém-criados usam `django_db(transaction=True)`.
+"""
+
+import logging
+import re
+import unicodedata
+
+from django.apps import apps
+from django.db import DatabaseError, connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+logger = logging.getLogger(__name__)
+
+CAMPO = "busca"
+MODELOS = ("app_colaboradores.Colaborador", "app_epis.EPI")
+
+# innodb_ft_min_token_size padrão: termos menores usam LIKE na coluna `busca`.
+MYSQL_TOKEN_MINIMO = 3
+# Caracteres do índice B-tree de prefixo de `busca` no MySQL (LIKE 'termo%').
+MYSQL_PREFIXO_INDICE = 32
+MAX_TERMOS = 8
+
+_TOKEN = re.compile(r"[^\W_]+")
+_fts_ok: set[tuple[str, str]] = set()
+
+
+def normaliza(texto) -> str:
+    """Remove acentos e aplica casefold: "Nitrílica" -> "nitrilica"."""
+    decomposto = unicodedata.normalize("NFKD", str(texto or ""))
+    return "".join(c for c in decomposto if not unicodedata.combining(c)).casefold()
+
+
+def documento(*partes) -> str:
+    """Documento de busca: palavras normalizadas de `partes`, separadas por espaço."""
+    return " ".join(_TOKEN.findall(normaliza(" ".join(str(p) for p in partes if p))))
+
+
+def termos(q: str) -> list[str]:
+    return _TOKEN.findall(normaliza(q))[:MAX_TERMOS]
+
+
+def _tabela_fts(model) -> str:
+    return f"{model._meta.db_table}_fts"
+
+
+def _tem_fts(conn, model) -> bool:
+    chave = (conn.alias, _tabela_fts(model))
+    if chave in _fts_ok:
+        return True
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [_tabela_fts(model)]
+        )
+        if cur.fetchone():
+            _fts_ok.add(chave)
+            return True
+    return False
+
+
+def _restringe(ts: list[str]) -> bool:
+    """Há termo que o FULLTEXT do MySQL indexa (os curtos só refinam o resultado dele)."""
+    return any(len(t) >= MYSQL_TOKEN_MINIMO for t in ts)
+
+
+def condicao(model, termo: str, using: str = "default", restrito: bool = False) -> Q:
+    """
+    Q que seleciona as linhas de `model` com uma palavra começando por `termo`.
+    `restrito`: outro termo da mesma busca já usa o índice textual (ver _restringe).
+    """
+    conn = connections[using]
+    tabela = model._meta.db_table
+    if conn.vendor == "sqlite" and _tem_fts(conn, model):
+        fts = _tabela_fts(model)
+        sql = f'SELECT rowid FROM "{fts}" WHERE "{fts}" MATCH %s'
+        return Q(pk__in=RawSQL(sql, [f'"{termo}"*']))
+    if conn.vendor == "mysql" and len(termo) >= MYSQL_TOKEN_MINIMO:
+        sql = f"SELECT id FROM `{tabela}` WHERE MATCH (`{CAMPO}`) AGAINST (%s IN BOOLEAN MODE)"
+        return Q(pk__in=RawSQL(sql, [f"{termo}*"]))
+    if conn.vendor == "mysql" and not restrito:
+        return Q(**{f"{CAMPO}__startswith": termo})
+    return Q(**{f"{CAMPO}__startswith": termo}) | Q(**{f"{CAMPO}__contains": f" {termo}"})
+
+
+def filtra(qs, q: str):
+    """Filtra `qs` (modelo buscável) exigindo todos os termos de `q`."""
+    ts = termos(q)
+    for termo in ts:
+        qs = qs.filter(condicao(qs.model, termo, qs.db, _restringe(ts)))
+    return qs
+
+
+def filtra_relacionados(qs, q: str, relacoes):
+    """
+    Filtra `qs` pelos documentos dos modelos relacionados em `relacoes`
+    (ex.: ("colaborador", "epi")): cada termo precisa casar em pelo menos um deles.
+    Cada termo vira subconsultas indexadas de ids, sem JOIN com LIKE.
+    """
+    ts = termos(q)
+    for termo in ts:
+        cond = Q()
+        for rel in relacoes:
+            modelo = qs.model._meta.get_field(rel).related_model
+            ids = modelo._default_manager.filter(
+                condicao(modelo, termo, qs.db, _restringe(ts))
+            ).values("pk")
+            cond |= Q(**{f"{rel}__in": ids})
+        qs = qs.filter(cond)
+    return qs
+
+
+# ----- Instalação dos índices (post_migrate) -----
+def _instala_fts5(conn, model):
+    tabela, fts = model._meta.db_table, _tabela_fts(model)
+    with conn.cursor() as cur:
+        cur.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS "{fts}" '
+            f"USING fts5({CAMPO}, content='{tabela}', content_rowid='id')"
+        )
+        # Triggers recriados a cada migrate: o SQLite os descarta ao refazer a tabela.
+        cur.execute(
+            f'CREATE TRIGGER IF NOT EXISTS "{fts}_ai" AFTER INSERT ON "{tabela}" BEGIN '
+            f'INSERT INTO "{fts}"(rowid, {CAMPO}) VALUES (new.id, new.{CAMPO}); END'
+        )
+        cur.execute(
+            f'CREATE TRIGGER IF NOT EXISTS "{fts}_ad" AFTER DELETE ON "{tabela}" BEGIN '
+            f'INSERT INTO "{fts}"("{fts}", rowid, {CAMPO}) VALUES (\'delete\', old.id, old.{CAMPO}); '
+            f"END"
+        )
+        cur.execute(
+            f'CREATE TRIGGER IF NOT EXISTS "{fts}_au" AFTER UPDATE OF {CAMPO} ON "{tabela}" BEGIN '
+            f'INSERT INTO "{fts}"("{fts}", rowid, {CAMPO}) VALUES (\'delete\', old.id, old.{CAMPO}); '
+            f'INSERT INTO "{fts}"(rowid, {CAMPO}) VALUES (new.id, new.{CAMPO}); END'
+        )
+        cur.execute(f'INSERT INTO "{fts}"("{fts}") VALUES (\'rebuild\')')
+
+
+def _instala_fulltext(conn, model):
+    tabela = model._meta.db_table
+    indices = {
+        f"{tabela}_busca_ft": f"FULLTEXT INDEX `{tabela}_busca_ft` (`{CAMPO}`)",
+        # `busca` é TEXT: o B-tree precisa de tamanho de prefixo (termos curtos).
+        f"{tabela}_busca_prefixo": (
+            f"INDEX `{tabela}_busca_prefixo` (`{CAMPO}`({MYSQL_PREFIXO_INDICE}))"
+        ),
+    }
+    with conn.cursor() as cur:
+        for indice, definicao in indices.items():
+            cur.execute(
+                "SELECT 1 FROM information_schema.STATISTICS "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s",
+                [tabela, indice],
+            )
+            if not cur.fetchone():
+                cur.execute(f"ALTER TABLE `{tabela}` ADD {definicao}")
+
+
+def instala_indices(using: str = "default", **kwargs) -> None:
+    """Cria (se faltar) o índice textual de cada modelo de MODELOS."""
+    conn = connections[using]
+    instalar = {"sqlite": _instala_fts5, "mysql": _instala_fulltext}.get(conn.vendor)
+    if instalar is None:
+        return
+    for label in MODELOS:
+        model = apps.get_model(label)
+        try:
+            instalar(conn, model)
+        except DatabaseError as exc:
+            # Ex.: SQLite sem FTS5 — a busca continua funcionando via LIKE.
+            logger.warning("Índice de busca indisponível para %s: %s", label, exc)
@@ -0,0 +1,50 @@
+# app_core/datas.py
+"""
+Períodos de calendário como intervalos de instantes.
+
+Filtros como `data_entrega__date__gte` ou `__year/__month` aplicam a
+conversão de fuso e DATE()/EXTRACT() na coluna, e aí o banco não usa o
+índice. Aqui um dia (ou mês) local vira o intervalo semiaberto
+[início, fim) em datetimes aware no fuso atual, que o banco compara direto
+com a coluna indexada.
+"""
+
+from datetime import date, datetime, time, timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+
+
+def data_local(instante) -> date:
+    """A data no fuso atual de um datetime (aware ou não)."""
+    return timezone.localdate(instante) if timezone.is_aware(instante) else instante.date()
+
+
+def inicio_do_dia(dia: date) -> datetime:
+    """Meia-noite local de `dia`, aware."""
+    return timezone.make_aware(datetime.combine(dia, time.min))
+
+
+def intervalo(de: date | None = None, ate: date | None = None):
+    """(início, fim) do período de `de` a `ate` (inclusive); None no lado em aberto."""
+    inicio = inicio_do_dia(de) if de else None
+    fim = inicio_do_dia(ate + timedelta(days=1)) if ate else None
+    return inicio, fim
+
+
+def intervalo_mes(dia: date):
+    """(início, fim) do mês de `dia`."""
+    primeiro = dia.replace(day=1)
+    seguinte = (primeiro + timedelta(days=32)).replace(day=1)
+    return intervalo(primeiro, seguinte - timedelta(days=1))
+
+
+def filtro_periodo(campo: str, de: date | None = None, ate: date | None = None) -> Q:
+    """Q com `campo >= início` e `campo < fim` para os lados informados."""
+    inicio, fim = intervalo(de, ate)
+    q = Q()
+    if inicio is not None:
+        q &= Q(**{f"{campo}__gte": inicio})
+    if fim is not None:
+        q &= Q(**{f"{campo}__lt": fim})
+    return q
@@ -0,0 +1,45 @@
+# app_core/fragmentos.py
+"""
+Renderização parcial das listagens.
+
+Com o header `X-Fragmento: 1` (enviado por static/js/fragmentos.js), as listas
+devolvem só a tabela de resultados e a paginação, sem o layout (sidebar,
+topbar, mensagens) nem o formulário de filtros. Sem o header, a página é a
+de sempre: o script é só um aprimoramento progressivo.
+"""
+
+from django.shortcuts import render
+from django.utils.cache import patch_vary_headers
+
+HEADER = "X-Fragmento"
+
+
+def eh_fragmento(request) -> bool:
+    return request.headers.get(HEADER) == "1"
+
+
+def responde(request, template: str, template_fragmento: str, context: dict):
+    """render() da página ou do fragmento, conforme o header da requisição."""
+    resposta = render(request, template_fragmento if eh_fragmento(request) else template, context)
+    patch_vary_headers(resposta, (HEADER,))
+    return resposta
+
+
+class FragmentoMixin:
+    """ListView que, com o header de fragmento, renderiza `fragment_template_name`."""
+
+    fragment_template_name = None
+
+    @property
+    def fragmento(self) -> bool:
+        return bool(self.fragment_template_name) and eh_fragmento(self.request)
+
+    def get_template_names(self):
+        if self.fragmento:
+            return [self.fragment_template_name]
+        return super().get_template_names()
+
+    def render_to_response(self, context, **response_kwargs):
+        resposta = super().render_to_response(context, **response_kwargs)
+        patch_vary_headers(resposta, (HEADER,))
+        return resposta
@@ -0,0 +1,65 @@
+# app_core/management/commands/analisar_consultas.py
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from app_core import planos
+
+
+class Command(BaseCommand):
+    help = (
+        "Roda as telas principais (lista de entregas, relatório, home, gerenciar solicitações) "
+        "sobre uma massa de dados, passa as consultas por EXPLAIN e aponta varreduras completas, "
+        "ordenações em tabela temporária e índices sugeridos. A massa é descartada ao final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--entregas", type=int, default=500, help="Entregas na massa de dados")
+        parser.add_argument(
+            "--atualizar", action="store_true", help="Grava os planos atuais como snapshot"
+        )
+        parser.add_argument(
+            "--verificar",
+            action="store_true",
+            help="Falha se os planos divergirem do snapshot do banco atual",
+        )
+        parser.add_argument("--sql", action="store_true", help="Mostra o SQL de cada consulta")
+
+    def handle(self, *args, **options):
+        if connection.vendor not in {"sqlite", "mysql"}:
+            raise CommandError(f"EXPLAIN não suportado para {connection.vendor}.")
+
+        with transaction.atomic():
+            usuario = planos.semear(options["entregas"])
+            resultado = planos.analisa(usuario)
+            transaction.set_rollback(True)
+
+        for nome, consultas in resultado.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(nome))
+            for i, p in enumerate(consultas):
+                alertas = [f"varredura: {t}" for t in p["varreduras"]]
+                if p["ordenacao_temporaria"]:
+                    alertas.append("ordenação temporária")
+                linha = f"  [{i}] índices: {', '.join(p['indices']) or '-'}"
+                if alertas:
+                    linha += "  " + self.style.WARNING("; ".join(alertas))
+                self.stdout.write(linha)
+                if options["sql"]:
+                    self.stdout.write(f"      {p['sql']}")
+
+        sugestoes = planos.sugere_indices(resultado)
+        if sugestoes:
+            self.stdout.write(self.style.MIGRATE_HEADING("Índices sugeridos"))
+            for label, campos in sugestoes:
+                self.stdout.write(f"  {label}: models.Index(fields={campos!r})")
+
+        if options["atualizar"]:
+            caminho = planos.grava_snapshot(connection.vendor, resultado)
+            self.stdout.write(self.style.SUCCESS(f"Snapshot gravado em {caminho}"))
+        elif options["verificar"]:
+            snapshot = planos.le_snapshot(connection.vendor)
+            if snapshot is None:
+                raise CommandError(f"Sem snapshot para {connection.vendor}; rode com --atualizar.")
+            erros = planos.regressoes(resultado, snapshot)
+            if erros:
+                raise CommandError("Planos divergentes do snapshot:\n" + "\n".join(erros))
+            self.stdout.write(self.style.SUCCESS("Planos iguais ao snapshot."))
@@ -0,0 +1,42 @@
+# app_core/management/commands/reindexar_busca.py
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from app_core.busca import MODELOS, instala_indices
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula o documento de busca (campo `busca`) de Colaboradores e EPIs e "
+        "reconstrói o índice textual (FULLTEXT no MySQL, FTS5 no SQLite)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lote", type=int, default=1000, help="Linhas por UPDATE em lote")
+
+    def handle(self, *args, **options):
+        lote = options["lote"]
+        for label in MODELOS:
+            model = apps.get_model(label)
+            qs = model.objects.all()
+            if label == "app_epis.EPI":
+                qs = qs.select_related("categoria")
+            total, pendentes = 0, []
+            for obj in qs.iterator(chunk_size=lote):
+                obj.busca = obj.documento_busca()
+                pendentes.append(obj)
+                if len(pendentes) >= lote:
+                    total += self._grava(model, pendentes)
+            total += self._grava(model, pendentes)
+            self.stdout.write(f"{label}: {total}")
+        instala_indices()
+        self.stdout.write(self.style.SUCCESS("Índice de busca atualizado."))
+
+    @staticmethod
+    def _grava(model, pendentes) -> int:
+        with transaction.atomic():
+            model.objects.bulk_update(pendentes, ["busca"])
+        n = len(pendentes)
+        pendentes.clear()
+        return n
@@ -0,0 +1,291 @@
+# app_core/paginacao.py
+"""
+Paginação sem COUNT(*) exato.
+
+- CursorPaginator (keyset): em vez de COUNT(*) + OFFSET, cada página filtra a
+  partir da chave da última linha vista (ex.: data_entrega, id), usando o índice
+  da ordenação. O custo de uma página não depende da sua posição na listagem.
+- PaginadorAproximado: Paginator comum cujo total é exato só até um limite;
+  acima dele usa as estatísticas do banco ("~12.000 resultados"). A estimativa
+  serve só para exibição: cada página busca per_page + 1 linhas para saber se
+  existe e se há próxima.
+"""
+
+import base64
+import json
+import logging
+import math
+from functools import reduce
+from types import SimpleNamespace
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db import DatabaseError, connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+logger = logging.getLogger(__name__)
+
+# Teto da contagem aproximada: acima disso a tela mostra "mais de N".
+LIMITE_CONTAGEM = 1000
+
+
+def _codifica(valores, direcao: str) -> str:
+    bruto = json.dumps({"v": valores, "d": direcao}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(bruto.encode()).decode().rstrip("=")
+
+
+def _decodifica(cursor: str):
+    try:
+        bruto = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        dados = json.loads(bruto)
+        return dados["v"], dados["d"]
+    except (ValueError, KeyError, TypeError):
+        return None, None
+
+
+class PaginaCursor:
+    """Página de um CursorPaginator (interface próxima de django.core.paginator.Page)."""
+
+    def __init__(self, object_list, has_next, has_previous, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+
+class CursorPaginator:
+    """
+    Pagina `queryset` pela chave `campos` (a última deve ser única, ex.: "id"),
+    em ordem decrescente por padrão. Os cursores são opacos (base64 de JSON).
+    """
+
+    def __init__(self, queryset, per_page: int, campos=("data_entrega", "id"), descendente=True):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.campos = tuple(campos)
+        self.descendente = descendente
+        model = queryset.model
+        self._fields = [model._meta.get_field(c) for c in self.campos]
+
+    def _ordem(self, invertida: bool):
+        desc = self.descendente != invertida
+        return [f"-{c}" if desc else c for c in self.campos]
+
+    def _apos(self, valores, invertida: bool) -> Q:
+        """Linhas estritamente depois da chave `valores` na ordem da página."""
+        lookup = "lt" if self.descendente != invertida else "gt"
+        condicoes = []
+        for i, campo in enumerate(self.campos):
+            iguais = {c: v for c, v in zip(self.campos[:i], valores[:i])}
+            condicoes.append(Q(**iguais, **{f"{campo}__{lookup}": valores[i]}))
+        return reduce(lambda a, b: a | b, condicoes)
+
+    def _chave(self, obj):
+        if isinstance(obj, dict):  # querysets com .values(): precisam incluir `campos`
+            obj = SimpleNamespace(**{f.attname: obj[c] for f, c in zip(self._fields, self.campos)})
+        return [f.value_to_string(obj) for f in self._fields]
+
+    def _valores(self, brutos):
+        return [f.to_python(v) for f, v in zip(self._fields, brutos)]
+
+    def _posicao(self, cursor: str | None):
+        """(valores da chave, é página anterior?) de um cursor; (None, False) se inválido."""
+        brutos, direcao = _decodifica(cursor) if cursor else (None, None)
+        valores = None
+        if brutos is not None and len(brutos) == len(self.campos):
+            try:
+                valores = self._valores(brutos)
+            except (ValidationError, TypeError, ValueError):  # cursor adulterado
+                valores = None
+        return valores, valores is not None and direcao == "p"
+
+    def restante(self, cursor: str | None):
+        """Tudo o que vem depois de `cursor` (de "próximas"), já ordenado e sem limite."""
+        valores, _ = self._posicao(cursor)
+        qs = self.queryset if valores is None else self.queryset.filter(self._apos(valores, False))
+        return qs.order_by(*self._ordem(invertida=False))
+
+    def get_page(self, cursor: str | None) -> PaginaCursor:
+        valores, anterior = self._posicao(cursor)
+        qs = self.queryset
+        if valores is not None:
+            qs = qs.filter(self._apos(valores, invertida=anterior))
+        linhas = list(qs.order_by(*self._ordem(invertida=anterior))[: self.per_page + 1])
+        mais = len(linhas) > self.per_page
+        linhas = linhas[: self.per_page]
+        if anterior:
+            linhas.reverse()
+            has_next, has_previous = True, mais
+        else:
+            has_next, has_previous = mais, valores is not None
+
+        next_cursor = _codifica(self._chave(linhas[-1]), "n") if linhas and has_next else None
+        previous_cursor = (
+            _codifica(self._chave(linhas[0]), "p") if linhas and has_previous else None
+        )
+        return PaginaCursor(linhas, has_next, has_previous, next_cursor, previous_cursor)
+
+    def total_aproximado(self, limite: int = LIMITE_CONTAGEM) -> tuple[int, bool]:
+        """
+        Contagem limitada: (total, exato). Conta no máximo `limite` + 1 linhas,
+        então o custo não cresce com a tabela; acima do limite, exato=False.
+        """
+        total = self.queryset.order_by()[: limite + 1].count()
+        return min(total, limite), total <= limite
+
+
+# ----- Contagem aproximada -----
+def _estatistica_tabela(conn, tabela: str) -> int | None:
+    """Linhas da tabela segundo as estatísticas do banco (sem varrer a tabela)."""
+    with conn.cursor() as cur:
+        if conn.vendor == "mysql":
+            cur.execute(
+                "SELECT TABLE_ROWS FROM information_schema.TABLES "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+                [tabela],
+            )
+            linha = cur.fetchone()
+            return int(linha[0]) if linha and linha[0] is not None else None
+        if conn.vendor == "sqlite":
+            # sqlite_stat1 só existe depois de um ANALYZE; "stat" começa pelo nº de linhas.
+            cur.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = %s", [tabela])
+            totais = [int(stat.split()[0]) for (stat,) in cur.fetchall() if stat]
+            return max(totais) if totais else None
+    return None
+
+
+def _estimativa_plano(conn, queryset) -> int | None:
+    """Linhas estimadas pelo otimizador do MySQL (EXPLAIN) para um queryset filtrado."""
+    if conn.vendor != "mysql":
+        return None
+    sql, params = queryset.order_by().query.sql_with_params()
+    with conn.cursor() as cur:
+        cur.execute(f"EXPLAIN {sql}", params)
+        colunas = [c[0].lower() for c in cur.description]
+        linhas = [dict(zip(colunas, r)) for r in cur.fetchall()]
+    if not linhas or linhas[0].get("rows") is None:
+        return None
+    # Só as tabelas do SELECT principal (os joins multiplicam); subconsultas
+    # (DEPENDENT SUBQUERY etc.) rodam por linha e não mudam o total.
+    principais = [
+        linha
+        for linha in linhas
+        if str(linha.get("select_type") or "SIMPLE").upper() in ("SIMPLE", "PRIMARY")
+    ]
+    estimativa = 1.0
+    for linha in principais or linhas[:1]:
+        estimativa *= float(linha.get("rows") or 1) * float(linha.get("filtered") or 100) / 100
+    return math.ceil(estimativa)
+
+
+def estimativa_linhas(queryset) -> int | None:
+    """
+    Estimativa de linhas de `queryset`: estatística da tabela quando não há
+    filtro, EXPLAIN (MySQL) quando há. None se o banco não souber estimar.
+    """
+    conn = connections[queryset.db]
+    try:
+        if not queryset.query.where and not queryset.query.distinct:
+            return _estatistica_tabela(conn, queryset.model._meta.db_table)
+        return _estimativa_plano(conn, queryset)
+    except DatabaseError as exc:
+        logger.debug("Sem estimativa de linhas para %s: %s", queryset.model.__name__, exc)
+        return None
+
+
+def contagem_aproximada(queryset, limite: int = LIMITE_CONTAGEM) -> tuple[int, bool]:
+    """
+    (total, exato). Até `limite` linhas a contagem é exata e limitada; acima,
+    usa estimativa_linhas() e, se o banco não estimar, cai no COUNT(*) exato.
+    """
+    limitada = queryset.order_by()[: limite + 1].count()
+    if limitada <= limite:
+        return limitada, True
+    estimativa = estimativa_linhas(queryset)
+    if estimativa is None:
+        return queryset.count(), True
+    return max(estimativa, limitada), False
+
+
+class PaginaAproximada(Page):
+    """Página cuja existência e `has_next` vêm das linhas buscadas, não do total estimado."""
+
+    def __init__(self, object_list, number, paginator, tem_proxima):
+        super().__init__(object_list, number, paginator)
+        self._tem_proxima = tem_proxima
+
+    def has_next(self):
+        return self._tem_proxima
+
+    def end_index(self):
+        return self.start_index() + len(self.object_list) - 1
+
+
+class PaginadorAproximado(Paginator):
+    """
+    Paginator para ListView/admin que não bloqueia num COUNT(*) de tabela grande.
+    `exato` indica se `count` é o total real ou uma estimativa. Com estimativa,
+    o número da página é validado pelas próprias linhas (per_page + 1 a partir
+    do OFFSET): uma estimativa baixa não esconde páginas reais nem gera 404.
+    """
+
+    limite_exato = LIMITE_CONTAGEM
+
+    @cached_property
+    def _contagem(self):
+        if not hasattr(self.object_list, "query"):  # listas comuns
+            return len(self.object_list), True
+        return contagem_aproximada(self.object_list, self.limite_exato)
+
+    @cached_property
+    def count(self):
+        return self._contagem[0]
+
+    @property
+    def exato(self) -> bool:
+        return self._contagem[1]
+
+    def validate_number(self, number):
+        if self.exato:
+            return super().validate_number(number)
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(self.error_messages["invalid_page"]) from None
+        if number < 1:
+            raise EmptyPage(self.error_messages["min_page"])
+        return number
+
+    def page(self, number):
+        if self.exato:
+            return super().page(number)
+        number = self.validate_number(number)
+        inicio = (number - 1) * self.per_page
+        linhas = list(self.object_list[inicio : inicio + self.per_page + self.orphans + 1])
+        if not linhas and number > 1:
+            raise EmptyPage(self.error_messages["no_results"])
+        tem_proxima = len(linhas) > self.per_page + self.orphans
+        if tem_proxima:
+            linhas = linhas[: self.per_page]
+        # "Página N de ~M" nunca mostra M menor que a página atual.
+        self.num_pages = max(self.num_pages, number + tem_proxima)
+        return PaginaAproximada(linhas, number, self, tem_proxima)
@@ -0,0 +1,286 @@
+# app_core/planos.py
+"""
+Planos de execução das telas mais acessadas.
+
+Cada rota de ROTAS é chamada com um superusuário (RequestFactory) e as
+consultas SQL emitidas são capturadas e passadas por EXPLAIN. Do plano
+ficam só os pontos que importam: tabelas varridas por inteiro, índices
+usados e ordenação em tabela temporária (filesort / TEMP B-TREE). O
+resumo é comparado com um snapshot versionado (`tests/snapshots/`), e
+`sugere_indices` propõe índices compostos para as consultas sinalizadas.
+"""
+
+import json
+import random
+import re
+from datetime import timedelta
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from .datas import data_local
+
+SNAPSHOT_DIR = Path(settings.BASE_DIR) / "tests" / "snapshots"
+SEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+
+# (nome, url name, querystring)
+ROTAS = (
+    ("entregas_lista", "app_entregas:lista", {}),
+    ("entregas_lista_status", "app_entregas:lista", {"status": "EMPRESTADO"}),
+    ("relatorio", "app_relatorios:index", {"data_de": "2024-01-01", "status": "EMPRESTADO"}),
+    ("home", "app_core:home", {}),
+    ("solicitacoes_gerenciar", "app_entregas:solicitacoes_gerenciar", {}),
+)
+
+_SQLITE_PASSO = re.compile(r"^(SCAN|SEARCH) (\S+)(?: AS \S+)?(.*)$")
+_SQLITE_INDICE = re.compile(r"USING (?:COVERING )?INDEX (\S+)|USING (INTEGER PRIMARY KEY)")
+_COLUNA = r"[`\"]{tabela}[`\"]\.[`\"](\w+)[`\"]"
+
+
+def caminho_snapshot(vendor: str) -> Path:
+    return SNAPSHOT_DIR / f"planos_{vendor}.json"
+
+
+# ----- Massa de dados -----
+def semear(entregas: int = 500, seed: int = 42):
+    """
+    Massa determinística para os planos (bulk_create, sem movimentar estoque;
+    o resumo diário das entregas é reconstruído no fim).
+    Devolve o superusuário usado nas requisições.
+    """
+    from app_colaboradores.models import Colaborador
+    from app_entregas.models import Entrega, Solicitacao
+    from app_epis.models import EPI, CategoriaEPI
+    from app_relatorios import resumo
+
+    rnd = random.Random(seed)
+    agora = timezone.now()
+    cats = CategoriaEPI.objects.bulk_create(
+        CategoriaEPI(nome=f"Planos categoria {i}") for i in range(3)
+    )
+    epis = EPI.objects.bulk_create(
+        EPI(codigo=f"PLN-{i:03}", nome=f"EPI planos {i}", categoria=cats[i % 3], estoque=100)
+        for i in range(40)
+    )
+    cols = Colaborador.objects.bulk_create(
+        Colaborador(nome=f"Planos {i:03}", email=f"planos{i}@exemplo.com", matricula=f"PLN{i:03}")
+        for i in range(60)
+    )
+    status_entrega = [s for s, _ in Entrega.Status.choices]
+    novas = [
+        Entrega(
+            colaborador=rnd.choice(cols),
+            epi=rnd.choice(epis),
+            quantidade=rnd.randint(1, 3),
+            status=rnd.choice(status_entrega),
+            data_entrega=agora - timedelta(days=rnd.randint(0, 720)),
+            data_prevista_devolucao=agora + timedelta(days=rnd.randint(-30, 30)),
+        )
+        for _ in range(entregas)
+    ]
+    for entrega in novas:
+        entrega.data_entrega_local = data_local(entrega.data_entrega)
+    Entrega.objects.bulk_create(novas)
+    status_solicitacao = [s for s, _ in Solicitacao.Status.choices]
+    Solicitacao.objects.bulk_create(
+        Solicitacao(
+            colaborador=rnd.choice(cols),
+            epi=rnd.choice(epis),
+            status=rnd.choice(status_solicitacao),
+        )
+        for _ in range(entregas // 2)
+    )
+    resumo.reconstroi()
+    return get_user_model().objects.create_superuser("planos", "planos@exemplo.com", None)
+
+
+# ----- Captura e EXPLAIN -----
+def captura_consultas(usuario, rota: str, params: dict, using: str = "default") -> list[str]:
+    """SELECTs distintos emitidos pela view de `rota` (na ordem em que rodaram)."""
+    request = RequestFactory().get(reverse(rota), params)
+    request.user = usuario
+    match = resolve(request.path_info)
+    with CaptureQueriesContext(connections[using]) as ctx:
+        resposta = match.func(request, *match.args, **match.kwargs)
+        if hasattr(resposta, "render"):
+            resposta.render()
+    vistas, consultas = set(), []
+    for q in ctx.captured_queries:
+        sql = q["sql"]
+        if sql.lstrip().upper().startswith("SELECT") and sql not in vistas:
+            vistas.add(sql)
+            consultas.append(sql)
+    return consultas
+
+
+def _plano_sqlite(cur, sql):
+    cur.execute(f"EXPLAIN QUERY PLAN {sql}")
+    varreduras, indices, temporaria = set(), set(), False
+    for *_, detalhe in cur.fetchall():
+        if detalhe.startswith("USE TEMP B-TREE"):
+            temporaria = True
+            continue
+        passo = _SQLITE_PASSO.match(detalhe)
+        if not passo or passo.group(2).startswith("("):
+            continue
+        acao, tabela, resto = passo.groups()
+        if "VIRTUAL TABLE" in resto:
+            indices.add(f"{tabela}:fts")
+            continue
+        indice = _SQLITE_INDICE.search(resto)
+        if indice:
+            indices.add(indice.group(1) or f"{tabela}:pk")
+        elif acao == "SCAN":
+            varreduras.add(tabela)
+    return varreduras, indices, temporaria
+
+
+def _plano_mysql(cur, sql):
+    cur.execute(f"EXPLAIN {sql}")
+    colunas = [c[0].lower() for c in cur.description]
+    varreduras, indices, temporaria = set(), set(), False
+    for linha in cur.fetchall():
+        linha = dict(zip(colunas, linha))
+        extra = linha.get("extra") or ""
+        if "filesort" in extra or "temporary" in extra:
+            temporaria = True
+        if linha.get("key"):
+            indices.add(linha["key"])
+        elif linha.get("type") == "ALL":
+            varreduras.add(linha.get("table"))
+    return varreduras, indices, temporaria
+
+
+def explica(sql: str, using: str = "default") -> dict:
+    """Resumo do plano: {"varreduras": [...], "indices": [...], "ordenacao_temporaria": bool}."""
+    conn = connections[using]
+    analisar = {"sqlite": _plano_sqlite, "mysql": _plano_mysql}[conn.vendor]
+    with conn.cursor() as cur:
+        varreduras, indices, temporaria = analisar(cur, sql)
+        tabelas = set(conn.introspection.table_names(cur))
+    return {
+        # Só tabelas reais: tabelas derivadas ("subquery") não têm índice a sugerir.
+        "varreduras": sorted(varreduras & tabelas),
+        "indices": sorted(indices),
+        "ordenacao_temporaria": temporaria,
+    }
+
+
+def analisa(usuario, using: str = "default") -> dict:
+    """{nome da rota: [{"sql": ..., **plano}, ...]} para todas as ROTAS."""
+    # Sem cache: toda consulta da tela precisa rodar para ser analisada.
+    with override_settings(CACHES=SEM_CACHE):
+        return _analisa(usuario, using)
+
+
+def _analisa(usuario, using):
+    return {
+        nome: [
+            {"sql": sql, **explica(sql, using)}
+            for sql in captura_consultas(usuario, rota, params, using)
+        ]
+        for nome, rota, params in ROTAS
+    }
+
+
+def resumo(planos: dict) -> dict:
+    """Planos sem o SQL: é o que vai para o snapshot."""
+    return {
+        nome: [{k: v for k, v in p.items() if k != "sql"} for p in consultas]
+        for nome, consultas in planos.items()
+    }
+
+
+def le_snapshot(vendor: str) -> dict | None:
+    caminho = caminho_snapshot(vendor)
+    if not caminho.exists():
+        return None
+    return json.loads(caminho.read_text(encoding="utf-8"))
+
+
+def grava_snapshot(vendor: str, planos: dict) -> Path:
+    caminho = caminho_snapshot(vendor)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    caminho.write_text(
+        json.dumps(resumo(planos), indent=2, ensure_ascii=False) + "\n", encoding="utf-8"
+    )
+    return caminho
+
+
+def regressoes(planos: dict, snapshot: dict) -> list[str]:
+    """Diferenças entre os planos atuais e o snapshot, uma linha por consulta."""
+    atual = resumo(planos)
+    erros = []
+    for nome in sorted(set(atual) | set(snapshot)):
+        antes, agora = snapshot.get(nome, []), atual.get(nome, [])
+        if len(antes) != len(agora):
+            erros.append(f"{nome}: {len(antes)} consultas no snapshot, {len(agora)} agora")
+            continue
+        for i, (a, b) in enumerate(zip(antes, agora)):
+            if a != b:
+                erros.append(f"{nome}[{i}]: {a} -> {b}")
+    return erros
+
+
+# ----- Sugestão de índices -----
+def _modelo_da_tabela(tabela: str):
+    for model in apps.get_models():
+        if model._meta.db_table == tabela:
+            return model
+    return None
+
+
+def _ja_indexado(model, campos: list[str]) -> bool:
+    existentes = [list(ix.fields) for ix in model._meta.indexes]
+    existentes += [list(u) for u in model._meta.unique_together]
+    existentes += [[f.name] for f in model._meta.fields if f.db_index or f.unique or f.primary_key]
+    return any(ix[: len(campos)] == campos for ix in existentes)
+
+
+def sugere_indices(planos: dict) -> list[tuple[str, list[str]]]:
+    """
+    Para cada tabela varrida ou ordenada em tabela temporária, propõe um
+    índice com as colunas de igualdade do WHERE seguidas das de ORDER BY
+    (ou, sem ORDER BY, das de intervalo). Ignora o que um índice existente já cobre.
+    """
+    sugestoes = []
+    for consultas in planos.values():
+        for p in consultas:
+            sql = p["sql"]
+            alvo = set(p["varreduras"])
+            if p["ordenacao_temporaria"]:
+                alvo |= set(re.findall(r"ORDER BY [`\"](\w+)[`\"]", sql))
+            onde, _, ordem = sql.partition(" ORDER BY ")
+            onde = onde.partition(" WHERE ")[2]
+            for tabela in sorted(alvo):
+                model = _modelo_da_tabela(tabela)
+                if model is None:
+                    continue
+                col = _COLUNA.format(tabela=re.escape(tabela))
+                iguais = re.findall(col + r" (?:= |IN \()", onde)
+                intervalo = re.findall(col + r" (?:[<>]=? |BETWEEN )", onde)
+                ordenacao = re.findall(col, ordem)
+                colunas = list(dict.fromkeys(iguais + (ordenacao or intervalo)))
+                por_coluna = {f.column: f.name for f in model._meta.fields}
+                campos = [por_coluna[c] for c in colunas if c in por_coluna]
+                if campos and not _ja_indexado(model, campos):
+                    sugestoes.append((model._meta.label, campos))
+    # Um índice que é prefixo de outro sugerido para o mesmo modelo é redundante.
+    return [
+        (label, campos)
+        for i, (label, campos) in enumerate(sugestoes)
+        if not any(
+            outro == label
+            and (len(maiores) > len(campos) or (maiores == campos and j < i))
+            and maiores[: len(campos)] == campos
+            for j, (outro, maiores) in enumerate(sugestoes)
+            if j != i
+        )
+    ]
@@ -7,4 +7,5 @@ app_name = "app_core"
 urlpatterns = [
     path("", views.home, name="home"),
     path("teste-mensagens/", views.testar_mensagens, name="teste_mensagens"),
+    path("autocomplete/<str:fonte>/", views.autocomplete, name="autocomplete"),
 ]
@@ -1,14 +1,36 @@
 # app_core/views.py
+import hashlib
+
 from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
 from django.db.models import Sum
 from django.db.models.functions import Coalesce
+from django.http import Http404, JsonResponse
 from django.shortcuts import redirect, render
 from django.utils import timezone
 
 from app_colaboradores.models import Colaborador
-from app_entregas.models import Entrega, Solicitacao
+from app_entregas.models import Entrega, FatiaEstoque, MovimentacaoEstoque, Solicitacao
 from app_epis.models import EPI
 
+from . import busca, datas
+
+AUTOCOMPLETE_LIMITE = 20
+AUTOCOMPLETE_TTL = 60  # segundos
+
+# fonte -> queryset base (com os campos usados no __str__ do modelo)
+AUTOCOMPLETE_FONTES = {
+    "colaboradores": lambda: Colaborador.objects.only("id", "nome", "matricula"),
+    "epis": lambda: EPI.objects.only("id", "nome", "codigo"),
+}
+# fonte -> permissão exigida para listar seus itens
+AUTOCOMPLETE_PERMISSOES = {
+    "colaboradores": "app_colaboradores.view_colaborador",
+    "epis": "app_epis.view_epi",
+}
+
 
 def home(request):
 
@@ -16,15 +38,15 @@ def home(request):
 
     fora_do_estoque = [s for s in status_codes if s not in {"DEVOLVIDO", "CANCELADO"}]
 
-    agora = timezone.now()
+    inicio_mes, fim_mes = datas.intervalo_mes(timezone.localdate())
 
     devolvidos_mes = 0
     if "DEVOLVIDO" in status_codes:
         devolvidos_mes = (
             Entrega.objects.filter(
                 status="DEVOLVIDO",
-                data_entrega__year=agora.year,
-                data_entrega__month=agora.month,
+                data_entrega__gte=inicio_mes,
+                data_entrega__lt=fim_mes,
             )
             .only("id")
             .count()
@@ -33,7 +55,13 @@ def home(request):
     ctx = {
         "total_colaboradores": Colaborador.objects.only("id").count(),
         "total_epis": EPI.objects.only("id").count(),
-        "estoque_total": (EPI.objects.aggregate(total=Coalesce(Sum("estoque"), 0)).get("total", 0)),
+        "estoque_total": (EPI.objects.aggregate(total=Coalesce(Sum("estoque"), 0)).get("total", 0))
+        + (FatiaEstoque.objects.aggregate(total=Coalesce(Sum("saldo"), 0)).get("total", 0))
+        + (
+            MovimentacaoEstoque.objects.filter(compactada=False)
+            .aggregate(total=Coalesce(Sum("quantidade"), 0))
+            .get("total", 0)
+        ),
         "entregas_ativas": Entrega.objects.filter(status__in=fora_do_estoque).only("id").count(),
         "devolvidos_mes": devolvidos_mes,
         "solicitacoes_pendentes": Solicitacao.objects.filter(status=Solicitacao.Status.PENDENTE)
@@ -60,3 +88,38 @@ def testar_mensagens(request):
     messages.warning(request, "Atenção: algo a verificar.")
     messages.error(request, "Erro: exemplo simulado.")
     return redirect("app_core:home")
+
+
+@login_required
+def autocomplete(request, fonte):
+    """
+    Autocomplete para os seletores de colaborador/EPI: prefixo de palavra em
+    nome/matrícula/código (índice de busca), no máximo AUTOCOMPLETE_LIMITE itens,
+    com cache curto por consulta normalizada. Exige a permissão de visualização
+    do modelo da fonte.
+    """
+    if fonte not in AUTOCOMPLETE_FONTES:
+        raise Http404
+    if not request.user.has_perm(AUTOCOMPLETE_PERMISSOES[fonte]):
+        raise PermissionDenied
+    q = " ".join(busca.termos(request.GET.get("q", "")[:60]))
+    ativos = request.GET.get("ativos") == "1"
+    try:
+        limite = min(
+            max(int(request.GET.get("limite", AUTOCOMPLETE_LIMITE)), 1), AUTOCOMPLETE_LIMITE
+        )
+    except ValueError:
+        limite = AUTOCOMPLETE_LIMITE
+
+    digest = hashlib.md5(q.encode(), usedforsecurity=False).hexdigest()
+    chave = f"autocomplete:{fonte}:{int(ativos)}:{limite}:{digest}"
+    resultados = cache.get(chave)
+    if resultados is None:
+        qs = AUTOCOMPLETE_FONTES[fonte]()
+        if q:
+            qs = busca.filtra(qs, q)
+        if ativos:
+            qs = qs.filter(ativo=True)
+        resultados = [{"id": o.pk, "texto": str(o)} for o in qs.order_by("nome", "id")[:limite]]
+        cache.set(chave, resultados, AUTOCOMPLETE_TTL)
+    return JsonResponse({"resultados": resultados})
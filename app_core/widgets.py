@@ -0,0 +1,53 @@
+# app_core/widgets.py
+from django import forms
+from django.urls import reverse_lazy
+
+
+class AutocompleteSelect(forms.Select):
+    """
+    <select> "preguiçoso": renderiza apenas a opção vazia e a(s) selecionada(s),
+    resolvidas por id. As demais opções vêm do endpoint de autocomplete
+    (static/js/autocomplete.js), conforme o usuário digita.
+    """
+
+    def __init__(self, fonte: str, attrs=None, ativos: bool = False):
+        attrs = {"class": "form-select", **(attrs or {})}
+        attrs["data-autocomplete"] = reverse_lazy("app_core:autocomplete", args=[fonte])
+        if ativos:
+            attrs["data-autocomplete-ativos"] = "1"
+        super().__init__(attrs)
+
+    def optgroups(self, name, value, attrs=None):
+        escolhidos = [v for v in value if v not in ("", None)]
+        iterador = self.choices
+        opcoes = []
+        empty_label = getattr(getattr(iterador, "field", None), "empty_label", None)
+        if empty_label is not None:
+            opcoes.append(("", empty_label))
+        queryset = getattr(iterador, "queryset", None)
+        if escolhidos and queryset is not None:
+            try:
+                objetos = queryset.filter(pk__in=escolhidos)
+                opcoes += [(str(o.pk), iterador.field.label_from_instance(o)) for o in objetos]
+            except (ValueError, TypeError):
+                pass
+        return [
+            (
+                None,
+                [
+                    self.create_option(name, v, label, v in escolhidos, i, attrs=attrs)
+                    for i, (v, label) in enumerate(opcoes)
+                ],
+                0,
+            )
+        ]
+
+
+class AutocompleteSelectMultiple(AutocompleteSelect, forms.SelectMultiple):
+    """
+    Versão múltipla do AutocompleteSelect: renderiza só os itens já escolhidos;
+    os resultados da busca são acrescentados sem desmarcar os anteriores.
+    """
+
+    def __init__(self, fonte: str, attrs=None, ativos: bool = False):
+        super().__init__(fonte, {"size": 8, **(attrs or {})}, ativos=ativos)
@@ -1,7 +1,9 @@
 # app_entregas/admin.py
 from django.contrib import admin
 
-from .models import Entrega, Solicitacao
+from app_core.paginacao import PaginadorAproximado
+
+from .models import Entrega, EventoOutbox, MovimentacaoEstoque, Solicitacao
 
 
 @admin.register(Solicitacao)
@@ -15,6 +17,8 @@ class SolicitacaoAdmin(admin.ModelAdmin):
         "epi__codigo",
     )
     date_hierarchy = "criado_em"
+    paginator = PaginadorAproximado
+    show_full_result_count = False
     autocomplete_fields = ("colaborador", "epi")
 
 
@@ -36,5 +40,47 @@ class EntregaAdmin(admin.ModelAdmin):
         "epi__nome",
         "epi__codigo",
     )
-    date_hierarchy = "data_entrega"
+    # Coluna de data local indexada: a navegação por ano/mês/dia não converte fuso.
+    date_hierarchy = "data_entrega_local"
+    paginator = PaginadorAproximado
+    show_full_result_count = False
     autocomplete_fields = ("colaborador", "epi", "solicitacao")
+
+
+@admin.register(MovimentacaoEstoque)
+class MovimentacaoEstoqueAdmin(admin.ModelAdmin):
+    """Livro-razão é append-only: somente leitura no admin."""
+
+    list_display = ("id", "criado_em", "epi", "tipo", "origem", "quantidade", "compactada")
+    list_filter = ("tipo", "origem", "compactada")
+    search_fields = ("epi__nome", "epi__codigo", "observacao")
+    date_hierarchy = "criado_em"
+    paginator = PaginadorAproximado
+    show_full_result_count = False
+    list_select_related = ("epi",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(EventoOutbox)
+class EventoOutboxAdmin(admin.ModelAdmin):
+    """Acompanhamento do outbox; o consumo é feito por `processar_outbox`."""
+
+    list_display = ("id", "criado_em", "tipo", "processado_em", "tentativas")
+    list_filter = ("tipo", ("processado_em", admin.EmptyFieldListFilter))
+    readonly_fields = ("tipo", "payload", "criado_em", "processado_em", "tentativas", "erro")
+    paginator = PaginadorAproximado
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -4,3 +4,19 @@ from django.apps import AppConfig
 class AppEntregasConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "app_entregas"
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+
+        from . import consumidores  # noqa: F401 - registra os consumidores do outbox
+        from .models import Entrega
+        from .sinais import entregas_criadas_em_lote
+        from .versao import _ao_alterar_entrega
+
+        # Versão das Entregas (caches de facetas e relatório). bulk_create não
+        # dispara post_save: os serviços enviam entregas_criadas_em_lote.
+        post_save.connect(_ao_alterar_entrega, sender=Entrega, dispatch_uid="versao_entrega_save")
+        post_delete.connect(
+            _ao_alterar_entrega, sender=Entrega, dispatch_uid="versao_entrega_delete"
+        )
+        entregas_criadas_em_lote.connect(_ao_alterar_entrega, dispatch_uid="versao_entrega_lote")
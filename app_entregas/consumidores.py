@@ -0,0 +1,26 @@
+# app_entregas/consumidores.py
+"""Consumidores dos eventos de estoque (executados por `processar_outbox`)."""
+
+import logging
+
+from app_epis.models import EPI
+
+from .outbox import ESTOQUE_MOVIMENTADO, consumidor
+from .services import saldo_estoque
+
+logger = logging.getLogger(__name__)
+
+
+@consumidor(ESTOQUE_MOVIMENTADO)
+def alerta_estoque_baixo(payload):
+    """Registra aviso quando uma saída deixa o EPI no estoque mínimo ou abaixo."""
+    if payload["delta"] >= 0:
+        return
+    epi = EPI.objects.only("nome", "codigo", "estoque_minimo").filter(pk=payload["epi_id"]).first()
+    if epi is None or not epi.estoque_minimo:
+        return
+    saldo = saldo_estoque(epi.pk)
+    if saldo <= epi.estoque_minimo:
+        logger.warning(
+            "Estoque baixo: %s com %s unidade(s) (mínimo %s)", epi, saldo, epi.estoque_minimo
+        )
@@ -0,0 +1,97 @@
+# app_entregas/facetas.py
+"""
+Contagens por faceta (status, EPI, colaborador) da lista de Entregas.
+
+Uma consulta agrupada por dimensão, cada uma com os filtros atuais menos o da
+própria dimensão: a faceta mostra as alternativas, não só o valor já escolhido.
+O resultado fica em cache por conjunto de filtros normalizado e pela versão
+das Entregas (app_entregas.versao): qualquer alteração invalida tudo de uma vez.
+"""
+
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.db.models import Count
+
+from app_core.busca import filtra_relacionados, termos
+
+from . import versao
+from .models import Entrega
+
+CACHE_TTL = 300  # segundos
+LIMITE = 10  # valores por faceta (os mais frequentes)
+
+# dimensão -> colunas agrupadas (a primeira é o valor do filtro)
+DIMENSOES = {
+    "status": ("status",),
+    "epi": ("epi_id", "epi__nome", "epi__codigo"),
+    "colaborador": ("colaborador_id", "colaborador__nome"),
+}
+
+
+def filtros_da_requisicao(params) -> dict:
+    """Filtros da lista normalizados (valores inválidos descartados)."""
+    status = params.get("status", "")
+    return {
+        "q": " ".join(termos(params.get("q", ""))),
+        "colaborador": (
+            params.get("colaborador", "") if params.get("colaborador", "").isdigit() else ""
+        ),
+        "epi": params.get("epi", "") if params.get("epi", "").isdigit() else "",
+        "status": status if status in Entrega.Status.values else "",
+    }
+
+
+def aplica(qs, filtros: dict, exceto: str | None = None):
+    """Aplica `filtros` a um queryset de Entrega, ignorando a dimensão `exceto`."""
+    if filtros["q"]:
+        # Cada termo casa no documento de busca do colaborador ou do EPI.
+        qs = filtra_relacionados(qs, filtros["q"], ("colaborador", "epi"))
+    for dimensao in DIMENSOES:
+        if filtros[dimensao] and dimensao != exceto:
+            qs = qs.filter(**{DIMENSOES[dimensao][0]: filtros[dimensao]})
+    return qs
+
+
+def _rotulo(dimensao: str, linha: dict) -> str:
+    if dimensao == "status":
+        return Entrega.Status(linha["status"]).label
+    if dimensao == "epi":
+        codigo = linha["epi__codigo"]
+        return f"{linha['epi__nome']} ({codigo})" if codigo else linha["epi__nome"]
+    return linha["colaborador__nome"]
+
+
+def calcula(filtros: dict) -> dict[str, list[dict]]:
+    """{dimensão: [{"valor", "rotulo", "total"}, ...]}, uma consulta GROUP BY por dimensão."""
+    resultado = {}
+    for dimensao, colunas in DIMENSOES.items():
+        linhas = (
+            aplica(Entrega.objects.all(), filtros, exceto=dimensao)
+            .values(*colunas)
+            .annotate(total=Count("id"))
+            .order_by("-total", colunas[0])[:LIMITE]
+        )
+        resultado[dimensao] = [
+            {
+                "valor": str(linha[colunas[0]]),
+                "rotulo": _rotulo(dimensao, linha),
+                "total": linha["total"],
+            }
+            for linha in linhas
+        ]
+    return resultado
+
+
+def facetas(filtros: dict) -> dict[str, list[dict]]:
+    """calcula() com cache por (versão, filtros normalizados)."""
+    chave_filtros = hashlib.md5(
+        json.dumps(filtros, sort_keys=True).encode(), usedforsecurity=False
+    ).hexdigest()
+    chave = f"facetas:entregas:{versao.atual()}:{chave_filtros}"
+    resultado = cache.get(chave)
+    if resultado is None:
+        resultado = calcula(filtros)
+        cache.set(chave, resultado, CACHE_TTL)
+    return resultado
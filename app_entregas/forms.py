@@ -1,7 +1,12 @@
 from django import forms
 from django.core.exceptions import ValidationError
+from django.db.models import Q
 from django.utils import timezone
 
+from app_colaboradores.models import Colaborador
+from app_core.widgets import AutocompleteSelect, AutocompleteSelectMultiple
+from app_epis.models import EPI
+
 from .models import Entrega, Solicitacao
 
 
@@ -19,8 +24,8 @@ class EntregaForm(forms.ModelForm):
             "observacao_devolucao",
         ]
         widgets = {
-            "colaborador": forms.Select(attrs={"class": "form-select"}),
-            "epi": forms.Select(attrs={"class": "form-select"}),
+            "colaborador": AutocompleteSelect("colaboradores"),
+            "epi": AutocompleteSelect("epis"),
             "quantidade": forms.NumberInput(attrs={"min": 1, "class": "form-control"}),
             "status": forms.Select(attrs={"class": "form-select"}),
             "data_prevista_devolucao": forms.DateTimeInput(
@@ -106,7 +111,7 @@ class SolicitacaoForm(forms.ModelForm):
         model = Solicitacao
         fields = ["epi", "quantidade", "observacao"]
         widgets = {
-            "epi": forms.Select(attrs={"class": "form-select"}),
+            "epi": AutocompleteSelect("epis", ativos=True),
             "quantidade": forms.NumberInput(attrs={"min": 1, "class": "form-control"}),
             "observacao": forms.Textarea(
                 attrs={
@@ -128,3 +133,98 @@ class SolicitacaoForm(forms.ModelForm):
         if not e.ativo:
             raise ValidationError("EPI inativo não pode ser solicitado.")
         return e
+
+
+class EntregaLoteForm(forms.Form):
+    """Entrega do mesmo EPI para um grupo de colaboradores (por setor, cargo ou lista)."""
+
+    STATUS_LOTE = [
+        (Entrega.Status.EMPRESTADO, Entrega.Status.EMPRESTADO.label),
+        (Entrega.Status.EM_USO, Entrega.Status.EM_USO.label),
+        (Entrega.Status.FORNECIDO, Entrega.Status.FORNECIDO.label),
+    ]
+
+    # Seletores preguiçosos: as opções vêm do autocomplete; o queryset só valida os ids.
+    epi = forms.ModelChoiceField(
+        queryset=EPI.objects.filter(ativo=True).order_by("nome"),
+        widget=AutocompleteSelect("epis", ativos=True),
+    )
+    quantidade = forms.IntegerField(
+        min_value=1,
+        initial=1,
+        widget=forms.NumberInput(attrs={"min": 1, "class": "form-control"}),
+    )
+    status = forms.ChoiceField(
+        choices=STATUS_LOTE,
+        initial=Entrega.Status.EMPRESTADO,
+        widget=forms.Select(attrs={"class": "form-select"}),
+    )
+    data_prevista_devolucao = forms.DateTimeField(
+        required=False,
+        widget=forms.DateTimeInput(attrs={"type": "datetime-local", "class": "form-control"}),
+    )
+    observacao = forms.CharField(
+        required=False,
+        max_length=255,
+        widget=forms.Textarea(
+            attrs={"rows": 2, "class": "form-control", "placeholder": "Opcional"}
+        ),
+    )
+    setor = forms.ChoiceField(required=False, widget=forms.Select(attrs={"class": "form-select"}))
+    cargo = forms.ChoiceField(required=False, widget=forms.Select(attrs={"class": "form-select"}))
+    colaboradores = forms.ModelMultipleChoiceField(
+        queryset=Colaborador.objects.filter(ativo=True).order_by("nome"),
+        required=False,
+        widget=AutocompleteSelectMultiple("colaboradores", ativos=True),
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        ativos = Colaborador.objects.filter(ativo=True)
+        for campo in ("setor", "cargo"):
+            valores = (
+                ativos.exclude(**{campo: ""})
+                .order_by(campo)
+                .values_list(campo, flat=True)
+                .distinct()
+            )
+            self.fields[campo].choices = [("", "Todos")] + [(v, v) for v in valores]
+
+    def clean(self):
+        cleaned = super().clean()
+        if not (cleaned.get("setor") or cleaned.get("cargo") or cleaned.get("colaboradores")):
+            raise ValidationError("Informe um setor, um cargo ou selecione colaboradores.")
+
+        status = cleaned.get("status")
+        dt_prev = cleaned.get("data_prevista_devolucao")
+        if status in {Entrega.Status.EMPRESTADO, Entrega.Status.EM_USO}:
+            if not dt_prev:
+                self.add_error(
+                    "data_prevista_devolucao",
+                    "Informe a data prevista de devolução para este status.",
+                )
+            elif dt_prev <= timezone.now():
+                self.add_error(
+                    "data_prevista_devolucao",
+                    "A data prevista precisa ser posterior a agora.",
+                )
+        return cleaned
+
+    def colaborador_ids(self) -> list[int]:
+        """Ids dos colaboradores ativos que atendem ao critério (uma consulta)."""
+        cd = self.cleaned_data
+        criterio = Q()
+        if cd.get("setor") or cd.get("cargo"):
+            filtro = {}
+            if cd.get("setor"):
+                filtro["setor"] = cd["setor"]
+            if cd.get("cargo"):
+                filtro["cargo"] = cd["cargo"]
+            criterio |= Q(**filtro)
+        if cd.get("colaboradores"):
+            criterio |= Q(pk__in=cd["colaboradores"].values("pk"))
+        return list(
+            Colaborador.objects.filter(criterio, ativo=True)
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
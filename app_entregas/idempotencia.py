@@ -0,0 +1,103 @@
+# app_entregas/idempotencia.py
+"""
+Idempotência dos POSTs que movimentam estoque.
+
+Os formulários enviam `chave_idempotencia` (ou o header Idempotency-Key).
+A primeira requisição grava a chave na mesma transação da operação; um
+reenvio (clique duplo, retry de proxy, voltar + reenviar) recebe o mesmo
+redirect, sem reprocessar nem travar as linhas de Entrega/EPI.
+"""
+
+import hashlib
+import uuid
+from datetime import timedelta
+from functools import wraps
+
+from django.contrib import messages
+from django.db import IntegrityError, transaction
+from django.shortcuts import redirect
+from django.utils import timezone
+
+from .models import ChaveIdempotencia
+
+CAMPO = "chave_idempotencia"
+HEADER = "Idempotency-Key"
+TTL = timedelta(hours=24)
+
+MENSAGEM_REENVIO = "Esta operação já havia sido processada."
+
+
+def nova_chave() -> str:
+    """Token para o campo oculto `chave_idempotencia` dos formulários."""
+    return uuid.uuid4().hex
+
+
+def _chave(request) -> str | None:
+    token = (request.POST.get(CAMPO) or request.headers.get(HEADER) or "").strip()
+    if not token:
+        return None
+    # A rota entra na chave: um mesmo token de página serve a todas as ações dela.
+    bruto = f"{request.user.pk}:{request.path}:{token}"
+    return hashlib.sha256(bruto.encode()).hexdigest()
+
+
+def _reenvio(request, registro: ChaveIdempotencia):
+    if registro.mensagem:
+        messages.success(request, registro.mensagem)
+    else:
+        messages.info(request, MENSAGEM_REENVIO)
+    return redirect(registro.redirect_url)
+
+
+def _resultado_ok(request) -> tuple[bool, str]:
+    """(sem avisos/erros, última mensagem de sucesso) sem consumir as mensagens."""
+    storage = messages.get_messages(request)
+    lista = list(storage)
+    storage.used = False
+    ok = not any(m.level >= messages.WARNING for m in lista)
+    sucesso = [m.message for m in lista if m.level == messages.SUCCESS]
+    return ok, (sucesso[-1] if sucesso else "")[:255]
+
+
+def idempotente(view):
+    """
+    Decorator de views que redirecionam após o POST (em CBVs, via method_decorator).
+    Só são guardados resultados bem-sucedidos (redirect sem mensagens de aviso/erro);
+    falhas podem ser reenviadas com a mesma chave.
+    """
+
+    @wraps(view)
+    def _wrapped(request, *args, **kwargs):
+        chave = _chave(request) if request.method == "POST" else None
+        if chave is None:
+            return view(request, *args, **kwargs)
+
+        agora = timezone.now()
+        registro = ChaveIdempotencia.objects.filter(chave=chave, expira_em__gt=agora).first()
+        if registro is not None and registro.redirect_url:
+            return _reenvio(request, registro)
+
+        with transaction.atomic():
+            ChaveIdempotencia.objects.filter(chave=chave, expira_em__lte=agora).delete()
+            try:
+                with transaction.atomic():
+                    registro = ChaveIdempotencia.objects.create(chave=chave, expira_em=agora + TTL)
+            except IntegrityError:
+                # Requisição concorrente com a mesma chave: já terminou (o INSERT esperou).
+                registro = ChaveIdempotencia.objects.filter(chave=chave).first()
+                if registro is not None and registro.redirect_url:
+                    return _reenvio(request, registro)
+                messages.warning(request, "Esta operação ainda está sendo processada.")
+                return redirect(request.path)
+
+            response = view(request, *args, **kwargs)
+            ok, mensagem = _resultado_ok(request)
+            if ok and response.status_code in (301, 302, 303):
+                registro.redirect_url = response["Location"][:500]
+                registro.mensagem = mensagem
+                registro.save(update_fields=["redirect_url", "mensagem"])
+            else:
+                registro.delete()
+        return response
+
+    return _wrapped
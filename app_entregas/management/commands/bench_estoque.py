@@ -0,0 +1,194 @@
+# app_entregas/management/commands/bench_estoque.py
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections
+from django.test.utils import override_settings
+
+from app_entregas.models import EventoOutbox, MovimentacaoEstoque
+from app_entregas.outbox import ESTOQUE_MOVIMENTADO
+from app_entregas.services import (
+    ENGINE_LEDGER,
+    ENGINES,
+    _apply_delta,
+    compactar_movimentacoes,
+)
+from app_epis.models import EPI, CategoriaEPI
+
+BENCH_CODIGO = "BENCH-ESTOQUE"
+
+
+def _is_lock_error(exc: Exception) -> bool:
+    msg = str(exc).lower()
+    return "locked" in msg or "lock wait" in msg or "deadlock" in msg
+
+
+def _worker(epi_id: int, ops: int, max_retries: int):
+    """
+    Executa `ops` saídas unitárias no mesmo EPI pelo caminho de produção
+    (_apply_delta, com o engine de settings.ESTOQUE_ENGINE).
+    Retorna (latências em segundos, nº de retentativas por lock, nº de erros).
+    """
+    latencias, retries, erros = [], 0, 0
+    try:
+        for _ in range(ops):
+            inicio = time.perf_counter()
+            for tentativa in range(max_retries + 1):
+                try:
+                    _apply_delta(
+                        epi_id,
+                        -1,
+                        tipo=MovimentacaoEstoque.Tipo.SAIDA,
+                        origem=MovimentacaoEstoque.Origem.MANUAL,
+                        observacao="bench_estoque",
+                    )
+                    break
+                except OperationalError as exc:
+                    if not _is_lock_error(exc) or tentativa == max_retries:
+                        erros += 1
+                        break
+                    retries += 1
+                    time.sleep(0.001)
+                except ValidationError:
+                    erros += 1
+                    break
+            latencias.append(time.perf_counter() - inicio)
+    finally:
+        connections.close_all()
+    return latencias, retries, erros
+
+
+def _percentil(valores, p: float) -> float:
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, round(p * (len(ordenados) - 1)))]
+
+
+def _mysql_lock_waits():
+    """Contador global de esperas por row lock do InnoDB (None fora do MySQL)."""
+    if connection.vendor != "mysql":
+        return None
+    with connection.cursor() as cur:
+        cur.execute("SHOW GLOBAL STATUS LIKE 'Innodb_row_lock_waits'")
+        row = cur.fetchone()
+    return int(row[1]) if row else 0
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark dos engines de estoque (imediato/condicional/ledger): N workers "
+        "disputando o mesmo EPI. Reporta throughput, latência p50/p95 e esperas por lock. "
+        "Use um banco de desenvolvimento (SQLite em WAL, ou MySQL via `docker compose up -d db` "
+        "com DB_ENGINE=mysql)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--engines",
+            default=",".join(ENGINES),
+            help="Engines separados por vírgula (padrão: todos)",
+        )
+        parser.add_argument("--workers", type=int, default=8, help="Workers concorrentes")
+        parser.add_argument("--ops", type=int, default=200, help="Operações por worker")
+        parser.add_argument(
+            "--processos",
+            action="store_true",
+            help="Usa processos em vez de threads (fork)",
+        )
+        parser.add_argument(
+            "--retries", type=int, default=100, help="Máx. de retentativas por lock/busy"
+        )
+        parser.add_argument(
+            "--manter", action="store_true", help="Não remove o EPI de benchmark ao final"
+        )
+
+    def handle(self, *args, **options):
+        engines = [e.strip() for e in options["engines"].split(",") if e.strip()]
+        invalidos = [e for e in engines if e not in ENGINES]
+        if invalidos:
+            raise CommandError(f"Engine(s) desconhecido(s): {', '.join(invalidos)}")
+
+        workers, ops = options["workers"], options["ops"]
+        total = workers * ops
+
+        if connection.vendor == "sqlite":
+            with connection.cursor() as cur:
+                cur.execute("PRAGMA journal_mode=WAL")
+
+        categoria, _ = CategoriaEPI.objects.get_or_create(nome="Benchmark")
+        epi, _ = EPI.objects.get_or_create(
+            codigo=BENCH_CODIGO,
+            defaults={"nome": "EPI de benchmark", "categoria": categoria, "ativo": False},
+        )
+
+        modo = "processos" if options["processos"] else "threads"
+        self.stdout.write(
+            f"{connection.vendor}: {workers} {modo} x {ops} ops no EPI #{epi.pk} ({total} ops/engine)"
+        )
+        self.stdout.write(
+            f"{'engine':<12} {'ops/s':>9} {'p50 ms':>8} {'p95 ms':>8} "
+            f"{'lock waits':>10} {'erros':>6} {'saldo':>6}"
+        )
+
+        try:
+            for engine in engines:
+                self._rodar(engine, epi.pk, workers, ops, options)
+        finally:
+            if not options["manter"]:
+                self._limpar(epi.pk)
+                epi.delete()
+
+    @staticmethod
+    def _limpar(epi_id):
+        MovimentacaoEstoque.objects.filter(epi_id=epi_id).delete()
+        EventoOutbox.objects.filter(tipo=ESTOQUE_MOVIMENTADO, payload__epi_id=epi_id).delete()
+
+    def _rodar(self, engine, epi_id, workers, ops, options):
+        total = workers * ops
+        self._limpar(epi_id)
+        EPI.objects.filter(pk=epi_id).update(estoque=total)
+
+        waits_antes = _mysql_lock_waits()
+        # Conexões não podem atravessar fork/threads.
+        connections.close_all()
+        if options["processos"]:
+            pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("fork"))
+        else:
+            pool = ThreadPoolExecutor(workers)
+
+        # Os workers (threads ou processos com fork) herdam o engine sobrescrito.
+        inicio = time.perf_counter()
+        with override_settings(ESTOQUE_ENGINE=engine), pool:
+            futures = [
+                pool.submit(_worker, epi_id, ops, options["retries"]) for _ in range(workers)
+            ]
+            resultados = [f.result() for f in futures]
+        duracao = time.perf_counter() - inicio
+
+        latencias = [lat for r in resultados for lat in r[0]]
+        retries = sum(r[1] for r in resultados)
+        erros = sum(r[2] for r in resultados)
+        waits_depois = _mysql_lock_waits()
+        if waits_antes is not None:
+            retries += waits_depois - waits_antes
+
+        if engine == ENGINE_LEDGER:
+            compactar_movimentacoes(epi_ids=[epi_id])
+        estoque = EPI.objects.values_list("estoque", flat=True).get(pk=epi_id)
+        consistente = estoque == erros  # cada operação bem-sucedida consumiu 1 unidade
+
+        self.stdout.write(
+            f"{engine:<12} {(total - erros) / duracao:>9.1f} "
+            f"{_percentil(latencias, 0.50) * 1000:>8.2f} "
+            f"{_percentil(latencias, 0.95) * 1000:>8.2f} "
+            f"{retries:>10} {erros:>6} "
+            + (
+                self.style.SUCCESS(f"{'ok':>6}")
+                if consistente
+                else self.style.ERROR(f"{estoque:>6}")
+            )
+        )
@@ -0,0 +1,20 @@
+# app_entregas/management/commands/compactar_estoque.py
+from django.core.management.base import BaseCommand
+
+from app_entregas.services import compactar_movimentacoes
+
+
+class Command(BaseCommand):
+    help = (
+        "Consolida as movimentações pendentes do livro-razão em EPI.estoque "
+        "(usado quando ESTOQUE_ENGINE='ledger')."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--epi", type=int, action="append", dest="epis", help="Restringe a um EPI (repetível)"
+        )
+
+    def handle(self, *args, **options):
+        atualizados = compactar_movimentacoes(epi_ids=options["epis"])
+        self.stdout.write(self.style.SUCCESS(f"EPIs compactados: {atualizados}"))
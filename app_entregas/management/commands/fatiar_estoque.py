@@ -0,0 +1,31 @@
+# app_entregas/management/commands/fatiar_estoque.py
+from django.core.management.base import BaseCommand, CommandError
+
+from app_entregas.services import fatiar_estoque
+from app_epis.models import EPI
+
+
+class Command(BaseCommand):
+    help = (
+        "Liga o contador de estoque fatiado de um EPI de alta rotatividade "
+        "(N linhas de saldo em vez de uma), redimensiona ou desliga (--fatias 0)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("epi", type=int, help="Id do EPI")
+        parser.add_argument(
+            "--fatias", type=int, default=8, help="Nº de fatias (0 desliga; padrão: 8)"
+        )
+
+    def handle(self, *args, **options):
+        if options["fatias"] < 0:
+            raise CommandError("--fatias deve ser >= 0.")
+        try:
+            fatiar_estoque(options["epi"], options["fatias"])
+        except EPI.DoesNotExist:
+            raise CommandError(f"EPI #{options['epi']} não encontrado.") from None
+        if options["fatias"]:
+            msg = f"EPI #{options['epi']}: estoque repartido em {options['fatias']} fatias."
+        else:
+            msg = f"EPI #{options['epi']}: contador fatiado desligado."
+        self.stdout.write(self.style.SUCCESS(msg))
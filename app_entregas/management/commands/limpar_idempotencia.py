@@ -0,0 +1,13 @@
+# app_entregas/management/commands/limpar_idempotencia.py
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from app_entregas.models import ChaveIdempotencia
+
+
+class Command(BaseCommand):
+    help = "Remove as chaves de idempotência expiradas."
+
+    def handle(self, *args, **options):
+        removidas, _ = ChaveIdempotencia.objects.filter(expira_em__lte=timezone.now()).delete()
+        self.stdout.write(self.style.SUCCESS(f"Chaves removidas: {removidas}"))
@@ -0,0 +1,59 @@
+# app_entregas/management/commands/processar_outbox.py
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from app_entregas.outbox import processar_lote, purgar
+
+# Com --intervalo, a purga dos processados roda no máximo uma vez por este período.
+PURGA_INTERVALO = 3600  # segundos
+
+
+class Command(BaseCommand):
+    help = (
+        "Consome os eventos pendentes do outbox de estoque em lotes "
+        "(SELECT ... FOR UPDATE SKIP LOCKED; polling simples no SQLite). "
+        "Com --intervalo, roda continuamente; vários workers podem rodar em paralelo. "
+        "Eventos com falha são adiados (backoff) e os processados antigos, apagados."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lote", type=int, default=100, help="Eventos por transação")
+        parser.add_argument(
+            "--intervalo",
+            type=float,
+            default=0,
+            help="Segundos de espera quando não há eventos (0 = esvazia a fila e sai)",
+        )
+        parser.add_argument(
+            "--reter-dias",
+            type=int,
+            default=7,
+            help="Apaga eventos processados há mais de N dias (0 = não apaga)",
+        )
+
+    def handle(self, *args, **options):
+        total = falhas_total = apagados = 0
+        ultima_purga = None
+        while True:
+            processados, falhas = processar_lote(options["lote"])
+            total += processados
+            falhas_total += falhas
+            # Falhas são adiadas pelo backoff: se nada deu certo, não há por que repetir já.
+            if processados:
+                continue
+            agora = time.monotonic()
+            if options["reter_dias"] and (
+                ultima_purga is None or agora - ultima_purga >= PURGA_INTERVALO
+            ):
+                apagados += purgar(timedelta(days=options["reter_dias"]))
+                ultima_purga = agora
+            if not options["intervalo"]:
+                break
+            time.sleep(options["intervalo"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Eventos processados: {total}; falhas: {falhas_total}; apagados: {apagados}"
+            )
+        )
@@ -0,0 +1,38 @@
+# app_entregas/management/commands/rebalancear_estoque.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from app_entregas.services import epis_fatiados, rebalancear_fatias
+
+
+class Command(BaseCommand):
+    help = (
+        "Reparte igualmente o saldo entre as fatias dos EPIs com contador fatiado. "
+        "Com --intervalo, roda continuamente em segundo plano."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--epi", type=int, action="append", dest="epis", help="Restringe a um EPI (repetível)"
+        )
+        parser.add_argument(
+            "--intervalo",
+            type=float,
+            default=0,
+            help="Segundos entre rodadas (0 = roda uma vez)",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            epi_ids = options["epis"] or sorted(epis_fatiados())
+            # None: EPI/fatias em uso por uma saída; fica para a próxima rodada.
+            pulados = sum(rebalancear_fatias(epi_id) is None for epi_id in epi_ids)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"EPIs rebalanceados: {len(epi_ids) - pulados}; em uso (pulados): {pulados}"
+                )
+            )
+            if not options["intervalo"]:
+                break
+            time.sleep(options["intervalo"])
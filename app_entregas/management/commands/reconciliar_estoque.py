@@ -0,0 +1,212 @@
+# app_entregas/management/commands/reconciliar_estoque.py
+import csv
+import json
+from contextlib import nullcontext
+from pathlib import Path
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max, Q, Sum
+
+from app_entregas.models import Entrega, MovimentacaoEstoque
+from app_entregas.services import (
+    ORIGENS_DE_ENTREGA,
+    ajusta_estoque,
+    anota_saldo,
+    efeito_estoque_expr,
+)
+from app_epis.models import EPI
+
+CAMPOS = [
+    "epi_id",
+    "codigo",
+    "nome",
+    "estoque",
+    "saldo_livro",
+    "drift_livro",
+    "efeito_entregas",
+    "efeito_lancado",
+    "drift",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara o efeito líquido das Entregas (mesmas regras de _mov_value) com o que foi "
+        "lançado no livro-razão, por EPI, e o saldo de cada EPI com a soma de todo o "
+        "livro-razão (saldo inicial + movimentações). Gera relatório de divergências "
+        "(CSV/JSON lines) e, com --aplicar, corrige em lotes. Suporta checkpoint para retomar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--formato", choices=["csv", "json"], default="csv")
+        parser.add_argument("--saida", help="Arquivo do relatório (padrão: stdout)")
+        parser.add_argument("--todos", action="store_true", help="Inclui EPIs sem divergência")
+        parser.add_argument(
+            "--aplicar", action="store_true", help="Lança ajustes corrigindo as divergências"
+        )
+        parser.add_argument(
+            "--lote", type=int, default=500, help="EPIs corrigidos por transação (padrão: 500)"
+        )
+        parser.add_argument(
+            "--chunk",
+            type=int,
+            default=0,
+            help="Ids de Entrega por GROUP BY (0 = consulta única)",
+        )
+        parser.add_argument(
+            "--checkpoint", help="Arquivo JSON de progresso; se existir, a varredura é retomada"
+        )
+
+    def handle(self, *args, **options):
+        esperado = self._efeito_entregas(options["chunk"], options["checkpoint"])
+        lancado, livro = {}, {}
+        somas = (
+            MovimentacaoEstoque.objects.values("epi_id")
+            .annotate(
+                entregas=Sum("quantidade", filter=Q(origem__in=ORIGENS_DE_ENTREGA)),
+                total=Sum("quantidade"),
+            )
+            .order_by()
+            .values_list("epi_id", "entregas", "total")
+        )
+        for epi_id, entregas, total in somas:
+            lancado[epi_id], livro[epi_id] = entregas or 0, total
+
+        divergentes, fora_do_livro = [], []
+        with self._abrir_saida(options["saida"]) as saida:
+            escrever = self._escritor(saida, options["formato"])
+            # `estoque` é o saldo completo: em EPIs fatiados a coluna é só uma parte.
+            epis = (
+                anota_saldo(EPI.objects.order_by("pk"))
+                .values_list("pk", "codigo", "nome", "saldo")
+                .iterator(chunk_size=2000)
+            )
+            for pk, codigo, nome, estoque in epis:
+                efeito, ja_lancado = esperado.get(pk, 0), lancado.get(pk, 0)
+                drift = efeito - ja_lancado
+                # Saldo alterado sem lançamento (admin/shell gravando EPI.estoque).
+                # Ajustes de Entregas mexem no saldo e no livro igualmente: independem.
+                saldo_livro = livro.get(pk, 0)
+                drift_livro = estoque - saldo_livro
+                if drift:
+                    divergentes.append((pk, drift))
+                if drift_livro:
+                    fora_do_livro.append((pk, drift_livro))
+                if drift or drift_livro or options["todos"]:
+                    escrever(
+                        [
+                            pk,
+                            codigo,
+                            nome,
+                            estoque,
+                            saldo_livro,
+                            drift_livro,
+                            efeito,
+                            ja_lancado,
+                            drift,
+                        ]
+                    )
+
+        corrigidos = 0
+        if options["aplicar"]:
+            corrigidos = self._aplicar(divergentes, options["lote"])
+            corrigidos += self._registrar_no_livro(fora_do_livro, options["lote"])
+        total = len({pk for pk, _ in divergentes + fora_do_livro})
+
+        if options["checkpoint"]:
+            Path(options["checkpoint"]).unlink(missing_ok=True)
+        self.stderr.write(
+            f"EPIs com divergência: {total}; corrigidos: {corrigidos}",
+            style_func=self.style.SUCCESS,
+        )
+
+    def _efeito_entregas(self, chunk: int, checkpoint: str | None) -> dict[int, int]:
+        """
+        Soma o efeito das Entregas por EPI com GROUP BY, em faixas de id quando
+        `chunk` > 0. O progresso é salvo em `checkpoint` a cada faixa.
+        """
+        estado = {"ultimo_id": 0, "corte": None, "esperado": {}}
+        if checkpoint and Path(checkpoint).exists():
+            estado = json.loads(Path(checkpoint).read_text())
+            self.stderr.write(f"Retomando a partir da Entrega #{estado['ultimo_id']}")
+        if estado["corte"] is None:
+            estado["corte"] = Entrega.objects.aggregate(m=Max("id"))["m"] or 0
+        esperado = {int(k): v for k, v in estado["esperado"].items()}
+
+        passo = chunk if chunk > 0 else estado["corte"]
+        while estado["ultimo_id"] < estado["corte"]:
+            fim = min(estado["ultimo_id"] + passo, estado["corte"])
+            faixa = (
+                Entrega.objects.filter(id__gt=estado["ultimo_id"], id__lte=fim)
+                .values("epi_id")
+                .annotate(total=Sum(efeito_estoque_expr()))
+                .order_by()
+                .values_list("epi_id", "total")
+            )
+            for epi_id, total in faixa:
+                esperado[epi_id] = esperado.get(epi_id, 0) + total
+            estado["ultimo_id"] = fim
+            if checkpoint:
+                estado["esperado"] = esperado
+                Path(checkpoint).write_text(json.dumps(estado))
+        return esperado
+
+    def _aplicar(self, divergentes, lote: int) -> int:
+        corrigidos = 0
+        for i in range(0, len(divergentes), max(lote, 1)):
+            with transaction.atomic():
+                for epi_id, drift in divergentes[i : i + lote]:
+                    try:
+                        ajusta_estoque(
+                            epi_id,
+                            drift,
+                            observacao="Reconciliação de estoque",
+                            origem=MovimentacaoEstoque.Origem.ENTREGA,
+                        )
+                    except ValidationError:
+                        self.stderr.write(
+                            f"EPI #{epi_id}: correção de {drift} deixaria o estoque negativo.",
+                            style_func=self.style.WARNING,
+                        )
+                        continue
+                    corrigidos += 1
+        return corrigidos
+
+    @staticmethod
+    def _registrar_no_livro(fora_do_livro, lote: int) -> int:
+        """
+        Lança no livro-razão a diferença já presente no saldo, sem mexer no
+        estoque: a linha nasce compactada (o saldo já a contém).
+        """
+        MovimentacaoEstoque.objects.bulk_create(
+            (
+                MovimentacaoEstoque(
+                    epi_id=epi_id,
+                    tipo=MovimentacaoEstoque.Tipo.AJUSTE,
+                    origem=MovimentacaoEstoque.Origem.MANUAL,
+                    quantidade=diferenca,
+                    observacao="Reconciliação: saldo sem lançamento no livro-razão",
+                    compactada=True,
+                )
+                for epi_id, diferenca in fora_do_livro
+            ),
+            batch_size=max(lote, 1),
+        )
+        return len(fora_do_livro)
+
+    def _abrir_saida(self, caminho: str | None):
+        if caminho:
+            return open(caminho, "w", newline="", encoding="utf-8")
+        return nullcontext(self.stdout)
+
+    @staticmethod
+    def _escritor(saida, formato: str):
+        if formato == "json":
+            return lambda linha: saida.write(
+                json.dumps(dict(zip(CAMPOS, linha)), ensure_ascii=False) + "\n"
+            )
+        writer = csv.writer(saida, delimiter=";", lineterminator="\n")
+        writer.writerow(CAMPOS)
+        return writer.writerow
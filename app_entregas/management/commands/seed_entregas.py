@@ -6,6 +6,7 @@ from django.core.management.base import BaseCommand
 from django.utils import timezone
 
 from app_colaboradores.models import Colaborador
+from app_core.datas import data_local
 from app_entregas.models import Entrega, Solicitacao
 from app_epis.models import EPI
 
@@ -79,7 +80,7 @@ class Command(BaseCommand):
             observ = f"Seed entrega standalone #{i} - {col.matricula} - {epi.codigo}"
             data_entrega = now - timedelta(days=i)
             if Entrega.objects.filter(
-                observacao=observ, data_entrega__date=data_entrega.date()
+                observacao=observ, data_entrega_local=data_local(data_entrega)
             ).exists():
                 continue
             Entrega.objects.create(
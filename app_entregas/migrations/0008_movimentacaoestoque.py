@@ -0,0 +1,87 @@
+# Generated by Django 5.2.5 on 2026-10-18 11:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app_entregas", "0007_entrega_data_devolucao_and_more"),
+        ("app_epis", "0004_epi_epi_estoque_minimo_nao_negativo"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MovimentacaoEstoque",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                (
+                    "tipo",
+                    models.CharField(
+                        choices=[("ENTRADA", "Entrada"), ("SAIDA", "Saída"), ("AJUSTE", "Ajuste")],
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "origem",
+                    models.CharField(
+                        choices=[
+                            ("ENTREGA", "Entrega"),
+                            ("SOLICITACAO", "Solicitação"),
+                            ("MANUAL", "Manual"),
+                        ],
+                        max_length=12,
+                    ),
+                ),
+                ("quantidade", models.IntegerField()),
+                (
+                    "observacao",
+                    models.CharField(blank=True, max_length=255, verbose_name="Observação"),
+                ),
+                ("compactada", models.BooleanField(default=False)),
+                ("criado_em", models.DateTimeField(auto_now_add=True)),
+                (
+                    "entrega",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="movimentacoes",
+                        to="app_entregas.entrega",
+                    ),
+                ),
+                (
+                    "epi",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="movimentacoes",
+                        to="app_epis.epi",
+                    ),
+                ),
+                (
+                    "solicitacao",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="movimentacoes",
+                        to="app_entregas.solicitacao",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Movimentação de estoque",
+                "verbose_name_plural": "Movimentações de estoque",
+                "ordering": ["-criado_em", "-id"],
+                "indexes": [
+                    models.Index(fields=["epi", "compactada"], name="mov_epi_compactada_idx")
+                ],
+            },
+        ),
+    ]
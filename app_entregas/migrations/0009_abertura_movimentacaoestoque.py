@@ -0,0 +1,65 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:10
+
+from django.db import migrations
+from django.db.models import Case, F, IntegerField, Sum, Value, When
+
+OBS_ABERTURA = "Saldo de abertura do livro-razão"
+
+
+def abrir_livro_razao(apps, schema_editor):
+    """
+    Lança, por EPI, o efeito das Entregas que ainda não está no livro-razão
+    (histórico anterior a ele). Assim reconciliar_estoque parte de drift zero.
+    """
+    Entrega = apps.get_model("app_entregas", "Entrega")
+    MovimentacaoEstoque = apps.get_model("app_entregas", "MovimentacaoEstoque")
+
+    efeito = Case(
+        When(status="DEVOLVIDO", then=Value(0)),
+        default=-F("quantidade"),
+        output_field=IntegerField(),
+    )
+    esperado = dict(
+        Entrega.objects.values("epi_id")
+        .annotate(t=Sum(efeito))
+        .order_by()
+        .values_list("epi_id", "t")
+    )
+    lancado = dict(
+        MovimentacaoEstoque.objects.filter(origem__in=["ENTREGA", "SOLICITACAO"])
+        .values("epi_id")
+        .annotate(t=Sum("quantidade"))
+        .order_by()
+        .values_list("epi_id", "t")
+    )
+    MovimentacaoEstoque.objects.bulk_create(
+        [
+            MovimentacaoEstoque(
+                epi_id=epi_id,
+                quantidade=total - lancado.get(epi_id, 0),
+                tipo="AJUSTE",
+                origem="ENTREGA",
+                observacao=OBS_ABERTURA,
+                compactada=True,
+            )
+            for epi_id, total in esperado.items()
+            if total - lancado.get(epi_id, 0)
+        ],
+        batch_size=500,
+    )
+
+
+def desfazer_abertura(apps, schema_editor):
+    MovimentacaoEstoque = apps.get_model("app_entregas", "MovimentacaoEstoque")
+    MovimentacaoEstoque.objects.filter(observacao=OBS_ABERTURA).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app_entregas", "0008_movimentacaoestoque"),
+    ]
+
+    operations = [
+        migrations.RunPython(abrir_livro_razao, desfazer_abertura),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.5 on 2026-10-18 11:47
+
+from django.db import migrations
+from django.db.models import Sum
+
+
+def preencher_reservado(apps, schema_editor):
+    """Reserva o estoque das solicitações que já estavam APROVADAS."""
+    EPI = apps.get_model("app_epis", "EPI")
+    Solicitacao = apps.get_model("app_entregas", "Solicitacao")
+    totais = (
+        Solicitacao.objects.filter(status="APROVADA")
+        .values("epi_id")
+        .annotate(total=Sum("quantidade"))
+        .order_by()
+    )
+    for row in totais:
+        EPI.objects.filter(pk=row["epi_id"]).update(reservado=row["total"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app_entregas", "0009_abertura_movimentacaoestoque"),
+        ("app_epis", "0005_epi_reservado"),
+    ]
+
+    operations = [
+        migrations.RunPython(preencher_reservado, migrations.RunPython.noop),
+    ]
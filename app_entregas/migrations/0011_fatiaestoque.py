@@ -0,0 +1,49 @@
+# Generated by Django 5.2.5 on 2026-10-18 11:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app_entregas", "0010_preenche_reservado"),
+        ("app_epis", "0005_epi_reservado"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FatiaEstoque",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("indice", models.PositiveSmallIntegerField()),
+                ("saldo", models.PositiveIntegerField(default=0)),
+                (
+                    "epi",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="fatias_estoque",
+                        to="app_epis.epi",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Fatia de estoque",
+                "verbose_name_plural": "Fatias de estoque",
+                "ordering": ["epi", "indice"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("epi", "indice"), name="fatia_epi_indice_unica"
+                    ),
+                    models.CheckConstraint(
+                        condition=models.Q(("saldo__gte", 0)), name="fatia_saldo_nao_negativo"
+                    ),
+                ],
+            },
+        ),
+    ]
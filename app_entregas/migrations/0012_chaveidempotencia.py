@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-18 11:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app_entregas", "0011_fatiaestoque"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChaveIdempotencia",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("chave", models.CharField(max_length=64, unique=True)),
+                ("redirect_url", models.CharField(blank=True, max_length=500)),
+                ("mensagem", models.CharField(blank=True, max_length=255)),
+                ("expira_em", models.DateTimeField(db_index=True)),
+            ],
+            options={
+                "verbose_name": "Chave de idempotência",
+                "verbose_name_plural": "Chaves de idempotência",
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.5 on 2026-10-18 11:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app_entregas", "0012_chaveidempotencia"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EventoOutbox",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("tipo", models.CharField(max_length=50)),
+                ("payload", models.JSONField(default=dict)),
+                ("criado_em", models.DateTimeField(auto_now_add=True)),
+                ("processado_em", models.DateTimeField(blank=True, null=True)),
+                ("tentativas", models.PositiveSmallIntegerField(default=0)),
+                ("erro", models.TextField(blank=True)),
+            ],
+            options={
+                "verbose_name": "Evento (outbox)",
+                "verbose_name_plural": "Eventos (outbox)",
+                "ordering": ["id"],
+                "indexes": [
+                    models.Index(fields=["processado_em", "id"], name="outbox_pendentes_idx")
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app_colaboradores", "0006_colaborador_foto"),
+        ("app_entregas", "0013_eventooutbox"),
+        ("app_epis", "0005_epi_reservado"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="entrega",
+            options={"ordering": ["-data_entrega", "-id"]},
+        ),
+        migrations.AddIndex(
+            model_name="entrega",
+            index=models.Index(fields=["data_entrega", "id"], name="entrega_data_id_idx"),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app_colaboradores", "0007_busca"),
+        ("app_entregas", "0014_entrega_data_id_idx"),
+        ("app_epis", "0006_busca"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="entrega",
+            index=models.Index(
+                fields=["status", "data_entrega", "id"], name="entrega_status_data_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="entrega",
+            index=models.Index(
+                fields=["status", "data_prevista_devolucao"], name="entrega_status_prevista_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="solicitacao",
+            index=models.Index(
+                fields=["status", "criado_em"], name="solicitacao_status_criado_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:16
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def copia_criado_em(apps, schema_editor):
+    # Sem histórico de alterações: a última conhecida é a criação.
+    Solicitacao = apps.get_model("app_entregas", "Solicitacao")
+    Solicitacao.objects.update(atualizado_em=F("criado_em"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app_colaboradores", "0007_busca"),
+        ("app_entregas", "0015_indices_consultas"),
+        ("app_epis", "0006_busca"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="solicitacao",
+            name="atualizado_em",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(copia_criado_em, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="entrega",
+            index=models.Index(fields=["updated_at", "id"], name="entrega_atualizado_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="solicitacao",
+            index=models.Index(
+                fields=["atualizado_em", "id"], name="solicitacao_atualizado_id_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.5 on 2026-10-18 15:40
+
+from django.db import migrations, models
+
+from app_core.datas import data_local
+
+LOTE = 2000
+
+
+def preenche_data_local(apps, schema_editor):
+    # A conversão de fuso é feita em Python (a mesma do save), em lotes por pk.
+    Entrega = apps.get_model("app_entregas", "Entrega")
+    ultimo = 0
+    while True:
+        lote = list(
+            Entrega.objects.filter(pk__gt=ultimo).order_by("pk").only("pk", "data_entrega")[:LOTE]
+        )
+        if not lote:
+            break
+        for entrega in lote:
+            entrega.data_entrega_local = data_local(entrega.data_entrega)
+        Entrega.objects.bulk_update(lote, ["data_entrega_local"])
+        ultimo = lote[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app_entregas", "0016_sincronizacao_api"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="entrega",
+            name="data_entrega_local",
+            field=models.DateField(editable=False, null=True),
+        ),
+        migrations.RunPython(preenche_data_local, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="entrega",
+            name="data_entrega_local",
+            field=models.DateField(editable=False),
+        ),
+        migrations.AddIndex(
+            model_name="entrega",
+            index=models.Index(
+                fields=["data_entrega_local", "status"], name="entrega_data_local_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app_entregas", "0017_entrega_data_entrega_local"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="eventooutbox",
+            name="proxima_tentativa",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app_entregas", "0018_eventooutbox_proxima_tentativa"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="movimentacaoestoque",
+            index=models.Index(fields=["compactada", "quantidade"], name="mov_compactada_qtd_idx"),
+        ),
+    ]
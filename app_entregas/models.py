@@ -1,6 +1,8 @@
 from django.db import models
 from django.utils import timezone
 
+from app_core.datas import data_local
+
 
 class Solicitacao(models.Model):
     class Status(models.TextChoices):
@@ -24,9 +26,16 @@ class Solicitacao(models.Model):
     observacao = models.CharField(max_length=255, blank=True)
     status = models.CharField(max_length=12, choices=Status.choices, default=Status.PENDENTE)
     criado_em = models.DateTimeField(auto_now_add=True)
+    atualizado_em = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["-criado_em"]
+        indexes = [
+            # Tela de gerenciar: filtra por status, mais recentes primeiro.
+            models.Index(fields=["status", "criado_em"], name="solicitacao_status_criado_idx"),
+            # Sincronização incremental da API (updated_since + cursor).
+            models.Index(fields=["atualizado_em", "id"], name="solicitacao_atualizado_id_idx"),
+        ]
 
     def __str__(self):
         return f"Solicitação #{self.pk} - {self.colaborador} - {self.epi} ({self.quantidade})"
@@ -63,6 +72,9 @@ class Entrega(models.Model):
     data_entrega = models.DateTimeField(default=timezone.now)
     data_prevista_devolucao = models.DateTimeField(null=True, blank=True)
     data_devolucao = models.DateTimeField(null=True, blank=True)
+    # Data local de data_entrega (mantida no save) para agrupar por dia/mês sem
+    # converter fuso na consulta; bulk_create precisa preenchê-la.
+    data_entrega_local = models.DateField(editable=False)
 
     # Dados
     quantidade = models.PositiveIntegerField(default=1)
@@ -74,7 +86,163 @@ class Entrega(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
-        ordering = ["-data_entrega"]
+        ordering = ["-data_entrega", "-id"]
+        indexes = [
+            # Chave da paginação por cursor da lista de entregas.
+            models.Index(fields=["data_entrega", "id"], name="entrega_data_id_idx"),
+            # Filtros por status (lista, relatório, home) na ordem da listagem.
+            models.Index(fields=["status", "data_entrega", "id"], name="entrega_status_data_idx"),
+            # Entregas em aberto com devolução prevista vencida.
+            models.Index(
+                fields=["status", "data_prevista_devolucao"], name="entrega_status_prevista_idx"
+            ),
+            # Sincronização incremental da API (updated_since + cursor).
+            models.Index(fields=["updated_at", "id"], name="entrega_atualizado_id_idx"),
+            # Agrupamentos por dia/mês (resumo diário, painéis).
+            models.Index(fields=["data_entrega_local", "status"], name="entrega_data_local_idx"),
+        ]
 
     def __str__(self):
         return f"{self.epi} → {self.colaborador} ({self.quantidade})"
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "data_entrega" in update_fields:
+            self.data_entrega_local = data_local(self.data_entrega)
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "data_entrega_local"}
+        super().save(*args, **kwargs)
+
+
+class MovimentacaoEstoque(models.Model):
+    """
+    Livro-razão (append-only) das movimentações de estoque de EPI.
+    `quantidade` é o delta com sinal (+ entrada / - saída). Linhas com
+    `compactada=False` ainda não foram consolidadas em `EPI.estoque`.
+    """
+
+    class Tipo(models.TextChoices):
+        ENTRADA = "ENTRADA", "Entrada"
+        SAIDA = "SAIDA", "Saída"
+        AJUSTE = "AJUSTE", "Ajuste"
+
+    class Origem(models.TextChoices):
+        ENTREGA = "ENTREGA", "Entrega"
+        SOLICITACAO = "SOLICITACAO", "Solicitação"
+        MANUAL = "MANUAL", "Manual"
+
+    epi = models.ForeignKey(
+        "app_epis.EPI",
+        on_delete=models.PROTECT,
+        related_name="movimentacoes",
+    )
+    tipo = models.CharField(max_length=10, choices=Tipo.choices)
+    origem = models.CharField(max_length=12, choices=Origem.choices)
+    quantidade = models.IntegerField()
+    entrega = models.ForeignKey(
+        "app_entregas.Entrega",
+        on_delete=models.SET_NULL,
+        related_name="movimentacoes",
+        null=True,
+        blank=True,
+    )
+    solicitacao = models.ForeignKey(
+        "app_entregas.Solicitacao",
+        on_delete=models.SET_NULL,
+        related_name="movimentacoes",
+        null=True,
+        blank=True,
+    )
+    observacao = models.CharField("Observação", max_length=255, blank=True)
+    compactada = models.BooleanField(default=False)
+    criado_em = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-criado_em", "-id"]
+        verbose_name = "Movimentação de estoque"
+        verbose_name_plural = "Movimentações de estoque"
+        indexes = [
+            models.Index(fields=["epi", "compactada"], name="mov_epi_compactada_idx"),
+            # Soma global dos pendentes (home): lê só os não compactados, sem tocar a tabela.
+            models.Index(fields=["compactada", "quantidade"], name="mov_compactada_qtd_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} {self.quantidade:+d} - {self.epi_id}"
+
+
+class FatiaEstoque(models.Model):
+    """
+    Fatia (slot) do contador de estoque de um EPI de alta rotatividade.
+    Quando um EPI tem fatias, o saldo é EPI.estoque + soma das fatias, e cada
+    movimentação atualiza uma única fatia, espalhando a contenção entre N linhas.
+    """
+
+    epi = models.ForeignKey(
+        "app_epis.EPI",
+        on_delete=models.CASCADE,
+        related_name="fatias_estoque",
+    )
+    indice = models.PositiveSmallIntegerField()
+    saldo = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["epi", "indice"]
+        verbose_name = "Fatia de estoque"
+        verbose_name_plural = "Fatias de estoque"
+        constraints = [
+            models.UniqueConstraint(fields=["epi", "indice"], name="fatia_epi_indice_unica"),
+            models.CheckConstraint(
+                name="fatia_saldo_nao_negativo",
+                condition=models.Q(saldo__gte=0),
+            ),
+        ]
+
+    def __str__(self):
+        return f"EPI {self.epi_id} / fatia {self.indice}: {self.saldo}"
+
+
+class ChaveIdempotencia(models.Model):
+    """
+    Resultado de um POST já processado (ver app_entregas.idempotencia).
+    Reenvios com a mesma chave recebem o redirect guardado, sem refazer a operação.
+    """
+
+    chave = models.CharField(max_length=64, unique=True)
+    redirect_url = models.CharField(max_length=500, blank=True)
+    mensagem = models.CharField(max_length=255, blank=True)
+    expira_em = models.DateTimeField(db_index=True)
+
+    class Meta:
+        verbose_name = "Chave de idempotência"
+        verbose_name_plural = "Chaves de idempotência"
+
+    def __str__(self):
+        return self.chave
+
+
+class EventoOutbox(models.Model):
+    """
+    Outbox transacional: eventos gravados na mesma transação da mudança de
+    estoque e consumidos depois pelo comando `processar_outbox`.
+    """
+
+    tipo = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict)
+    criado_em = models.DateTimeField(auto_now_add=True)
+    processado_em = models.DateTimeField(null=True, blank=True)
+    tentativas = models.PositiveSmallIntegerField(default=0)
+    # Depois de uma falha, o evento só volta a ser consumido a partir daqui (backoff).
+    proxima_tentativa = models.DateTimeField(null=True, blank=True)
+    erro = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ["id"]
+        verbose_name = "Evento (outbox)"
+        verbose_name_plural = "Eventos (outbox)"
+        indexes = [
+            models.Index(fields=["processado_em", "id"], name="outbox_pendentes_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.tipo} #{self.pk}"
@@ -0,0 +1,110 @@
+# app_entregas/outbox.py
+"""
+Outbox transacional dos efeitos colaterais de estoque.
+
+`publicar` grava o evento na transação corrente (commit/rollback junto com a
+mudança de estoque); consumidores registrados com `@consumidor(tipo)` rodam
+fora da requisição, no comando `processar_outbox`. Um evento que falha é
+adiado com backoff exponencial; os já processados são apagados por `purgar`.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import EventoOutbox
+
+logger = logging.getLogger(__name__)
+
+ESTOQUE_MOVIMENTADO = "estoque.movimentado"
+
+# Depois de MAX_TENTATIVAS falhas o evento fica com `erro` e deixa de ser reprocessado.
+MAX_TENTATIVAS = 5
+# Espera antes da n-ésima nova tentativa: BACKOFF_BASE * 2**(n-1), até BACKOFF_MAXIMO.
+BACKOFF_BASE = timedelta(seconds=30)
+BACKOFF_MAXIMO = timedelta(hours=1)
+# Eventos processados apagados por DELETE em `purgar`.
+LOTE_PURGA = 1000
+
+_consumidores = defaultdict(list)
+
+
+def consumidor(tipo: str):
+    """Registra uma função `f(payload: dict)` para os eventos do `tipo`."""
+
+    def _registra(func):
+        _consumidores[tipo].append(func)
+        return func
+
+    return _registra
+
+
+def publicar(tipo: str, **payload) -> None:
+    EventoOutbox.objects.create(tipo=tipo, payload=payload)
+
+
+def publicar_em_lote(tipo: str, payloads) -> None:
+    EventoOutbox.objects.bulk_create(EventoOutbox(tipo=tipo, payload=p) for p in payloads)
+
+
+def _espera(tentativas: int) -> timedelta:
+    return min(BACKOFF_BASE * 2 ** (tentativas - 1), BACKOFF_MAXIMO)
+
+
+def _pendentes(limite: int):
+    qs = (
+        EventoOutbox.objects.filter(processado_em__isnull=True, tentativas__lt=MAX_TENTATIVAS)
+        .filter(Q(proxima_tentativa__isnull=True) | Q(proxima_tentativa__lte=timezone.now()))
+        .order_by("id")
+    )
+    if connection.features.has_select_for_update_skip_locked:
+        # Vários workers em paralelo: cada um pega um lote diferente.
+        qs = qs.select_for_update(skip_locked=True)
+    # Sem SKIP LOCKED (SQLite), a escrita já é serializada: polling simples.
+    return list(qs[:limite])
+
+
+def processar_lote(limite: int = 100) -> tuple[int, int]:
+    """
+    Consome até `limite` eventos pendentes, em ordem de criação.
+    Retorna (processados, falhas).
+    """
+    processados = falhas = 0
+    with transaction.atomic():
+        eventos = _pendentes(limite)
+        for evento in eventos:
+            try:
+                with transaction.atomic():
+                    for func in _consumidores.get(evento.tipo, ()):
+                        func(evento.payload)
+            except Exception as exc:
+                logger.exception("Falha ao processar %s", evento)
+                evento.tentativas += 1
+                evento.erro = str(exc)[:2000]
+                evento.proxima_tentativa = timezone.now() + _espera(evento.tentativas)
+                falhas += 1
+            else:
+                evento.processado_em = timezone.now()
+                processados += 1
+        EventoOutbox.objects.bulk_update(
+            eventos, ["processado_em", "tentativas", "proxima_tentativa", "erro"]
+        )
+    return processados, falhas
+
+
+def purgar(reter: timedelta) -> int:
+    """
+    Apaga, em lotes, os eventos processados há mais de `reter`. Os que
+    esgotaram as tentativas ficam (com o erro) para análise. Retorna quantos.
+    """
+    antigos = EventoOutbox.objects.filter(processado_em__lt=timezone.now() - reter)
+    total = 0
+    while True:
+        ids = list(antigos.order_by("id").values_list("id", flat=True)[:LOTE_PURGA])
+        if not ids:
+            return total
+        total += EventoOutbox.objects.filter(id__in=ids).delete()[0]
@@ -1,10 +1,58 @@
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.db import transaction
-from django.db.models import F
+from django.db.models import (
+    Case,
+    Count,
+    ExpressionWrapper,
+    F,
+    IntegerField,
+    OuterRef,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 
+from app_core.datas import data_local
 from app_epis.models import EPI
 
-from .models import Entrega
+from .models import Entrega, FatiaEstoque, MovimentacaoEstoque, Solicitacao
+from .outbox import ESTOQUE_MOVIMENTADO, publicar, publicar_em_lote
+from .sinais import entregas_criadas_em_lote
+
+# "imediato":    aplica o delta em EPI.estoque na hora (com lock na linha do EPI).
+# "condicional": UPDATE condicional único, sem lock explícito nem releitura.
+# "ledger":      entradas só entram no livro-razão (sem tocar o EPI) e são consolidadas
+#                por compactar_estoque; saídas usam o UPDATE condicional do snapshot.
+ENGINE_IMEDIATO = "imediato"
+ENGINE_CONDICIONAL = "condicional"
+ENGINE_LEDGER = "ledger"
+
+# Tamanho dos lotes de INSERT em operações em massa.
+LOTE_BATCH_SIZE = 500
+
+# Contadores fatiados: cache dos EPIs com fatias (segundos) e quantas fatias
+# sorteadas uma saída tenta antes do caminho lento.
+FATIAS_CACHE_TTL = 30
+FATIAS_TENTATIVAS = 3
+_CACHE_FATIADOS = "estoque:epis_fatiados"
+
+# Prazo padrão de devolução para entregas criadas ao atender uma solicitação.
+PRAZO_DEVOLUCAO_PADRAO = timedelta(days=7)
+
+# Saída com livre=True (entrega avulsa) que invadiria o reservado para solicitações.
+ESTOQUE_RESERVADO = "Estoque disponível insuficiente: parte do saldo está reservada."
+
+
+def _engine() -> str:
+    return getattr(settings, "ESTOQUE_ENGINE", ENGINE_IMEDIATO)
 
 
 def _mov_value(status: str, qtd: int) -> int:
@@ -28,48 +76,599 @@ def _mov_value(status: str, qtd: int) -> int:
     return -int(qtd or 0)
 
 
-@transaction.atomic
-def _apply_delta(epi_id: int, delta: int) -> int:
+def efeito_estoque_expr():
+    """Equivalente SQL de _mov_value, para agregações (Sum) sobre Entrega."""
+    return Case(
+        When(status=Entrega.Status.DEVOLVIDO, then=Value(0)),
+        default=-F("quantidade"),
+        output_field=IntegerField(),
+    )
+
+
+ORIGENS_DE_ENTREGA = (MovimentacaoEstoque.Origem.ENTREGA, MovimentacaoEstoque.Origem.SOLICITACAO)
+
+
+def _tipo_por_delta(delta: int) -> str:
+    return MovimentacaoEstoque.Tipo.ENTRADA if delta > 0 else MovimentacaoEstoque.Tipo.SAIDA
+
+
+def _origem_da_entrega(entrega: Entrega) -> dict:
+    """Campos de origem do lançamento no livro-razão para uma Entrega."""
+    return {
+        "origem": (
+            MovimentacaoEstoque.Origem.SOLICITACAO
+            if entrega.solicitacao_id
+            else MovimentacaoEstoque.Origem.ENTREGA
+        ),
+        "entrega_id": entrega.pk,
+        "solicitacao_id": entrega.solicitacao_id,
+    }
+
+
+def _saldos(epi_ids) -> dict[int, int]:
     """
-    Aplica delta no estoque do EPI, de forma atômica.
-    delta > 0  => entrada
-    delta < 0  => saída (valida para não ficar negativo)
+    Saldo (snapshot + pendentes) de vários EPIs em uma única consulta
+    (mais uma, somando as fatias, se algum deles tiver contador fatiado).
+    """
+    epi_ids = list(epi_ids)
+    fatias = _somas_fatias(epi_ids)
+    rows = (
+        EPI.objects.filter(pk__in=epi_ids)
+        .annotate(pendente=Coalesce(_pendentes(), 0))
+        .values_list("pk", "estoque", "pendente")
+    )
+    return {pk: estoque + pendente + fatias.get(pk, 0) for pk, estoque, pendente in rows}
+
+
+def _pendentes(ref: str = "pk"):
+    """
+    Soma dos lançamentos não compactados do EPI externo (`ref`), como subconsulta:
+    `compactada = False` fica no WHERE e o índice (epi, compactada) lê só os pendentes.
+    """
+    return Subquery(
+        MovimentacaoEstoque.objects.filter(epi=OuterRef(ref), compactada=False)
+        .values("epi")
+        .annotate(total=Sum("quantidade"))
+        .values("total")
+    )
+
+
+def saldo_expr(relacao: str = ""):
+    """
+    Saldo completo (EPI.estoque + fatias + pendentes do livro-razão) como
+    expressão SQL, para annotate/filter/order_by; `relacao="epi__"` a monta a
+    partir de um modelo com FK para EPI. Mesmo valor de `_saldos`.
+
+    No caso comum é só a coluna: a soma das fatias entra apenas para os EPIs
+    fatiados (CASE sobre os ids em cache) e os pendentes apenas no engine
+    ledger (nos outros, todo lançamento já nasce compactado).
+    """
+    ref = f"{relacao}id" if relacao else "pk"
+    saldo = F(f"{relacao}estoque")
+    fatiados = sorted(epis_fatiados())
+    if fatiados:
+        fatias = (
+            FatiaEstoque.objects.filter(epi=OuterRef(ref))
+            .values("epi")
+            .annotate(total=Sum("saldo"))
+            .values("total")
+        )
+        saldo += Case(
+            When(**{f"{ref}__in": fatiados}, then=Coalesce(Subquery(fatias), 0)),
+            default=Value(0),
+        )
+    if _engine() == ENGINE_LEDGER:
+        saldo += Coalesce(_pendentes(ref), 0)
+    return ExpressionWrapper(saldo, output_field=IntegerField())
+
+
+def anota_saldo(qs):
+    """Queryset de EPI com `saldo` (ver saldo_expr); EPI.disponivel passa a usá-lo."""
+    return qs.annotate(saldo=saldo_expr())
+
+
+def saldo_estoque(epi_id: int) -> int:
+    """
+    Saldo atual do EPI = snapshot (EPI.estoque) + deltas ainda não compactados.
+    Uma única consulta.
     """
+    try:
+        return _saldos([epi_id])[epi_id]
+    except KeyError:
+        raise EPI.DoesNotExist from None
+
+
+def _delta_imediato(epi_id: int, delta: int, livre: bool = False, **lancamento) -> int:
     epi = EPI.objects.select_for_update(of=("self",)).get(pk=epi_id)
     if delta < 0 and epi.estoque < abs(delta):
         raise ValidationError("Estoque insuficiente para a operação.")
-    EPI.objects.filter(pk=epi_id).update(estoque=F("estoque") + delta)
+    if livre and delta < 0 and epi.estoque - epi.reservado < abs(delta):
+        raise ValidationError(ESTOQUE_RESERVADO)
+    EPI.objects.filter(pk=epi_id).update(estoque=F("estoque") + delta, updated_at=timezone.now())
     epi.refresh_from_db(fields=["estoque"])
     if epi.estoque < 0:
         raise ValidationError("Operação resultaria em estoque negativo.")
+    MovimentacaoEstoque.objects.create(
+        epi_id=epi_id, quantidade=delta, compactada=True, **lancamento
+    )
     return epi.estoque
 
 
+def _update_condicional(epi_id: int, delta: int, livre: bool = False) -> None:
+    """
+    UPDATE epi SET estoque = estoque + d WHERE id = %s AND estoque + d >= 0
+    (AND estoque + d >= reservado, com livre=True).
+    rowcount 0 => estoque insuficiente (ou EPI inexistente).
+    """
+    qs = EPI.objects.filter(pk=epi_id)
+    if delta < 0:
+        qs = qs.filter(estoque__gte=F("reservado") - delta if livre else -delta)
+    if not qs.update(estoque=F("estoque") + delta, updated_at=timezone.now()):
+        if not EPI.objects.filter(pk=epi_id).exists():
+            raise EPI.DoesNotExist
+        raise ValidationError(
+            ESTOQUE_RESERVADO if livre else "Estoque insuficiente para a operação."
+        )
+
+
+def _delta_condicional(epi_id: int, delta: int, livre: bool = False, **lancamento) -> None:
+    _update_condicional(epi_id, delta, livre)
+    MovimentacaoEstoque.objects.create(
+        epi_id=epi_id, quantidade=delta, compactada=True, **lancamento
+    )
+
+
+def _saida_ledger(epi_id: int, delta: int, livre: bool = False) -> None:
+    """
+    Saída no modo ledger: UPDATE condicional no snapshot, sem SELECT ... FOR UPDATE.
+    O snapshot não inclui as entradas pendentes; se ele não cobrir a saída e
+    houver pendentes, compacta este EPI e tenta de novo.
+    """
+    try:
+        _update_condicional(epi_id, delta, livre)
+    except ValidationError:
+        if not compactar_movimentacoes([epi_id]):
+            raise
+        _update_condicional(epi_id, delta, livre)
+
+
+def _delta_ledger(epi_id: int, delta: int, livre: bool = False, **lancamento) -> None:
+    # Entradas: só o append no livro-razão (nenhum lock). Saídas: UPDATE
+    # condicional, como no engine "condicional", e o lançamento já compactado.
+    if delta < 0:
+        _saida_ledger(epi_id, delta, livre)
+    MovimentacaoEstoque.objects.create(
+        epi_id=epi_id, quantidade=delta, compactada=delta < 0, **lancamento
+    )
+
+
+# ===== CONTADORES FATIADOS =====
+# Opt-in por EPI (fatiar_estoque): o estoque fica dividido em N FatiaEstoque e
+# cada movimentação atualiza uma fatia sorteada, em vez da linha do EPI.
+# Saldo = EPI.estoque + soma das fatias (+ pendentes do livro-razão).
+def epis_fatiados() -> dict[int, int]:
+    """{epi_id: nº de fatias} dos EPIs com contador fatiado (em cache)."""
+    fatiados = cache.get(_CACHE_FATIADOS)
+    if fatiados is None:
+        fatiados = dict(
+            FatiaEstoque.objects.values("epi_id")
+            .annotate(n=Count("id"))
+            .order_by()
+            .values_list("epi_id", "n")
+        )
+        cache.set(_CACHE_FATIADOS, fatiados, FATIAS_CACHE_TTL)
+    return fatiados
+
+
+def _somas_fatias(epi_ids) -> dict[int, int]:
+    fatiados = epis_fatiados().keys() & set(epi_ids)
+    if not fatiados:
+        return {}
+    return dict(
+        FatiaEstoque.objects.filter(epi_id__in=fatiados)
+        .values("epi_id")
+        .annotate(total=Sum("saldo"))
+        .order_by()
+        .values_list("epi_id", "total")
+    )
+
+
+def _retira_travando(epi_id: int, quantidade: int) -> None:
+    """
+    Caminho lento da saída fatiada: nenhuma fatia sorteada tinha saldo.
+    Trava o EPI e as fatias (nesta ordem) e consome a linha do EPI e depois as
+    fatias até cobrir a quantidade.
+    """
+    epi = EPI.objects.select_for_update(of=("self",)).only("estoque").get(pk=epi_id)
+    fatias = list(FatiaEstoque.objects.select_for_update().filter(epi_id=epi_id).order_by("indice"))
+    if epi.estoque + sum(f.saldo for f in fatias) < quantidade:
+        raise ValidationError("Estoque insuficiente para a operação.")
+    do_epi = min(epi.estoque, quantidade)
+    if do_epi:
+        EPI.objects.filter(pk=epi_id).update(
+            estoque=F("estoque") - do_epi, updated_at=timezone.now()
+        )
+    falta = quantidade - do_epi
+    alteradas = []
+    for f in fatias:
+        if not falta:
+            break
+        usado = min(f.saldo, falta)
+        f.saldo -= usado
+        falta -= usado
+        alteradas.append(f)
+    FatiaEstoque.objects.bulk_update(alteradas, ["saldo"])
+
+
+def _update_fatiado(epi_id: int, delta: int) -> None:
+    """
+    Aplica delta em uma fatia sorteada. Saídas só tocam fatias com saldo
+    suficiente (UPDATE condicional), preservando saldo >= 0 em todas as linhas.
+    Sem fatias (EPI deixou de ser fatiado), cai no UPDATE condicional do EPI.
+    """
+    n = epis_fatiados().get(epi_id, 0)
+    fatias = FatiaEstoque.objects.filter(epi_id=epi_id)
+    if delta > 0:
+        if not n or not fatias.filter(indice=random.randrange(n)).update(saldo=F("saldo") + delta):
+            _update_condicional(epi_id, delta)
+        return
+    for indice in random.sample(range(n), min(n, FATIAS_TENTATIVAS)):
+        if fatias.filter(indice=indice, saldo__gte=-delta).update(saldo=F("saldo") + delta):
+            return
+    _retira_travando(epi_id, -delta)
+
+
+def _delta_fatiado(epi_id: int, delta: int, livre: bool = False, **lancamento) -> None:
+    if livre and delta < 0:
+        # Respeitar as reservas exige o saldo somado: trava a linha do EPI (como _reserva).
+        reservado = (
+            EPI.objects.select_for_update(of=("self",))
+            .values_list("reservado", flat=True)
+            .get(pk=epi_id)
+        )
+        if reservado and _saldos([epi_id])[epi_id] - reservado < -delta:
+            raise ValidationError(ESTOQUE_RESERVADO)
+    _update_fatiado(epi_id, delta)
+    MovimentacaoEstoque.objects.create(
+        epi_id=epi_id, quantidade=delta, compactada=True, **lancamento
+    )
+
+
+def _reparte(total: int, fatias) -> None:
+    base, resto = divmod(total, len(fatias))
+    for i, f in enumerate(fatias):
+        f.saldo = base + (1 if i < resto else 0)
+
+
+@transaction.atomic
+def fatiar_estoque(epi_id: int, fatias: int) -> None:
+    """
+    Liga (fatias > 0), redimensiona ou desliga (fatias = 0) o contador fatiado
+    do EPI. O saldo atual é repartido igualmente entre as fatias; ao desligar,
+    volta todo para EPI.estoque.
+    """
+    epi = EPI.objects.select_for_update(of=("self",)).only("estoque").get(pk=epi_id)
+    existentes = FatiaEstoque.objects.select_for_update().filter(epi_id=epi_id)
+    total = epi.estoque + (existentes.aggregate(t=Sum("saldo"))["t"] or 0)
+    existentes.delete()
+    if fatias > 0:
+        novas = [FatiaEstoque(epi_id=epi_id, indice=i) for i in range(fatias)]
+        _reparte(total, novas)
+        FatiaEstoque.objects.bulk_create(novas)
+        total = 0
+    EPI.objects.filter(pk=epi_id).update(estoque=total, updated_at=timezone.now())
+    cache.delete(_CACHE_FATIADOS)
+
+
+@transaction.atomic
+def rebalancear_fatias(epi_id: int) -> int | None:
+    """
+    Reparte igualmente entre as fatias o saldo do EPI (linha do EPI + fatias),
+    para que as saídas voltem a achar saldo na primeira fatia sorteada.
+    Retorna o saldo total, ou None se a rodada foi pulada.
+
+    As saídas fatiadas com reserva travam uma fatia e depois a linha do EPI;
+    aqui a ordem é a inversa, então nada espera: com skip_locked, se a linha
+    do EPI ou alguma fatia estiver em uso, a rodada é pulada (sem deadlock).
+    """
+    epi = (
+        EPI.objects.select_for_update(of=("self",), skip_locked=True)
+        .only("estoque", "updated_at")
+        .filter(pk=epi_id)
+        .first()
+    )
+    if epi is None:
+        return None
+    fatias = FatiaEstoque.objects.filter(epi_id=epi_id)
+    travadas = list(fatias.select_for_update(skip_locked=True).order_by("indice"))
+    if len(travadas) < fatias.count():
+        return None
+    fatias = travadas
+    total = epi.estoque + sum(f.saldo for f in fatias)
+    if fatias:
+        _reparte(total, fatias)
+        FatiaEstoque.objects.bulk_update(fatias, ["saldo"])
+        # As saídas/entradas nas fatias não tocam a linha do EPI: marca a alteração
+        # aqui para que `updated_since` da API as enxergue.
+        movimentado = MovimentacaoEstoque.objects.filter(
+            epi_id=epi_id, criado_em__gte=epi.updated_at
+        ).exists()
+        if epi.estoque or movimentado:
+            EPI.objects.filter(pk=epi_id).update(estoque=0, updated_at=timezone.now())
+    return total
+
+
+ENGINES = {
+    ENGINE_IMEDIATO: _delta_imediato,
+    ENGINE_CONDICIONAL: _delta_condicional,
+    ENGINE_LEDGER: _delta_ledger,
+}
+
+
+@transaction.atomic
+def _apply_delta(epi_id: int, delta: int, livre: bool = False, **lancamento) -> int | None:
+    """
+    Aplica delta no estoque do EPI, de forma atômica, e registra o lançamento
+    no livro-razão (MovimentacaoEstoque), usando o engine de settings.ESTOQUE_ENGINE.
+    delta > 0  => entrada
+    delta < 0  => saída (valida para não ficar negativo; com livre=True, também
+                  para não consumir o reservado por solicitações APROVADAS)
+
+    `lancamento` aceita origem/tipo/entrega_id/solicitacao_id/observacao.
+    Retorna o saldo resultante (None nos engines "condicional" e "ledger", que não relêem o EPI).
+    EPIs com contador fatiado ignoram o engine e movimentam uma fatia (retorna None).
+    Publica `estoque.movimentado` no outbox, na mesma transação.
+    """
+    lancamento.setdefault("origem", MovimentacaoEstoque.Origem.MANUAL)
+    lancamento.setdefault("tipo", _tipo_por_delta(delta))
+    if epi_id in epis_fatiados():
+        saldo = _delta_fatiado(epi_id, delta, livre, **lancamento)
+    else:
+        saldo = ENGINES[_engine()](epi_id, delta, livre, **lancamento)
+    publicar(
+        ESTOQUE_MOVIMENTADO,
+        epi_id=epi_id,
+        delta=delta,
+        origem=lancamento["origem"],
+        entrega_id=lancamento.get("entrega_id"),
+        solicitacao_id=lancamento.get("solicitacao_id"),
+    )
+    return saldo
+
+
+def ajusta_estoque(
+    epi_id: int,
+    delta: int,
+    observacao: str = "",
+    origem: str = MovimentacaoEstoque.Origem.MANUAL,
+) -> int | None:
+    """
+    Ajuste de estoque (inventário, avaria no almoxarifado etc.).
+    Reconciliações de Entregas usam origem=ENTREGA para zerar a divergência.
+    """
+    return _apply_delta(
+        epi_id,
+        delta,
+        tipo=MovimentacaoEstoque.Tipo.AJUSTE,
+        origem=origem,
+        observacao=observacao,
+    )
+
+
+@transaction.atomic
+def compactar_movimentacoes(epi_ids=None) -> int:
+    """
+    Consolida os lançamentos pendentes em EPI.estoque (um UPDATE por EPI)
+    e os marca como compactados. Retorna quantos EPIs foram atualizados.
+    A CheckConstraint `epi_estoque_nao_negativo` continua valendo aqui.
+
+    Trava os EPIs (ordem de id) e depois os lançamentos, com leitura travada:
+    duas compactações simultâneas nunca somam o mesmo lançamento duas vezes.
+    """
+    pendentes = MovimentacaoEstoque.objects.filter(compactada=False)
+    if epi_ids is not None:
+        pendentes = pendentes.filter(epi_id__in=epi_ids)
+    alvos = sorted(set(pendentes.values_list("epi_id", flat=True).order_by()))
+    if not alvos:
+        return 0
+    list(
+        EPI.objects.select_for_update(of=("self",))
+        .filter(pk__in=alvos)
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+    totais: dict[int, int] = {}
+    ids = []
+    for pk, epi_id, quantidade in (
+        pendentes.filter(epi_id__in=alvos)
+        .select_for_update()
+        .order_by()
+        .values_list("pk", "epi_id", "quantidade")
+    ):
+        totais[epi_id] = totais.get(epi_id, 0) + quantidade
+        ids.append(pk)
+    for epi_id in sorted(totais):
+        if totais[epi_id]:
+            EPI.objects.filter(pk=epi_id).update(
+                estoque=F("estoque") + totais[epi_id], updated_at=timezone.now()
+            )
+    for i in range(0, len(ids), LOTE_BATCH_SIZE):
+        MovimentacaoEstoque.objects.filter(pk__in=ids[i : i + LOTE_BATCH_SIZE]).update(
+            compactada=True
+        )
+    return len(totais)
+
+
+def _deltas_da_entrega(nova: Entrega, antiga: Entrega | None):
+    """
+    Lista de (epi_id, delta, entrega de origem) que reconcilia `antiga` → `nova`.
+    Deltas nulos são omitidos.
+    """
+    new_delta = _mov_value(nova.status, nova.quantidade)
+    if antiga is None:
+        deltas = [(nova.epi_id, new_delta, nova)]
+    else:
+        old_delta = _mov_value(antiga.status, antiga.quantidade)
+        if antiga.epi_id == nova.epi_id:
+            deltas = [(nova.epi_id, new_delta - old_delta, nova)]
+        else:
+            deltas = [(antiga.epi_id, -old_delta, antiga), (nova.epi_id, new_delta, nova)]
+    return [d for d in deltas if d[1]]
+
+
 @transaction.atomic
 def movimenta_por_entrega(nova: Entrega, antiga: Entrega | None = None) -> None:
     """
     Reconciliador de estoque com base em uma Entrega nova/atualizada.
     - Se antiga is None => criação
     - Se trocou EPI/status/quantidade => aplica deltas corretos
+    Entregas avulsas só consomem o disponível (saldo - reservado); as de uma
+    solicitação consomem a própria reserva.
     """
-    if antiga is None:
-        delta = _mov_value(nova.status, nova.quantidade)
-        if delta:
-            _apply_delta(nova.epi_id, delta)
-        return
+    for epi_id, delta, entrega in _deltas_da_entrega(nova, antiga):
+        livre = not entrega.solicitacao_id
+        _apply_delta(epi_id, delta, livre, **_origem_da_entrega(entrega))
 
-    old_delta = _mov_value(antiga.status, antiga.quantidade)
-    new_delta = _mov_value(nova.status, nova.quantidade)
 
-    if antiga.epi_id == nova.epi_id:
-        delta = new_delta - old_delta
-        if delta:
-            _apply_delta(nova.epi_id, delta)
+@transaction.atomic
+def movimenta_em_lote(pares) -> dict[int, int]:
+    """
+    Reconcilia o estoque de muitas Entregas de uma vez.
+    `pares` é um iterável de (nova, antiga) — antiga=None para criações.
+
+    Os deltas são somados por EPI; os EPIs afetados são travados em ordem
+    crescente de id (evita deadlock) e cada EPI recebe um único UPDATE.
+    Nos engines "condicional" e "ledger" não há SELECT ... FOR UPDATE: cada EPI
+    recebe um UPDATE condicional, também em ordem crescente de id (no ledger,
+    só os com saída; as entradas ficam pendentes no livro-razão).
+    O livro-razão recebe um lançamento por Entrega via bulk_create e o outbox
+    um evento `estoque.movimentado` por EPI.
+    Retorna {epi_id: saldo após a operação}.
+    """
+    lancamentos = []
+    totais: dict[int, int] = {}
+    for nova, antiga in pares:
+        for epi_id, delta, entrega in _deltas_da_entrega(nova, antiga):
+            totais[epi_id] = totais.get(epi_id, 0) + delta
+            lancamentos.append(
+                MovimentacaoEstoque(
+                    epi_id=epi_id,
+                    quantidade=delta,
+                    tipo=_tipo_por_delta(delta),
+                    **_origem_da_entrega(entrega),
+                )
+            )
+    if not lancamentos:
+        return {}
+
+    # EPIs fatiados movimentam uma fatia cada, fora do lock/UPDATE do engine.
+    fatiados = sorted(epis_fatiados().keys() & totais.keys())
+    for epi_id in fatiados:
+        if totais[epi_id]:
+            _update_fatiado(epi_id, totais[epi_id])
+    saldos_fatiados = _saldos(fatiados) if fatiados else {}
+    deltas = dict(totais)
+    totais = {pk: d for pk, d in totais.items() if pk not in saldos_fatiados}
+
+    engine = _engine()
+    ledger = engine == ENGINE_LEDGER
+    if engine == ENGINE_CONDICIONAL:
+        for epi_id in sorted(totais):
+            if totais[epi_id]:
+                _update_condicional(epi_id, totais[epi_id])
+        saldos = dict(EPI.objects.filter(pk__in=totais).values_list("pk", "estoque"))
+    elif ledger:
+        for epi_id in sorted(totais):
+            if totais[epi_id] < 0:
+                _saida_ledger(epi_id, totais[epi_id])
+        saldos = _saldos(totais)
+        if saldos.keys() != totais.keys():
+            raise EPI.DoesNotExist
+        # As entradas líquidas ainda vão ser gravadas (pendentes) logo abaixo.
+        saldos = {pk: s + max(totais[pk], 0) for pk, s in saldos.items()}
     else:
-        if old_delta:
-            _apply_delta(antiga.epi_id, -old_delta)
-        if new_delta:
-            _apply_delta(nova.epi_id, new_delta)
+        saldos = dict(
+            EPI.objects.select_for_update(of=("self",))
+            .filter(pk__in=totais)
+            .order_by("pk")
+            .values_list("pk", "estoque")
+        )
+        for epi_id in sorted(totais):
+            if epi_id not in saldos:
+                raise EPI.DoesNotExist
+            if saldos[epi_id] + totais[epi_id] < 0:
+                raise ValidationError("Estoque insuficiente para a operação.")
+            saldos[epi_id] += totais[epi_id]
+            if totais[epi_id]:
+                EPI.objects.filter(pk=epi_id).update(
+                    estoque=F("estoque") + totais[epi_id], updated_at=timezone.now()
+                )
+
+    for mov in lancamentos:
+        # No ledger ficam pendentes só os lançamentos de EPIs com entrada líquida.
+        mov.compactada = not ledger or mov.epi_id in saldos_fatiados or totais[mov.epi_id] <= 0
+    MovimentacaoEstoque.objects.bulk_create(lancamentos)
+    origem = lancamentos[0].origem
+    publicar_em_lote(
+        ESTOQUE_MOVIMENTADO,
+        ({"epi_id": pk, "delta": d, "origem": origem} for pk, d in deltas.items() if d),
+    )
+    saldos.update(saldos_fatiados)
+    return saldos
+
+
+@transaction.atomic
+def entrega_em_lote(
+    colaborador_ids,
+    epi_id: int,
+    quantidade: int,
+    status: str = Entrega.Status.EMPRESTADO,
+    data_prevista_devolucao=None,
+    observacao: str = "",
+    batch_size: int = LOTE_BATCH_SIZE,
+) -> int:
+    """
+    Entrega o mesmo EPI a vários colaboradores de uma vez.
+    Aplica um único delta agregado no estoque (falha atômica se o disponível,
+    descontadas as reservas, não cobrir) e insere as Entregas com bulk_create
+    em lotes. Retorna quantas foram criadas.
+    """
+    colaborador_ids = list(dict.fromkeys(colaborador_ids))
+    if not colaborador_ids:
+        raise ValidationError("Nenhum colaborador selecionado.")
+    if quantidade < 1:
+        raise ValidationError("Quantidade deve ser ≥ 1.")
+
+    total = len(colaborador_ids)
+    delta = _mov_value(status, quantidade) * total
+    if delta:
+        _apply_delta(
+            epi_id,
+            delta,
+            livre=True,
+            origem=MovimentacaoEstoque.Origem.ENTREGA,
+            observacao=f"Entrega em lote para {total} colaboradores",
+        )
+
+    agora = timezone.now()
+    entregas = Entrega.objects.bulk_create(
+        (
+            Entrega(
+                colaborador_id=colaborador_id,
+                epi_id=epi_id,
+                quantidade=quantidade,
+                status=status,
+                data_entrega=agora,
+                data_entrega_local=data_local(agora),
+                data_prevista_devolucao=data_prevista_devolucao,
+                observacao=observacao,
+            )
+            for colaborador_id in colaborador_ids
+        ),
+        batch_size=batch_size,
+    )
+    entregas_criadas_em_lote.send(sender=Entrega, entregas=entregas)
+    return total
 
 
 @transaction.atomic
@@ -82,4 +681,223 @@ def movimenta_por_exclusao(entrega: Entrega) -> None:
     """
     delta = _mov_value(entrega.status, entrega.quantidade)
     if delta:
-        _apply_delta(entrega.epi_id, -delta)
+        _apply_delta(
+            entrega.epi_id,
+            -delta,
+            observacao=f"Exclusão da entrega #{entrega.pk}",
+            **_origem_da_entrega(entrega),
+        )
+
+
+# ===== RESERVAS =====
+def _reserva(epi_id: int, quantidade: int) -> None:
+    """
+    Reserva `quantidade` do EPI se o disponível cobrir. O saldo é o completo
+    (`_saldos`: fatias e livro-razão incluídos), lido com a linha do EPI travada.
+    """
+    if not quantidade:
+        return
+    reservado = (
+        EPI.objects.select_for_update(of=("self",))
+        .values_list("reservado", flat=True)
+        .get(pk=epi_id)
+    )
+    if _saldos([epi_id])[epi_id] - reservado < quantidade:
+        raise ValidationError("Estoque disponível insuficiente para reservar.")
+    EPI.objects.filter(pk=epi_id).update(
+        reservado=F("reservado") + quantidade, updated_at=timezone.now()
+    )
+
+
+def _libera_reserva(epi_id: int, quantidade: int) -> None:
+    """Libera `quantidade` reservada do EPI, sem deixar `reservado` negativo."""
+    if not quantidade:
+        return
+    EPI.objects.filter(pk=epi_id).update(
+        reservado=Case(
+            When(reservado__gte=quantidade, then=F("reservado") - quantidade),
+            default=Value(0),
+        ),
+        updated_at=timezone.now(),
+    )
+
+
+@transaction.atomic
+def altera_status_solicitacao(s: Solicitacao, novo_status: str) -> None:
+    """
+    Troca o status da solicitação mantendo EPI.reservado coerente:
+    entrar em APROVADA reserva a quantidade; sair de APROVADA a libera.
+    """
+    aprovada = Solicitacao.Status.APROVADA
+    if novo_status == aprovada and s.status != aprovada:
+        _reserva(s.epi_id, s.quantidade)
+    elif s.status == aprovada and novo_status != aprovada:
+        _libera_reserva(s.epi_id, s.quantidade)
+    s.status = novo_status
+    s.save(update_fields=["status", "atualizado_em"])
+
+
+def _reservas_por_epi(epi_ids) -> dict[int, int]:
+    """`reservado` dos EPIs; trava as linhas (ordem de id) no engine imediato."""
+    qs = EPI.objects.filter(pk__in=epi_ids)
+    if _engine() == ENGINE_IMEDIATO:
+        qs = qs.select_for_update(of=("self",)).order_by("pk")
+    return dict(qs.values_list("pk", "reservado"))
+
+
+# ===== SOLICITAÇÕES EM LOTE =====
+def _resultado(pk: int, ok: bool, mensagem: str) -> dict:
+    return {"id": pk, "ok": ok, "mensagem": mensagem}
+
+
+def _normaliza_ids(ids) -> list[int]:
+    return sorted({int(i) for i in ids})
+
+
+def _cancela_se_tudo_ou_nada(resultados: list[dict], tudo_ou_nada: bool) -> bool:
+    """No modo tudo-ou-nada, qualquer falha cancela o lote inteiro."""
+    if not tudo_ou_nada or all(r["ok"] for r in resultados):
+        return False
+    for r in resultados:
+        if r["ok"]:
+            r.update(ok=False, mensagem="Não processada: o lote foi cancelado (tudo ou nada).")
+    return True
+
+
+@transaction.atomic
+def decide_solicitacoes_em_lote(ids, novo_status: str, tudo_ou_nada: bool = False) -> list[dict]:
+    """
+    Aprova/reprova várias solicitações PENDENTES com um único UPDATE.
+    Aprovar reserva o estoque (um UPDATE por EPI); as mais antigas têm
+    prioridade quando o disponível não cobre todas.
+    Retorna um resultado por id: {"id", "ok", "mensagem"}.
+    """
+    ids = _normaliza_ids(ids)
+    atuais = {
+        pk: (status, epi_id, quantidade)
+        for pk, status, epi_id, quantidade in Solicitacao.objects.select_for_update()
+        .filter(pk__in=ids)
+        .values_list("pk", "status", "epi_id", "quantidade")
+    }
+    aprovando = novo_status == Solicitacao.Status.APROVADA
+    disponivel, reservar = {}, {}
+    if aprovando:
+        epi_ids = {epi_id for _, epi_id, _ in atuais.values()}
+        reservados = _reservas_por_epi(epi_ids)
+        disponivel = {pk: saldo - reservados[pk] for pk, saldo in _saldos(epi_ids).items()}
+
+    resultados = []
+    for pk in ids:
+        if pk not in atuais:
+            resultados.append(_resultado(pk, False, "Solicitação não encontrada."))
+            continue
+        status, epi_id, quantidade = atuais[pk]
+        if status != Solicitacao.Status.PENDENTE:
+            resultados.append(_resultado(pk, False, "Somente solicitações PENDENTES."))
+        elif aprovando and disponivel.get(epi_id, 0) < quantidade:
+            resultados.append(
+                _resultado(pk, False, "Estoque disponível insuficiente para reservar.")
+            )
+        else:
+            if aprovando:
+                disponivel[epi_id] -= quantidade
+                reservar[epi_id] = reservar.get(epi_id, 0) + quantidade
+            resultados.append(_resultado(pk, True, Solicitacao.Status(novo_status).label))
+
+    if _cancela_se_tudo_ou_nada(resultados, tudo_ou_nada):
+        return resultados
+
+    # A reserva revalida o disponível com o EPI travado; se falhar (o saldo
+    # mudou desde a leitura), as solicitações daquele EPI falham, não o lote.
+    recusados = {}
+    for epi_id in sorted(reservar):
+        try:
+            _reserva(epi_id, reservar[epi_id])
+        except ValidationError as ex:
+            recusados[epi_id] = ex.message
+    if recusados:
+        for r in resultados:
+            epi_id = atuais[r["id"]][1] if r["ok"] else None
+            if epi_id in recusados:
+                r.update(ok=False, mensagem=recusados[epi_id])
+        if _cancela_se_tudo_ou_nada(resultados, tudo_ou_nada):
+            transaction.set_rollback(True)
+            return resultados
+    ok_ids = [r["id"] for r in resultados if r["ok"]]
+    if ok_ids:
+        Solicitacao.objects.filter(pk__in=ok_ids, status=Solicitacao.Status.PENDENTE).update(
+            status=novo_status, atualizado_em=timezone.now()
+        )
+    return resultados
+
+
+@transaction.atomic
+def atende_solicitacoes_em_lote(ids, tudo_ou_nada: bool = False) -> list[dict]:
+    """
+    Atende várias solicitações PENDENTES/APROVADAS de uma vez:
+    cria as Entregas com bulk_create, reconcilia o estoque por EPI
+    (movimenta_em_lote) e marca as solicitações como ATENDIDAS com um UPDATE.
+    As mais antigas têm prioridade quando o estoque não cobre todas.
+    """
+    ids = _normaliza_ids(ids)
+    solicitacoes = {
+        s.pk: s
+        for s in Solicitacao.objects.select_for_update()
+        .filter(pk__in=ids)
+        .only("id", "colaborador_id", "epi_id", "quantidade", "status")
+    }
+    epi_ids = sorted({s.epi_id for s in solicitacoes.values()})
+    reservados = _reservas_por_epi(epi_ids)
+    saldos = _saldos(epi_ids)
+
+    atendiveis = {Solicitacao.Status.PENDENTE, Solicitacao.Status.APROVADA}
+    resultados, aceitas, liberar = [], [], {}
+    for pk in ids:
+        s = solicitacoes.get(pk)
+        if s is None:
+            resultados.append(_resultado(pk, False, "Solicitação não encontrada."))
+            continue
+        aprovada = s.status == Solicitacao.Status.APROVADA
+        # APROVADAS já têm a sua reserva; PENDENTES não podem consumir reservas alheias.
+        livre = saldos.get(s.epi_id, 0) - (0 if aprovada else reservados.get(s.epi_id, 0))
+        if s.status not in atendiveis:
+            resultados.append(_resultado(pk, False, "Apenas solicitações PENDENTES/APROVADAS."))
+        elif livre < s.quantidade:
+            resultados.append(_resultado(pk, False, "Estoque insuficiente para a operação."))
+        else:
+            saldos[s.epi_id] -= s.quantidade
+            if aprovada:
+                reservados[s.epi_id] -= s.quantidade
+                liberar[s.epi_id] = liberar.get(s.epi_id, 0) + s.quantidade
+            aceitas.append(s)
+            resultados.append(_resultado(pk, True, "Atendida."))
+
+    if _cancela_se_tudo_ou_nada(resultados, tudo_ou_nada) or not aceitas:
+        return resultados
+
+    agora = timezone.now()
+    entregas = Entrega.objects.bulk_create(
+        [
+            Entrega(
+                colaborador_id=s.colaborador_id,
+                epi_id=s.epi_id,
+                quantidade=s.quantidade,
+                status=Entrega.Status.EMPRESTADO,
+                data_entrega=agora,
+                data_entrega_local=data_local(agora),
+                data_prevista_devolucao=agora + PRAZO_DEVOLUCAO_PADRAO,
+                observacao=f"Atendida a solicitação #{s.pk}",
+                solicitacao_id=s.pk,
+            )
+            for s in aceitas
+        ],
+        batch_size=LOTE_BATCH_SIZE,
+    )
+    movimenta_em_lote((e, None) for e in entregas)
+    entregas_criadas_em_lote.send(sender=Entrega, entregas=entregas)
+    for epi_id in sorted(liberar):
+        _libera_reserva(epi_id, liberar[epi_id])
+    Solicitacao.objects.filter(pk__in=[s.pk for s in aceitas]).update(
+        status=Solicitacao.Status.ATENDIDA, atualizado_em=timezone.now()
+    )
+    return resultados
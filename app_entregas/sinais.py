@@ -0,0 +1,8 @@
+# app_entregas/sinais.py
+"""Sinais de app_entregas para quem precisa acompanhar Entregas criadas sem save()."""
+
+from django.dispatch import Signal
+
+# Enviado após bulk_create de Entregas (lote e atendimento de solicitações).
+# Argumento: entregas (lista de Entrega; no MySQL, sem pk).
+entregas_criadas_em_lote = Signal()
@@ -7,6 +7,7 @@ app_name = "app_entregas"
 urlpatterns = [
     path("", views.lista, name="lista"),
     path("novo/", views.CriarEntregaView.as_view(), name="criar"),
+    path("lote/", views.EntregaLoteView.as_view(), name="criar_lote"),
     # Solicitações - colaborador
     path(
         "solicitacoes/nova/",
@@ -27,6 +28,11 @@ urlpatterns = [
         views.SolicitacoesGerenciarView.as_view(),
         name="solicitacoes_gerenciar",
     ),
+    path(
+        "solicitacoes/lote/",
+        views.solicitacoes_em_lote,
+        name="solicitacoes_em_lote",
+    ),
     path(
         "solicitacoes/<int:pk>/aprovar/",
         views.aprovar_solicitacao,
@@ -37,6 +43,11 @@ urlpatterns = [
         views.reprovar_solicitacao,
         name="reprovar_solicitacao",
     ),
+    path(
+        "solicitacoes/<int:pk>/cancelar/",
+        views.cancelar_solicitacao,
+        name="cancelar_solicitacao",
+    ),
     path(
         "solicitacoes/<int:pk>/atender/",
         views.atender_solicitacao,
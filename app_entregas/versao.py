@@ -0,0 +1,35 @@
+# app_entregas/versao.py
+"""
+Versão global das Entregas, para invalidar caches derivados.
+
+Todo caminho de escrita de Entrega incrementa o contador: save/delete pelos
+sinais do ORM e os bulk_create dos serviços pelo sinal `entregas_criadas_em_lote`
+(receptores conectados em AppEntregasConfig.ready). Quem guarda algo calculado
+a partir das Entregas (facetas, relatório) põe a versão na chave: entradas
+antigas deixam de ser lidas sem varrer chaves e expiram pelo TTL.
+"""
+
+from django.core.cache import cache
+from django.db import transaction
+
+CHAVE = "entregas:versao"
+
+
+def atual() -> int:
+    return cache.get_or_set(CHAVE, 1, None)
+
+
+def incrementa() -> None:
+    """Nova versão (após o commit da alteração)."""
+
+    def _incrementa():
+        try:
+            cache.incr(CHAVE)
+        except ValueError:  # chave ausente (cache limpo/expirado)
+            cache.set(CHAVE, 1, None)
+
+    transaction.on_commit(_incrementa)
+
+
+def _ao_alterar_entrega(sender, **kwargs):
+    incrementa()
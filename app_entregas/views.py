@@ -3,28 +3,57 @@ from datetime import timedelta
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required, permission_required
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
-from django.core.exceptions import ValidationError
-from django.core.paginator import Paginator
+from django.core.exceptions import PermissionDenied, ValidationError
 from django.db import transaction
-from django.db.models import Q
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
 from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.utils.http import urlencode
 from django.views.decorators.http import require_POST
 from django.views.generic import (
     CreateView,
     DeleteView,
     DetailView,
+    FormView,
     ListView,
     UpdateView,
 )
 
 from app_colaboradores.models import Colaborador
+from app_core.fragmentos import eh_fragmento, responde
+from app_core.paginacao import CursorPaginator, PaginadorAproximado
 from app_epis.models import EPI
 
-from .forms import EntregaForm, SolicitacaoForm
+from . import facetas
+from .forms import EntregaForm, EntregaLoteForm, SolicitacaoForm
+from .idempotencia import idempotente, nova_chave
 from .models import Entrega, Solicitacao
-from .services import movimenta_por_entrega, movimenta_por_exclusao
+from .services import (
+    altera_status_solicitacao,
+    atende_solicitacoes_em_lote,
+    decide_solicitacoes_em_lote,
+    entrega_em_lote,
+    movimenta_por_entrega,
+    movimenta_por_exclusao,
+    saldo_expr,
+)
+
+
+def _facetas_com_links(request, filtros):
+    """Facetas da lista com o link de cada valor (clicar no valor ativo remove o filtro)."""
+    resultado = facetas.facetas(filtros)
+    for dimensao, itens in resultado.items():
+        for item in itens:
+            params = request.GET.copy()
+            for chave in ("page", "cursor", "total", dimensao):
+                params.pop(chave, None)
+            item["ativo"] = filtros[dimensao] == item["valor"]
+            if not item["ativo"]:
+                params[dimensao] = item["valor"]
+            item["query"] = params.urlencode()
+    return resultado
 
 
 def lista(request):
@@ -33,46 +62,63 @@ def lista(request):
     epi_id = request.GET.get("epi", "")
     status = request.GET.get("status", "")
 
-    qs = Entrega.objects.select_related("colaborador", "epi", "epi__categoria")
-
-    if q:
-        qs = qs.filter(
-            Q(colaborador__nome__icontains=q)
-            | Q(colaborador__email__icontains=q)
-            | Q(colaborador__matricula__icontains=q)
-            | Q(epi__nome__icontains=q)
-            | Q(epi__codigo__icontains=q)
-        )
-    if colaborador_id:
-        qs = qs.filter(colaborador_id=colaborador_id)
-    if epi_id:
-        qs = qs.filter(epi_id=epi_id)
-    if status:
-        qs = qs.filter(status=status)
+    filtros = facetas.filtros_da_requisicao(request.GET)
+    qs = facetas.aplica(
+        Entrega.objects.select_related("colaborador", "epi", "epi__categoria"), filtros
+    )
 
-    paginator = Paginator(qs, 10)
-    page_obj = paginator.get_page(request.GET.get("page"))
+    # Cursor (data_entrega, id) em vez de COUNT + OFFSET: página N custa o mesmo que a 1.
+    paginator = CursorPaginator(qs, 10, campos=("data_entrega", "id"))
+    page_obj = paginator.get_page(request.GET.get("cursor"))
+    total = paginator.total_aproximado() if request.GET.get("total") == "1" else None
 
     params = request.GET.copy()
-    params.pop("page", None)
+    for chave in ("page", "cursor"):
+        params.pop(chave, None)
 
     context = {
         "entregas": page_obj.object_list,
         "page_obj": page_obj,
         "is_paginated": page_obj.has_other_pages(),
-        "q": q,
-        "colaborador_id": colaborador_id,
-        "epi_id": epi_id,
-        "status": status,
-        "colaboradores": Colaborador.objects.all().only("id", "nome"),
-        "epis": EPI.objects.all().only("id", "nome"),
-        "statuses": Entrega.Status.choices,
+        "total": total,
+        "facetas": _facetas_com_links(request, filtros),
         "base_query": params.urlencode(),
+        "chave_idempotencia": nova_chave(),
     }
-    return render(request, "app_entregas/pages/list.html", context)
+    if not eh_fragmento(request):
+        # Só a página inteira tem o formulário de filtros.
+        context.update(
+            {
+                "q": q,
+                "colaborador_id": colaborador_id,
+                "epi_id": epi_id,
+                "status": status,
+                # Filtros usam autocomplete: só o item selecionado é resolvido aqui.
+                "colaborador_selecionado": (
+                    Colaborador.objects.only("id", "nome", "matricula")
+                    .filter(pk=colaborador_id)
+                    .first()
+                    if colaborador_id.isdigit()
+                    else None
+                ),
+                "epi_selecionado": (
+                    EPI.objects.only("id", "nome", "codigo").filter(pk=epi_id).first()
+                    if epi_id.isdigit()
+                    else None
+                ),
+                "statuses": Entrega.Status.choices,
+            }
+        )
+    return responde(
+        request,
+        "app_entregas/pages/list.html",
+        "app_entregas/partials/list_resultados.html",
+        context,
+    )
 
 
 # ===== ENTREGAS =====
+@method_decorator(idempotente, name="post")
 class CriarEntregaView(LoginRequiredMixin, PermissionRequiredMixin, CreateView):
     permission_required = "app_entregas.add_entrega"
     raise_exception = False
@@ -82,6 +128,11 @@ class CriarEntregaView(LoginRequiredMixin, PermissionRequiredMixin, CreateView):
     template_name = "app_entregas/pages/form.html"
     success_url = reverse_lazy("app_entregas:lista")
 
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        ctx["chave_idempotencia"] = nova_chave()
+        return ctx
+
     def form_valid(self, form):
         try:
             with transaction.atomic():
@@ -99,6 +150,39 @@ class CriarEntregaView(LoginRequiredMixin, PermissionRequiredMixin, CreateView):
         return super().form_invalid(form)
 
 
+class EntregaLoteView(LoginRequiredMixin, PermissionRequiredMixin, FormView):
+    """Entrega o mesmo EPI a um grupo de colaboradores em uma única operação."""
+
+    permission_required = "app_entregas.add_entrega"
+    raise_exception = False
+    login_url = reverse_lazy("app_colaboradores:entrar")
+    form_class = EntregaLoteForm
+    template_name = "app_entregas/pages/lote_form.html"
+    success_url = reverse_lazy("app_entregas:lista")
+
+    def form_valid(self, form):
+        cd = form.cleaned_data
+        try:
+            total = entrega_em_lote(
+                form.colaborador_ids(),
+                epi_id=cd["epi"].pk,
+                quantidade=cd["quantidade"],
+                status=cd["status"],
+                data_prevista_devolucao=cd.get("data_prevista_devolucao"),
+                observacao=cd.get("observacao") or "",
+            )
+        except ValidationError as ex:
+            form.add_error(None, ex.message)
+            messages.error(self.request, ex.message)
+            return self.form_invalid(form)
+        messages.success(self.request, f"{total} entregas registradas com sucesso.")
+        return super().form_valid(form)
+
+    def form_invalid(self, form):
+        messages.error(self.request, "Não foi possível salvar. Verifique os campos destacados.")
+        return super().form_invalid(form)
+
+
 class AtualizarEntregaView(LoginRequiredMixin, PermissionRequiredMixin, UpdateView):
     permission_required = "app_entregas.change_entrega"
     raise_exception = False
@@ -155,6 +239,11 @@ class DetalheEntregaView(LoginRequiredMixin, DetailView):
     def get_queryset(self):
         return Entrega.objects.select_related("colaborador", "epi", "solicitacao", "epi__categoria")
 
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        ctx["chave_idempotencia"] = nova_chave()
+        return ctx
+
 
 # ===== SOLICITAÇÕES =====
 class CriarSolicitacaoView(LoginRequiredMixin, PermissionRequiredMixin, CreateView):
@@ -181,6 +270,7 @@ class MinhasSolicitacoesView(LoginRequiredMixin, ListView):
     template_name = "app_entregas/pages/solicitacao_list.html"
     context_object_name = "solicitacoes"
     paginate_by = 10
+    paginator_class = PaginadorAproximado
 
     def get_queryset(self):
         if not hasattr(self.request.user, "colaborador"):
@@ -196,9 +286,14 @@ class SolicitacoesGerenciarView(LoginRequiredMixin, PermissionRequiredMixin, Lis
     template_name = "app_entregas/pages/solicitacao_manage_list.html"
     context_object_name = "solicitacoes"
     paginate_by = 12
+    paginator_class = PaginadorAproximado
 
     def get_queryset(self):
-        qs = Solicitacao.objects.select_related("colaborador", "epi")
+        # Uma consulta só: o saldo do EPI vem da coluna (ver saldo_expr) e a
+        # coluna "disponível" desconta as reservas.
+        qs = Solicitacao.objects.select_related("colaborador", "epi").annotate(
+            epi_saldo=saldo_expr("epi__")
+        )
         status = self.request.GET.get("status") or "PENDENTE"
         if status in {"PENDENTE", "APROVADA"}:
             qs = qs.filter(status=status)
@@ -206,6 +301,8 @@ class SolicitacoesGerenciarView(LoginRequiredMixin, PermissionRequiredMixin, Lis
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
+        for s in ctx["solicitacoes"]:
+            s.epi.saldo = s.epi_saldo  # EPI.disponivel usa o saldo anotado
         ctx["statuses_manage"] = ["PENDENTE", "APROVADA"]
         ctx["status_selected"] = self.request.GET.get("status") or "PENDENTE"
         return ctx
@@ -218,8 +315,11 @@ def aprovar_solicitacao(request, pk):
     if s.status != Solicitacao.Status.PENDENTE:
         messages.warning(request, "Somente solicitações PENDENTES podem ser aprovadas.")
         return redirect("app_entregas:solicitacoes_gerenciar")
-    s.status = Solicitacao.Status.APROVADA
-    s.save(update_fields=["status"])
+    try:
+        altera_status_solicitacao(s, Solicitacao.Status.APROVADA)
+    except ValidationError as ex:
+        messages.error(request, f"Não foi possível aprovar: {ex.message}")
+        return redirect("app_entregas:solicitacoes_gerenciar")
     messages.success(request, "Solicitação aprovada.")
     return redirect("app_entregas:solicitacoes_gerenciar")
 
@@ -231,19 +331,95 @@ def reprovar_solicitacao(request, pk):
     if s.status != Solicitacao.Status.PENDENTE:
         messages.warning(request, "Somente solicitações PENDENTES podem ser reprovadas.")
         return redirect("app_entregas:solicitacoes_gerenciar")
-    s.status = Solicitacao.Status.REPROVADA
-    s.save(update_fields=["status"])
+    altera_status_solicitacao(s, Solicitacao.Status.REPROVADA)
     messages.success(request, "Solicitação reprovada.")
     return redirect("app_entregas:solicitacoes_gerenciar")
 
 
+@require_POST
+@login_required
+def cancelar_solicitacao(request, pk):
+    """
+    Cancela uma solicitação PENDENTE/APROVADA (do próprio colaborador ou por quem
+    gerencia solicitações), liberando a reserva de estoque se houver.
+    """
+    s = get_object_or_404(Solicitacao, pk=pk)
+    gerencia = request.user.has_perm("app_entregas.change_solicitacao")
+    dono = getattr(request.user, "colaborador", None) == s.colaborador
+    if not (gerencia or dono):
+        raise PermissionDenied
+    destino = (
+        "app_entregas:solicitacoes_gerenciar" if gerencia else "app_entregas:minhas_solicitacoes"
+    )
+    if s.status not in {Solicitacao.Status.PENDENTE, Solicitacao.Status.APROVADA}:
+        messages.warning(request, "Somente solicitações PENDENTES/APROVADAS podem ser canceladas.")
+        return redirect(destino)
+    altera_status_solicitacao(s, Solicitacao.Status.CANCELADA)
+    messages.success(request, "Solicitação cancelada.")
+    return redirect(destino)
+
+
+@require_POST
+@permission_required("app_entregas.change_solicitacao", raise_exception=True)
+def solicitacoes_em_lote(request):
+    """
+    Aprova/reprova/atende as solicitações marcadas na tela de gerenciamento.
+    modo=tudo => tudo ou nada; caso contrário, sucesso parcial é permitido.
+    Responde JSON com o resultado por item quando Accept: application/json.
+    """
+    acao = request.POST.get("acao", "")
+    ids = [i for i in request.POST.getlist("ids") if i.isdigit()]
+    tudo_ou_nada = request.POST.get("modo") == "tudo"
+    status_lista = request.POST.get("status") or ""
+    destino = reverse("app_entregas:solicitacoes_gerenciar")
+    if status_lista:
+        destino += "?" + urlencode({"status": status_lista})
+
+    acoes = {
+        "aprovar": lambda: decide_solicitacoes_em_lote(
+            ids, Solicitacao.Status.APROVADA, tudo_ou_nada
+        ),
+        "reprovar": lambda: decide_solicitacoes_em_lote(
+            ids, Solicitacao.Status.REPROVADA, tudo_ou_nada
+        ),
+        "atender": lambda: atende_solicitacoes_em_lote(ids, tudo_ou_nada),
+    }
+    if acao not in acoes:
+        messages.error(request, "Ação em lote inválida.")
+        return redirect(destino)
+    if not ids:
+        messages.warning(request, "Selecione ao menos uma solicitação.")
+        return redirect(destino)
+
+    try:
+        resultados = acoes[acao]()
+    except ValidationError as ex:
+        messages.error(request, f"Não foi possível processar o lote: {ex.message}")
+        return redirect(destino)
+
+    if request.headers.get("Accept", "").startswith("application/json"):
+        return JsonResponse({"acao": acao, "resultados": resultados})
+
+    ok = sum(1 for r in resultados if r["ok"])
+    falhas = [r for r in resultados if not r["ok"]]
+    if ok:
+        messages.success(request, f"{ok} solicitação(ões) processada(s).")
+    for r in falhas[:10]:
+        messages.warning(request, f"Solicitação #{r['id']}: {r['mensagem']}")
+    if len(falhas) > 10:
+        messages.warning(request, f"... e mais {len(falhas) - 10} falha(s).")
+    return redirect(destino)
+
+
 @login_required
 @permission_required("app_entregas.change_solicitacao", raise_exception=True)
+@idempotente
 def atender_solicitacao(request, pk):
     """
     Cria uma Entrega a partir da solicitação.
     Por padrão, cria como EMPRESTADO e define data_prevista_devolucao = agora + 7 dias
-    (atende à validação do formulário).
+    (atende à validação do formulário). Solicitações PENDENTES só são atendidas
+    se o disponível (estoque - reservado) cobrir a quantidade.
     """
     s = get_object_or_404(Solicitacao.objects.select_related("colaborador", "epi"), pk=pk)
 
@@ -254,6 +430,8 @@ def atender_solicitacao(request, pk):
     if request.method == "POST":
         try:
             with transaction.atomic():
+                # Reserva primeiro: PENDENTE não pode consumir reservas de outras solicitações.
+                altera_status_solicitacao(s, Solicitacao.Status.APROVADA)
                 e = Entrega.objects.create(
                     colaborador=s.colaborador,
                     epi=s.epi,
@@ -265,8 +443,7 @@ def atender_solicitacao(request, pk):
                     solicitacao=s,
                 )
                 movimenta_por_entrega(e, antiga=None)
-                s.status = Solicitacao.Status.ATENDIDA
-                s.save(update_fields=["status"])
+                altera_status_solicitacao(s, Solicitacao.Status.ATENDIDA)
         except ValidationError as ex:
             messages.error(request, f"Não foi possível atender: {ex.message}")
             return redirect("app_entregas:solicitacoes_gerenciar")
@@ -278,12 +455,13 @@ def atender_solicitacao(request, pk):
     return render(
         request,
         "app_entregas/pages/solicitacao_atender_confirm.html",
-        {"s": s},
+        {"s": s, "chave_idempotencia": nova_chave()},
     )
 
 
 @login_required
 @permission_required("app_entregas.change_entrega", raise_exception=True)
+@idempotente
 @transaction.atomic
 def marcar_devolvido(request, pk):
     if request.method != "POST":
@@ -300,7 +478,7 @@ def marcar_devolvido(request, pk):
     antiga = Entrega.objects.get(pk=e.pk)
     e.status = Entrega.Status.DEVOLVIDO
     e.data_devolucao = timezone.now()
-    e.save(update_fields=["status", "data_devolucao"])
+    e.save(update_fields=["status", "data_devolucao", "updated_at"])
     movimenta_por_entrega(e, antiga=antiga)
     messages.success(request, "Entrega marcada como DEVOLVIDA e estoque atualizado.")
     return redirect("app_entregas:lista")
@@ -308,6 +486,7 @@ def marcar_devolvido(request, pk):
 
 @login_required
 @permission_required("app_entregas.change_entrega", raise_exception=True)
+@idempotente
 @transaction.atomic
 def marcar_perdido(request, pk):
     if request.method != "POST":
@@ -324,7 +503,7 @@ def marcar_perdido(request, pk):
     antiga = Entrega.objects.get(pk=e.pk)
     e.status = Entrega.Status.PERDIDO
     e.data_devolucao = timezone.now()
-    e.save(update_fields=["status", "data_devolucao"])
+    e.save(update_fields=["status", "data_devolucao", "updated_at"])
     movimenta_por_entrega(e, antiga=antiga)  # efeito líquido continua -q
     messages.success(request, "Entrega marcada como PERDIDA.")
     return redirect("app_entregas:lista")
@@ -1,5 +1,7 @@
 from django.contrib import admin
 
+from app_core.paginacao import PaginadorAproximado
+
 from .models import EPI, CategoriaEPI
 
 
@@ -10,7 +12,9 @@ class CategoriaEPIAdmin(admin.ModelAdmin):
 
 @admin.register(EPI)
 class EPIAdmin(admin.ModelAdmin):
-    list_display = ("codigo", "nome", "estoque", "categoria", "tamanho", "ativo")
+    list_display = ("codigo", "nome", "estoque", "reservado", "categoria", "tamanho", "ativo")
     search_fields = ("codigo", "nome", "categoria__nome")
     list_filter = ("ativo", "categoria", "tamanho")
     list_per_page = 20
+    paginator = PaginadorAproximado
+    show_full_result_count = False
@@ -1,6 +1,9 @@
 from django import forms
+from django.db import transaction
 from django.db.utils import OperationalError, ProgrammingError
 
+from app_entregas.services import ajusta_estoque, saldo_estoque
+
 from .models import EPI, CategoriaEPI
 
 # Categorias mais comuns
@@ -42,6 +45,18 @@ def _ensure_default_categories():
 
 
 class EPIForm(forms.ModelForm):
+    """
+    Cadastro do EPI. O campo `estoque` mostra o saldo real (fatias e livro-razão
+    incluídos) e não é gravado na coluna: a diferença para o saldo exibido
+    (`estoque_exibido`) vira um ajuste no livro-razão (`ajusta_estoque`).
+    """
+
+    estoque = forms.IntegerField(
+        label="Estoque",
+        widget=forms.NumberInput(attrs={"min": 0, "step": "1", "inputmode": "numeric"}),
+    )
+    estoque_exibido = forms.IntegerField(required=False, widget=forms.HiddenInput())
+
     class Meta:
         model = EPI
         fields = [
@@ -50,14 +65,12 @@ class EPIForm(forms.ModelForm):
             "categoria",
             "tamanho",
             "ativo",
-            "estoque",
             "estoque_minimo",
         ]
         widgets = {
             "codigo": forms.TextInput(attrs={"placeholder": "Ex.: LUV-010"}),
             "nome": forms.TextInput(attrs={"placeholder": "Nome do EPI"}),
             "tamanho": forms.Select(),
-            "estoque": forms.NumberInput(attrs={"min": 0, "step": "1", "inputmode": "numeric"}),
             "estoque_minimo": forms.NumberInput(
                 attrs={"min": 0, "step": "1", "inputmode": "numeric"}
             ),
@@ -67,6 +80,10 @@ class EPIForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
+        saldo = saldo_estoque(self.instance.pk) if self.instance.pk else 0
+        self.initial.setdefault("estoque", saldo)
+        self.initial["estoque_exibido"] = saldo
+
         _ensure_default_categories()
         try:
             self.fields["categoria"].queryset = CategoriaEPI.objects.order_by("nome")
@@ -89,3 +106,30 @@ class EPIForm(forms.ModelForm):
         if min_ is not None and min_ < 0:
             self.add_error("estoque_minimo", "Valores não podem ser negativos.")
         return cleaned
+
+    @transaction.atomic
+    def save(self, commit=True):
+        """
+        Grava o cadastro sem tocar `estoque`/`reservado` e lança a diferença
+        entre o estoque informado e o exibido. Levanta ValidationError se o
+        ajuste deixaria o saldo negativo (a transação é desfeita).
+        """
+        epi = super().save(commit=False)
+        if not commit:
+            return epi
+        novo = epi._state.adding
+        if novo:
+            epi.estoque = 0
+            epi.save()
+            exibido = 0
+        else:
+            epi.save(update_fields=[*self._meta.fields, "updated_at"])
+            # Sem o saldo exibido não há base para a diferença: estoque intocado.
+            exibido = self.cleaned_data.get("estoque_exibido")
+            if exibido is None:
+                exibido = self.cleaned_data["estoque"]
+        self.save_m2m()
+        delta = self.cleaned_data["estoque"] - exibido
+        if delta:
+            ajusta_estoque(epi.pk, delta, observacao="Ajuste pelo cadastro do EPI")
+        return epi
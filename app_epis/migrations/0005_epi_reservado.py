@@ -0,0 +1,24 @@
+# Generated by Django 5.2.5 on 2026-10-18 11:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app_epis", "0004_epi_epi_estoque_minimo_nao_negativo"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="epi",
+            name="reservado",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddConstraint(
+            model_name="epi",
+            constraint=models.CheckConstraint(
+                condition=models.Q(("reservado__gte", 0)), name="epi_reservado_nao_negativo"
+            ),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:04
+
+from django.db import migrations, models
+
+from app_core.busca import documento
+
+
+def preenche_busca(apps, schema_editor):
+    EPI = apps.get_model("app_epis", "EPI")
+    epis = list(EPI.objects.select_related("categoria"))
+    for epi in epis:
+        epi.busca = documento(epi.nome, epi.codigo, epi.categoria.nome)
+    EPI.objects.bulk_update(epis, ["busca"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app_epis", "0005_epi_reservado"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="epi",
+            name="busca",
+            field=models.TextField(blank=True, default="", editable=False),
+        ),
+        migrations.RunPython(preenche_busca, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,10 @@
 # app_epis/models.py
 from django.db import IntegrityError, models
 
+from app_core.busca import documento
+
+CAMPOS_BUSCA = {"nome", "codigo", "categoria"}
+
 
 class CategoriaEPI(models.Model):
     nome = models.CharField(max_length=80, unique=True)
@@ -13,6 +17,18 @@ class CategoriaEPI(models.Model):
     def __str__(self):
         return self.nome
 
+    def save(self, *args, **kwargs):
+        nova = self._state.adding
+        super().save(*args, **kwargs)
+        if nova:
+            return
+        # O nome da categoria faz parte do documento de busca dos EPIs.
+        epis = list(self.epis.all())
+        for epi in epis:
+            epi.categoria = self
+            epi.busca = epi.documento_busca()
+        EPI.objects.bulk_update(epis, ["busca"], batch_size=500)
+
 
 class EPI(models.Model):
     TAMANHO_CHOICES = [
@@ -30,17 +46,39 @@ class EPI(models.Model):
     ativo = models.BooleanField(default=True)
     estoque = models.PositiveIntegerField(default=0)
     estoque_minimo = models.PositiveIntegerField(default=0, blank=True)
+    # Unidades reservadas por solicitações APROVADAS (mantido por app_entregas.services)
+    reservado = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Documento normalizado para a busca textual (ver app_core.busca)
+    busca = models.TextField(blank=True, default="", editable=False)
 
     def __str__(self):
         return f"{self.nome} ({self.codigo})" if self.codigo else self.nome
 
+    def documento_busca(self) -> str:
+        categoria = self.categoria.nome if self.categoria_id else ""
+        return documento(self.nome, self.codigo, categoria)
+
+    @property
+    def disponivel(self) -> int:
+        """
+        Estoque livre para novas reservas/entregas (saldo - reservado). Usa o
+        `saldo` anotado (app_entregas.services.anota_saldo) quando houver.
+        """
+        saldo = getattr(self, "saldo", self.estoque)
+        return max((saldo or 0) - (self.reservado or 0), 0)
+
     def save(self, *args, **kwargs):
         if self.estoque is not None and self.estoque < 0:
             raise IntegrityError("Estoque não pode ser negativo.")
         if self.estoque_minimo is not None and self.estoque_minimo < 0:
             raise IntegrityError("Estoque mínimo não pode ser negativo.")
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or CAMPOS_BUSCA.intersection(update_fields):
+            self.busca = self.documento_busca()
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "busca"}
         return super().save(*args, **kwargs)
 
     class Meta:
@@ -53,4 +91,8 @@ class EPI(models.Model):
                 name="epi_estoque_minimo_nao_negativo",
                 condition=models.Q(estoque_minimo__gte=0),
             ),
+            models.CheckConstraint(
+                name="epi_reservado_nao_negativo",
+                condition=models.Q(reservado__gte=0),
+            ),
         ]
@@ -1,24 +1,32 @@
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
 from django.contrib.auth.views import redirect_to_login
-from django.core.exceptions import PermissionDenied
-from django.db.models import BooleanField, Case, F, ProtectedError, Q, Value, When
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.db.models import BooleanField, Case, F, ProtectedError, Value, When
 from django.shortcuts import redirect
 from django.urls import reverse, reverse_lazy
 from django.views.generic import CreateView, DeleteView, ListView, UpdateView
 
+from app_core import busca
+from app_core.fragmentos import FragmentoMixin
+from app_core.paginacao import PaginadorAproximado
+from app_entregas.services import anota_saldo
+
 from .forms import EPIForm
 from .models import EPI, CategoriaEPI
 
 
-class ListaEPIView(ListView):
+class ListaEPIView(FragmentoMixin, ListView):
     model = EPI
     template_name = "app_epis/pages/list.html"
+    fragment_template_name = "app_epis/partials/list_resultados.html"
     context_object_name = "epis"
     paginate_by = 10
+    paginator_class = PaginadorAproximado
 
     def get_queryset(self):
-        qs = EPI.objects.select_related("categoria")
+        # saldo = EPI.estoque (+ fatias dos EPIs fatiados, + pendentes no ledger; ver saldo_expr)
+        qs = anota_saldo(EPI.objects.select_related("categoria"))
 
         q = (self.request.GET.get("q") or "").strip()
         categoria_id = self.request.GET.get("categoria") or ""
@@ -28,19 +36,17 @@ class ListaEPIView(ListView):
 
         # Exibe resultados sempre (removi o "gate" que escondia sem filtros)
         if q:
-            qs = qs.filter(
-                Q(nome__icontains=q) | Q(codigo__icontains=q) | Q(categoria__nome__icontains=q)
-            )
+            qs = busca.filtra(qs, q)
         if categoria_id:
             qs = qs.filter(categoria_id=categoria_id)
         if only_active:
             qs = qs.filter(ativo=True)
         if below_min:
-            qs = qs.filter(estoque__lte=F("estoque_minimo"))
+            qs = qs.filter(saldo__lte=F("estoque_minimo"))
 
         qs = qs.annotate(
             abaixo_min=Case(
-                When(estoque__lte=F("estoque_minimo"), then=Value(True)),
+                When(saldo__lte=F("estoque_minimo"), then=Value(True)),
                 default=Value(False),
                 output_field=BooleanField(),
             )
@@ -49,8 +55,8 @@ class ListaEPIView(ListView):
         ordering = {
             "nome": "nome",
             "-nome": "-nome",
-            "estoque": "estoque",
-            "-estoque": "-estoque",
+            "estoque": "saldo",
+            "-estoque": "-saldo",
             "categoria": "categoria__nome",
             "codigo": "codigo",
         }.get(order, "nome")
@@ -59,6 +65,11 @@ class ListaEPIView(ListView):
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
+        params = self.request.GET.copy()
+        params.pop("page", None)
+        ctx["base_query"] = params.urlencode()
+        if self.fragmento:
+            return ctx
         ctx.update(
             {
                 "q": self.request.GET.get("q", ""),
@@ -77,9 +88,6 @@ class ListaEPIView(ListView):
                 ],
             }
         )
-        params = self.request.GET.copy()
-        params.pop("page", None)
-        ctx["base_query"] = params.urlencode()
         return ctx
 
 
@@ -105,7 +113,11 @@ class CriarEPIView(PermissionAwareMixin, LoginRequiredMixin, PermissionRequiredM
     success_url = reverse_lazy("app_epis:criar")
 
     def form_valid(self, form):
-        resp = super().form_valid(form)
+        try:
+            resp = super().form_valid(form)
+        except ValidationError as e:
+            form.add_error("estoque", e)
+            return self.form_invalid(form)
         messages.success(self.request, "EPI criado com sucesso.")
         return resp
 
@@ -132,6 +144,14 @@ class AtualizarEPIView(
         messages.success(self.request, "EPI atualizado com sucesso.")
         return reverse("app_epis:editar", kwargs={"pk": self.object.pk})
 
+    def form_valid(self, form):
+        # Saída pelo cadastro que deixaria o saldo negativo (movimento concorrente).
+        try:
+            return super().form_valid(form)
+        except ValidationError as e:
+            form.add_error("estoque", e)
+            return self.form_invalid(form)
+
     def form_invalid(self, form):
         messages.error(self.request, "Não foi possível atualizar. Verifique os campos destacados.")
         return super().form_invalid(form)
@@ -0,0 +1,117 @@
+# app_relatorios/agregacao.py
+"""
+Totais do relatório de Entregas numa passagem só.
+
+Uma única consulta agrupa as linhas filtradas por (EPI, colaborador, status);
+os cartões, o quadro por EPI e o quadro por colaborador saem de uma
+passagem em Python sobre esse resultado, que tem no máximo
+EPIs × colaboradores × status linhas — independente do nº de Entregas.
+A origem pode ser o resumo diário (padrão do relatório) ou as próprias
+Entregas; `agrega_tres_consultas` é a implementação anterior, mantida
+como referência para o `bench_relatorio`.
+"""
+
+from django.db.models import Case, Count, F, IntegerField, Q, Sum, Value, When
+
+from app_entregas.models import Entrega
+
+# colunas agrupadas, na ordem em que `agrega` as desempacota
+CAMPOS = ("epi_id", "epi__nome", "epi__codigo", "colaborador_id", "colaborador__nome", "status")
+DEVOLVIDO = Entrega.Status.DEVOLVIDO
+
+
+def agrupa_entregas(qs):
+    """(EPI, colaborador, status, registros, quantidade) de um queryset de Entrega."""
+    return (
+        qs.order_by()
+        .values_list(*CAMPOS)
+        .annotate(registros=Count("id"), qtd=Sum("quantidade"))
+        .order_by()
+    )
+
+
+def agrupa_resumo(qs):
+    """O mesmo agrupamento sobre ResumoDiarioEntrega (somando os dias)."""
+    return (
+        qs.order_by()
+        .values_list(*CAMPOS)
+        .annotate(registros=Sum("registros"), qtd=Sum("quantidade"))
+        .order_by()
+    )
+
+
+def agrega(linhas) -> dict:
+    """
+    {"agg", "por_epi", "por_colab"} a partir das linhas agrupadas, com as
+    mesmas chaves que o template do relatório usa. Tudo que não é DEVOLVIDO
+    conta como "fora do estoque" (entregue).
+    """
+    agg = {"registros": 0, "quantidade_total": 0, "total_entregue": 0, "total_devolvido": 0}
+    por_epi, por_colab = {}, {}
+    for epi_id, epi_nome, epi_codigo, colab_id, colab_nome, status, registros, qtd in linhas:
+        coluna = "devolvidos" if status == DEVOLVIDO else "entregues"
+        agg["registros"] += registros
+        agg["quantidade_total"] += qtd
+        agg["total_devolvido" if status == DEVOLVIDO else "total_entregue"] += qtd
+
+        epi = por_epi.get(epi_id)
+        if epi is None:
+            epi = por_epi[epi_id] = {
+                "epi__id": epi_id,
+                "epi__nome": epi_nome,
+                "epi__codigo": epi_codigo,
+                "entregues": 0,
+                "devolvidos": 0,
+            }
+        epi[coluna] += qtd
+
+        colab = por_colab.get(colab_id)
+        if colab is None:
+            colab = por_colab[colab_id] = {
+                "colaborador__id": colab_id,
+                "colaborador__nome": colab_nome,
+                "entregues": 0,
+                "devolvidos": 0,
+            }
+        colab[coluna] += qtd
+
+    return {
+        "agg": agg,
+        "por_epi": sorted(por_epi.values(), key=lambda r: (r["epi__nome"], r["epi__codigo"])),
+        "por_colab": sorted(
+            por_colab.values(), key=lambda r: (r["colaborador__nome"], r["colaborador__id"])
+        ),
+    }
+
+
+def _soma_se(condicao):
+    return Sum(
+        Case(
+            When(condicao, then=F("quantidade")),
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+    )
+
+
+def agrega_tres_consultas(qs) -> dict:
+    """Implementação anterior: três varreduras do queryset filtrado de Entrega."""
+    entregue, devolvido = ~Q(status=DEVOLVIDO), Q(status=DEVOLVIDO)
+    agg = qs.aggregate(
+        registros=Count("id"),
+        quantidade_total=Sum("quantidade"),
+        total_entregue=_soma_se(entregue),
+        total_devolvido=_soma_se(devolvido),
+    )
+    somas = {"entregues": _soma_se(entregue), "devolvidos": _soma_se(devolvido)}
+    por_epi = (
+        qs.values("epi__id", "epi__nome", "epi__codigo")
+        .annotate(**somas)
+        .order_by("epi__nome", "epi__codigo")
+    )
+    por_colab = (
+        qs.values("colaborador__id", "colaborador__nome")
+        .annotate(**somas)
+        .order_by("colaborador__nome", "colaborador__id")
+    )
+    return {"agg": agg, "por_epi": list(por_epi), "por_colab": list(por_colab)}
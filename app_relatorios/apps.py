@@ -4,3 +4,17 @@ from django.apps import AppConfig
 class AppRelatoriosConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "app_relatorios"
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save, pre_save
+
+        from app_entregas.models import Entrega
+        from app_entregas.sinais import entregas_criadas_em_lote
+
+        from . import resumo
+
+        # Mantém ResumoDiarioEntrega em dia com as Entregas.
+        pre_save.connect(resumo.guarda_anterior, sender=Entrega, dispatch_uid="resumo_pre_save")
+        post_save.connect(resumo.apos_salvar, sender=Entrega, dispatch_uid="resumo_post_save")
+        post_delete.connect(resumo.apos_excluir, sender=Entrega, dispatch_uid="resumo_delete")
+        entregas_criadas_em_lote.connect(resumo.apos_lote, dispatch_uid="resumo_lote")
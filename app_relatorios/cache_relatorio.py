@@ -0,0 +1,84 @@
+# app_relatorios/cache_relatorio.py
+"""
+Cache dos totais do relatório de Entregas.
+
+A chave é o `cleaned_data` normalizado do RelatorioEntregasForm (instâncias
+viram pk, datas viram ISO) mais a versão global das Entregas
+(app_entregas.versao): qualquer escrita de Entrega muda a versão e as
+entradas antigas simplesmente deixam de ser lidas, até expirarem pelo TTL.
+Renomear um EPI ou colaborador não muda a versão; o TTL limita esse atraso.
+
+Acertos e falhas ficam em dois contadores no próprio cache
+(`python manage.py cache_relatorio` mostra a taxa; `--zerar` reinicia).
+"""
+
+import hashlib
+import json
+from datetime import date
+
+from django.core.cache import cache
+from django.db.models import Model
+
+from app_entregas import versao
+
+CACHE_TTL = 600  # segundos
+_ACERTOS = "relatorio:entregas:acertos"
+_FALHAS = "relatorio:entregas:falhas"
+
+
+def filtros_normalizados(form) -> dict:
+    """Filtros efetivos do formulário; inválido ou vazio equivale a sem filtro."""
+    if not form.is_valid():
+        return {}
+    normalizados = {}
+    for campo, valor in form.cleaned_data.items():
+        if isinstance(valor, Model):
+            valor = valor.pk
+        elif isinstance(valor, date):
+            valor = valor.isoformat()
+        if valor not in (None, ""):
+            normalizados[campo] = valor
+    return normalizados
+
+
+def chave(filtros: dict) -> str:
+    digest = hashlib.md5(
+        json.dumps(filtros, sort_keys=True).encode(), usedforsecurity=False
+    ).hexdigest()
+    return f"relatorio:entregas:{versao.atual()}:{digest}"
+
+
+def _conta(contador: str) -> None:
+    if not cache.add(contador, 1, None):
+        try:
+            cache.incr(contador)
+        except ValueError:  # expirou entre o add e o incr
+            cache.set(contador, 1, None)
+
+
+def obtem(form, calcula):
+    """calcula() com cache pelos filtros normalizados de `form` e pela versão das Entregas."""
+    k = chave(filtros_normalizados(form))
+    resultado = cache.get(k)
+    if resultado is not None:
+        _conta(_ACERTOS)
+        return resultado
+    _conta(_FALHAS)
+    resultado = calcula()
+    cache.set(k, resultado, CACHE_TTL)
+    return resultado
+
+
+def estatisticas() -> dict:
+    valores = cache.get_many([_ACERTOS, _FALHAS])
+    acertos, falhas = valores.get(_ACERTOS, 0), valores.get(_FALHAS, 0)
+    total = acertos + falhas
+    return {
+        "acertos": acertos,
+        "falhas": falhas,
+        "taxa_acerto": acertos / total if total else 0.0,
+    }
+
+
+def zera_estatisticas() -> None:
+    cache.delete_many([_ACERTOS, _FALHAS])
@@ -0,0 +1,172 @@
+# app_relatorios/exportacao.py
+"""
+Exportação das Entregas filtradas do relatório, em memória constante.
+
+Cada formato (csv, xlsx, ndjson) é um gerador registrado com @exportador e
+escolhido por `?formato=` na URL de exportação.
+
+As linhas vêm em lotes por cursor de chave (data_entrega, id) — cada lote é
+uma consulta indexada com LIMIT, sem cursor aberto no servidor e sem o driver
+do MySQL carregar o resultado inteiro — e só com as colunas exportadas
+(`values`), sem instanciar Entrega, EPI e Colaborador. O CSV sai em blocos de
+texto conforme os lotes chegam, e o primeiro bloco (cabeçalho) sai antes da
+primeira consulta.
+"""
+
+import csv
+import io
+import json
+from typing import NamedTuple
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from app_core.paginacao import CursorPaginator
+from app_entregas.models import Entrega
+
+from . import xlsx
+
+LOTE = 2000  # linhas por consulta e por bloco de saída
+FORMATO_DATA = "%d/%m/%Y %H:%M"
+
+CABECALHO = (
+    "Data Entrega",
+    "Data Devolução Prevista",
+    "Data Devolução",
+    "Colaborador",
+    "EPI",
+    "Quantidade",
+    "Status",
+    "Observação",
+)
+CAMPOS = (
+    "id",
+    "data_entrega",
+    "data_prevista_devolucao",
+    "data_devolucao",
+    "colaborador__nome",
+    "epi__nome",
+    "epi__codigo",
+    "quantidade",
+    "status",
+    "observacao",
+)
+ROTULOS_STATUS = dict(Entrega.Status.choices)
+
+
+class Exportador(NamedTuple):
+    gerador: object  # f(qs, lote, progresso) -> blocos de str ou bytes
+    content_type: str
+    extensao: str
+
+
+_exportadores: dict[str, Exportador] = {}
+
+
+def exportador(formato: str, content_type: str, extensao: str):
+    """
+    Registra um gerador `f(qs, lote=LOTE, progresso=None)` como o exportador
+    de `formato`; `progresso(n)` é chamado após cada lote de n linhas.
+    """
+
+    def _registra(func):
+        _exportadores[formato] = Exportador(func, content_type, extensao)
+        return func
+
+    return _registra
+
+
+def exportador_de(formato: str) -> Exportador | None:
+    return _exportadores.get(formato)
+
+
+def formatos() -> list[str]:
+    return sorted(_exportadores)
+
+
+def _data(valor) -> str:
+    return valor.strftime(FORMATO_DATA) if valor else "-"
+
+
+def lotes(qs, lote: int = LOTE, progresso=None):
+    """Listas de dicts (CAMPOS) de `qs`, em ordem (data_entrega, id) decrescente."""
+    paginator = CursorPaginator(qs.values(*CAMPOS), lote, ("data_entrega", "id"))
+    cursor = None
+    while True:
+        pagina = paginator.get_page(cursor)
+        if pagina.object_list:
+            yield pagina.object_list
+            if progresso:
+                progresso(len(pagina.object_list))
+        if not pagina.has_next():
+            return
+        cursor = pagina.next_cursor
+
+
+def linha(r: dict) -> tuple:
+    """Uma Entrega (dict de CAMPOS) formatada como na planilha."""
+    return (
+        _data(r["data_entrega"]),
+        _data(r["data_prevista_devolucao"]),
+        _data(r["data_devolucao"]),
+        r["colaborador__nome"],
+        f"{r['epi__nome']} ({r['epi__codigo']})",
+        r["quantidade"],
+        ROTULOS_STATUS.get(r["status"], r["status"]),
+        (r["observacao"] or "").replace("\n", " ").strip(),
+    )
+
+
+@exportador("csv", "text/csv; charset=utf-8", "csv")
+def csv_em_blocos(qs, lote: int = LOTE, progresso=None):
+    """Texto CSV (;) em blocos: o cabeçalho e depois um bloco por lote."""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, delimiter=";")
+
+    def esvazia() -> str:
+        texto = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return texto
+
+    escritor.writerow(CABECALHO)
+    yield esvazia()
+    for registros in lotes(qs, lote, progresso):
+        escritor.writerows(linha(r) for r in registros)
+        yield esvazia()
+
+
+@exportador("xlsx", xlsx.CONTENT_TYPE, "xlsx")
+def xlsx_em_blocos(qs, lote: int = LOTE, progresso=None):
+    """Planilha Excel com as mesmas colunas do CSV (quantidade como número)."""
+    return xlsx.planilha(
+        CABECALHO,
+        ([linha(r) for r in registros] for registros in lotes(qs, lote, progresso)),
+        "Entregas",
+    )
+
+
+@exportador("ndjson", "application/x-ndjson", "ndjson")
+def ndjson_em_blocos(qs, lote: int = LOTE, progresso=None):
+    """Um objeto JSON por linha, com datas ISO 8601 e o código e o rótulo do status."""
+    for registros in lotes(qs, lote, progresso):
+        yield "".join(
+            json.dumps(
+                {
+                    "id": r["id"],
+                    "data_entrega": r["data_entrega"],
+                    "data_prevista_devolucao": r["data_prevista_devolucao"],
+                    "data_devolucao": r["data_devolucao"],
+                    "colaborador": r["colaborador__nome"],
+                    "epi_nome": r["epi__nome"],
+                    "epi_codigo": r["epi__codigo"],
+                    "quantidade": r["quantidade"],
+                    "status": r["status"],
+                    "status_rotulo": ROTULOS_STATUS.get(r["status"], r["status"]),
+                    "observacao": r["observacao"],
+                },
+                cls=DjangoJSONEncoder,
+                ensure_ascii=False,
+            )
+            + "\n"
+            for r in registros
+        )
@@ -0,0 +1,40 @@
+# app_relatorios/filtros.py
+"""Filtros do RelatorioEntregasForm aplicados às Entregas e ao resumo diário."""
+
+from app_core.datas import filtro_periodo
+from app_entregas.models import Entrega
+
+from .models import ResumoDiarioEntrega
+
+
+def filtra_entregas(form):
+    """Entregas do relatório com os filtros de `form` (ignorados se inválido)."""
+    qs = Entrega.objects.select_related("epi", "colaborador")
+    if form.is_valid():
+        cd = form.cleaned_data
+        qs = qs.filter(filtro_periodo("data_entrega", cd.get("data_de"), cd.get("data_ate")))
+        if cd.get("colaborador"):
+            qs = qs.filter(colaborador=cd["colaborador"])
+        if cd.get("epi"):
+            qs = qs.filter(epi=cd["epi"])
+        if cd.get("status"):
+            qs = qs.filter(status=cd["status"])
+    return qs.order_by("-data_entrega", "-id")
+
+
+def filtra_resumo(form):
+    """Os filtros de `filtra_entregas` aplicados ao resumo diário (período por dia)."""
+    qs = ResumoDiarioEntrega.objects.all()
+    if form.is_valid():
+        cd = form.cleaned_data
+        if cd.get("data_de"):
+            qs = qs.filter(dia__gte=cd["data_de"])
+        if cd.get("data_ate"):
+            qs = qs.filter(dia__lte=cd["data_ate"])
+        if cd.get("colaborador"):
+            qs = qs.filter(colaborador=cd["colaborador"])
+        if cd.get("epi"):
+            qs = qs.filter(epi=cd["epi"])
+        if cd.get("status"):
+            qs = qs.filter(status=cd["status"])
+    return qs
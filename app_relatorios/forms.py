@@ -1,6 +1,7 @@
 from django import forms
 
 from app_colaboradores.models import Colaborador
+from app_core.widgets import AutocompleteSelect
 from app_entregas.models import Entrega
 from app_epis.models import EPI
 
@@ -18,13 +19,13 @@ class RelatorioEntregasForm(forms.Form):
         queryset=Colaborador.objects.order_by("nome"),
         required=False,
         empty_label="Todos os colaboradores",
-        widget=forms.Select(attrs={"class": "form-select"}),
+        widget=AutocompleteSelect("colaboradores"),
     )
     epi = forms.ModelChoiceField(
         queryset=EPI.objects.order_by("nome"),
         required=False,
         empty_label="Todos os EPIs",
-        widget=forms.Select(attrs={"class": "form-select"}),
+        widget=AutocompleteSelect("epis"),
     )
     status = forms.ChoiceField(
         required=False,
@@ -0,0 +1,143 @@
+# app_relatorios/management/commands/bench_relatorio.py
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from app_colaboradores.models import Colaborador
+from app_core.datas import data_local
+from app_entregas.models import Entrega
+from app_epis.models import EPI, CategoriaEPI
+from app_relatorios import agregacao, resumo
+from app_relatorios.filtros import filtra_resumo
+from app_relatorios.views import _filtrar_qs
+
+LOTE = 10_000
+
+
+def _semear(n: int, epis: int, colaboradores: int, seed: int) -> None:
+    """n Entregas espalhadas por 2 anos (bulk_create em lotes, sem estoque)."""
+    rnd = random.Random(seed)
+    cat = CategoriaEPI.objects.create(nome="Bench relatório")
+    epi_ids = [
+        e.pk
+        for e in EPI.objects.bulk_create(
+            EPI(codigo=f"BREL-{i:04}", nome=f"EPI bench {i:04}", categoria=cat) for i in range(epis)
+        )
+    ]
+    colab_ids = [
+        c.pk
+        for c in Colaborador.objects.bulk_create(
+            Colaborador(nome=f"Bench {i:05}", email=f"brel{i}@exemplo.com", matricula=f"BREL{i:05}")
+            for i in range(colaboradores)
+        )
+    ]
+    status = [s for s, _ in Entrega.Status.choices]
+    agora = timezone.now()
+    for inicio in range(0, n, LOTE):
+        novas = [
+            Entrega(
+                colaborador_id=rnd.choice(colab_ids),
+                epi_id=rnd.choice(epi_ids),
+                quantidade=rnd.randint(1, 5),
+                status=rnd.choice(status),
+                data_entrega=agora - timedelta(minutes=rnd.randint(0, 2 * 365 * 24 * 60)),
+            )
+            for _ in range(min(LOTE, n - inicio))
+        ]
+        for entrega in novas:
+            entrega.data_entrega_local = data_local(entrega.data_entrega)
+        Entrega.objects.bulk_create(novas, batch_size=1000)
+
+
+def _normaliza(resultado: dict) -> dict:
+    return {
+        "agg": {k: v or 0 for k, v in resultado["agg"].items()},
+        "por_epi": list(resultado["por_epi"]),
+        "por_colab": list(resultado["por_colab"]),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark dos totais do relatório de Entregas: três consultas (implementação "
+        "anterior), uma consulta agrupada nas Entregas + passagem única, e a mesma "
+        "passagem sobre o resumo diário. Mostra nº de consultas e tempo de parede por "
+        "tamanho da massa. A massa é descartada ao final de cada tamanho."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--tamanhos",
+            default="10000,100000,1000000",
+            help="Quantidades de Entregas, separadas por vírgula",
+        )
+        parser.add_argument("--epis", type=int, default=200)
+        parser.add_argument("--colaboradores", type=int, default=2000)
+        parser.add_argument(
+            "--repeticoes", type=int, default=3, help="Execuções por estratégia (vale a melhor)"
+        )
+        parser.add_argument(
+            "--dias", type=int, default=365, help="Período do filtro data_de (últimos N dias)"
+        )
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        try:
+            tamanhos = [int(t) for t in options["tamanhos"].split(",") if t.strip()]
+        except ValueError:
+            raise CommandError("--tamanhos deve ser uma lista de inteiros: 10000,100000")
+
+        data_de = (timezone.localdate() - timedelta(days=options["dias"])).isoformat()
+        request = RequestFactory().get("/relatorios/", {"data_de": data_de})
+        estrategias = {
+            "tres_consultas": lambda: agregacao.agrega_tres_consultas(_filtrar_qs(request)[1]),
+            "passagem_unica": lambda: agregacao.agrega(
+                agregacao.agrupa_entregas(_filtrar_qs(request)[1])
+            ),
+            "resumo_diario": lambda: agregacao.agrega(
+                agregacao.agrupa_resumo(filtra_resumo(_filtrar_qs(request)[0]))
+            ),
+        }
+
+        self.stdout.write(f"{connection.vendor}: filtro data_de={data_de}")
+        self.stdout.write(
+            f"{'entregas':>9} {'estratégia':<16} {'consultas':>9} {'ms':>10} {'ok':>4}"
+        )
+        for n in tamanhos:
+            with transaction.atomic():
+                inicio = time.perf_counter()
+                _semear(n, options["epis"], options["colaboradores"], options["seed"])
+                resumo.reconstroi()
+                semeadura = time.perf_counter() - inicio
+
+                referencia = None
+                for nome, executa in estrategias.items():
+                    consultas, melhor, resultado = self._mede(executa, options["repeticoes"])
+                    resultado = _normaliza(resultado)
+                    referencia = referencia or resultado
+                    ok = (
+                        self.style.SUCCESS("ok")
+                        if resultado == referencia
+                        else self.style.ERROR("!=")
+                    )
+                    self.stdout.write(
+                        f"{n:>9} {nome:<16} {consultas:>9} {melhor * 1000:>10.1f} {ok:>4}"
+                    )
+                self.stdout.write(f"{'':>9} (massa + resumo em {semeadura:.1f} s)")
+                transaction.set_rollback(True)
+
+    def _mede(self, executa, repeticoes: int):
+        melhor, consultas, resultado = float("inf"), 0, None
+        for _ in range(max(repeticoes, 1)):
+            with CaptureQueriesContext(connection) as ctx:
+                inicio = time.perf_counter()
+                resultado = executa()
+                duracao = time.perf_counter() - inicio
+            melhor, consultas = min(melhor, duracao), len(ctx.captured_queries)
+        return consultas, melhor, resultado
@@ -0,0 +1,23 @@
+# app_relatorios/management/commands/cache_relatorio.py
+from django.core.management.base import BaseCommand
+
+from app_entregas import versao
+from app_relatorios import cache_relatorio
+
+
+class Command(BaseCommand):
+    help = "Mostra acertos/falhas do cache de totais do relatório de Entregas."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--zerar", action="store_true", help="Zera os contadores")
+
+    def handle(self, *args, **options):
+        est = cache_relatorio.estatisticas()
+        self.stdout.write(
+            f"Versão das entregas: {versao.atual()}\n"
+            f"Acertos: {est['acertos']}  Falhas: {est['falhas']}  "
+            f"Taxa de acerto: {est['taxa_acerto']:.1%}"
+        )
+        if options["zerar"]:
+            cache_relatorio.zera_estatisticas()
+            self.stdout.write(self.style.SUCCESS("Contadores zerados."))
@@ -0,0 +1,51 @@
+# app_relatorios/management/commands/processar_exportacoes.py
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from app_relatorios.tarefas import processar_pendentes, purgar
+
+# Com --intervalo, a limpeza das exportações antigas roda no máximo uma vez por este período.
+PURGA_INTERVALO = 3600  # segundos
+
+
+class Command(BaseCommand):
+    help = (
+        "Gera os arquivos das exportações do relatório pedidas em segundo plano "
+        "(MEDIA_ROOT/exportacoes/). Com --intervalo, roda continuamente; "
+        "vários workers podem rodar em paralelo. Exportações terminadas há mais "
+        "de --reter-dias são apagadas, com os arquivos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--intervalo",
+            type=float,
+            default=0,
+            help="Segundos de espera quando não há tarefas (0 = esvazia a fila e sai)",
+        )
+        parser.add_argument(
+            "--reter-dias",
+            type=int,
+            default=7,
+            help="Apaga exportações terminadas há mais de N dias (0 = não apaga)",
+        )
+
+    def handle(self, *args, **options):
+        total = apagadas = 0
+        ultima_purga = None
+        while True:
+            total += processar_pendentes()
+            agora = time.monotonic()
+            if options["reter_dias"] and (
+                ultima_purga is None or agora - ultima_purga >= PURGA_INTERVALO
+            ):
+                apagadas += purgar(timedelta(days=options["reter_dias"]))
+                ultima_purga = agora
+            if not options["intervalo"]:
+                break
+            time.sleep(options["intervalo"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Exportações processadas: {total}; apagadas: {apagadas}")
+        )
@@ -0,0 +1,15 @@
+# app_relatorios/management/commands/reconstruir_resumo.py
+from django.core.management.base import BaseCommand
+
+from app_relatorios import resumo
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstrói o resumo diário de entregas (dia × EPI × colaborador × status) "
+        "a partir da tabela de Entregas."
+    )
+
+    def handle(self, *args, **options):
+        linhas = resumo.reconstroi()
+        self.stdout.write(self.style.SUCCESS(f"Resumo reconstruído: {linhas} linhas"))
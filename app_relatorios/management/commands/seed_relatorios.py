@@ -6,6 +6,7 @@ from django.core.management.base import BaseCommand
 from django.utils import timezone
 
 from app_colaboradores.models import Colaborador
+from app_core.datas import data_local
 from app_entregas.models import Entrega
 from app_epis.models import EPI
 
@@ -39,7 +40,7 @@ class Command(BaseCommand):
                 observ = f"Seed relatorio {data_entrega.date()} - {col.matricula} - {epi.codigo} - {status}"
 
                 if Entrega.objects.filter(
-                    data_entrega__date=data_entrega.date(),
+                    data_entrega_local=data_local(data_entrega),
                     colaborador=col,
                     epi=epi,
                     observacao=observ,
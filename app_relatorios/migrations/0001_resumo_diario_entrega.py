@@ -0,0 +1,100 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def preenche_resumo(apps, schema_editor):
+    # Mesmo agrupamento de app_relatorios.resumo.reconstroi(), com os modelos históricos.
+    Entrega = apps.get_model("app_entregas", "Entrega")
+    ResumoDiarioEntrega = apps.get_model("app_relatorios", "ResumoDiarioEntrega")
+    linhas = (
+        Entrega.objects.annotate(dia=TruncDate("data_entrega"))
+        .values("dia", "epi_id", "colaborador_id", "status")
+        .annotate(registros=Count("id"), qtd=Sum("quantidade"))
+        .order_by()
+    )
+    ResumoDiarioEntrega.objects.bulk_create(
+        (
+            ResumoDiarioEntrega(
+                dia=linha["dia"],
+                epi_id=linha["epi_id"],
+                colaborador_id=linha["colaborador_id"],
+                status=linha["status"],
+                registros=linha["registros"],
+                quantidade=linha["qtd"],
+            )
+            for linha in linhas.iterator(chunk_size=1000)
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("app_colaboradores", "0007_busca"),
+        ("app_entregas", "0016_sincronizacao_api"),
+        ("app_epis", "0006_busca"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ResumoDiarioEntrega",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("dia", models.DateField()),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("EMPRESTADO", "Emprestado"),
+                            ("EM_USO", "Em uso"),
+                            ("FORNECIDO", "Fornecido"),
+                            ("DEVOLVIDO", "Devolvido"),
+                            ("DANIFICADO", "Danificado"),
+                            ("PERDIDO", "Perdido"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("registros", models.IntegerField(default=0)),
+                ("quantidade", models.IntegerField(default=0)),
+                (
+                    "colaborador",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="app_colaboradores.colaborador",
+                    ),
+                ),
+                (
+                    "epi",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="app_epis.epi",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Resumo diário de entregas",
+                "verbose_name_plural": "Resumos diários de entregas",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("dia", "epi", "colaborador", "status"), name="resumo_diario_unico"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(preenche_resumo, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app_relatorios", "0001_resumo_diario_entrega"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TarefaExportacao",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("formato", models.CharField(max_length=10)),
+                ("filtros", models.JSONField(blank=True, default=dict)),
+                ("chave", models.CharField(db_index=True, max_length=32)),
+                (
+                    "chave_ativa",
+                    models.CharField(blank=True, max_length=32, null=True, unique=True),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("PENDENTE", "Pendente"),
+                            ("PROCESSANDO", "Processando"),
+                            ("CONCLUIDA", "Concluída"),
+                            ("ERRO", "Erro"),
+                        ],
+                        default="PENDENTE",
+                        max_length=20,
+                    ),
+                ),
+                ("linhas_processadas", models.PositiveIntegerField(default=0)),
+                ("linhas_estimadas", models.PositiveIntegerField(blank=True, null=True)),
+                ("arquivo", models.FileField(blank=True, upload_to="exportacoes/")),
+                ("erro", models.TextField(blank=True)),
+                ("criado_em", models.DateTimeField(auto_now_add=True)),
+                ("iniciado_em", models.DateTimeField(blank=True, null=True)),
+                ("concluido_em", models.DateTimeField(blank=True, null=True)),
+                (
+                    "solicitante",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Tarefa de exportação",
+                "verbose_name_plural": "Tarefas de exportação",
+                "ordering": ["-id"],
+                "indexes": [models.Index(fields=["status", "id"], name="exportacao_status_idx")],
+            },
+        ),
+    ]
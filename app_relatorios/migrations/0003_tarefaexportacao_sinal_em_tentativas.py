@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app_relatorios", "0002_tarefa_exportacao"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="tarefaexportacao",
+            name="sinal_em",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="tarefaexportacao",
+            name="tentativas",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,90 @@
+from django.conf import settings
+from django.db import models
+
+from app_entregas.models import Entrega
+
+
+class ResumoDiarioEntrega(models.Model):
+    """
+    Rollup das Entregas: uma linha por dia × EPI × colaborador × status.
+    Mantido incrementalmente por app_relatorios.resumo (sinais de Entrega) e
+    reconstruível com `python manage.py reconstruir_resumo`.
+    """
+
+    dia = models.DateField()
+    epi = models.ForeignKey("app_epis.EPI", on_delete=models.CASCADE, related_name="+")
+    colaborador = models.ForeignKey(
+        "app_colaboradores.Colaborador", on_delete=models.CASCADE, related_name="+"
+    )
+    status = models.CharField(max_length=20, choices=Entrega.Status.choices)
+    registros = models.IntegerField(default=0)
+    quantidade = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Resumo diário de entregas"
+        verbose_name_plural = "Resumos diários de entregas"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["dia", "epi", "colaborador", "status"], name="resumo_diario_unico"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.dia} {self.epi_id}/{self.colaborador_id} {self.status}: {self.registros}"
+
+
+class TarefaExportacao(models.Model):
+    """
+    Exportação do relatório feita fora da requisição pelo comando
+    `processar_exportacoes`. Tarefas iguais (mesmo formato e filtros) são
+    deduplicadas enquanto uma delas está pendente ou em andamento.
+    """
+
+    class Status(models.TextChoices):
+        PENDENTE = "PENDENTE", "Pendente"
+        PROCESSANDO = "PROCESSANDO", "Processando"
+        CONCLUIDA = "CONCLUIDA", "Concluída"
+        ERRO = "ERRO", "Erro"
+
+    formato = models.CharField(max_length=10)
+    filtros = models.JSONField(default=dict, blank=True)
+    chave = models.CharField(max_length=32, db_index=True)
+    # = chave enquanto PENDENTE/PROCESSANDO, NULL depois: o índice único
+    # impede duas tarefas ativas iguais (NULLs não colidem).
+    chave_ativa = models.CharField(max_length=32, null=True, blank=True, unique=True)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDENTE)
+    solicitante = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    linhas_processadas = models.PositiveIntegerField(default=0)
+    linhas_estimadas = models.PositiveIntegerField(null=True, blank=True)
+    arquivo = models.FileField(upload_to="exportacoes/", blank=True)
+    erro = models.TextField(blank=True)
+    criado_em = models.DateTimeField(auto_now_add=True)
+    iniciado_em = models.DateTimeField(null=True, blank=True)
+    # Heartbeat do worker (a cada lote); sem sinal por muito tempo, a tarefa é recuperada.
+    sinal_em = models.DateTimeField(null=True, blank=True)
+    tentativas = models.PositiveSmallIntegerField(default=0)
+    concluido_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-id"]
+        verbose_name = "Tarefa de exportação"
+        verbose_name_plural = "Tarefas de exportação"
+        indexes = [models.Index(fields=["status", "id"], name="exportacao_status_idx")]
+
+    def __str__(self):
+        return f"Exportação {self.formato} #{self.pk} ({self.get_status_display()})"
+
+    @property
+    def ativa(self) -> bool:
+        return self.status in (self.Status.PENDENTE, self.Status.PROCESSANDO)
+
+    @property
+    def progresso(self) -> int:
+        """Percentual (0-100); fica em 99 até concluir se a estimativa ficou curta."""
+        if self.status == self.Status.CONCLUIDA:
+            return 100
+        if not self.linhas_estimadas:
+            return 0
+        return min(99, self.linhas_processadas * 100 // self.linhas_estimadas)
@@ -0,0 +1,180 @@
+# app_relatorios/resumo.py
+"""
+Manutenção do rollup ResumoDiarioEntrega.
+
+Cada criação, alteração ou exclusão de Entrega vira deltas (registros,
+quantidade) nas chaves (dia, epi, colaborador, status) afetadas: a alteração
+tira da chave antiga e soma na nova. O dia é `Entrega.data_entrega_local`,
+a data local de `data_entrega` gravada na própria Entrega.
+"""
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+
+from app_entregas.models import Entrega
+
+from .models import ResumoDiarioEntrega
+
+LOTE = 1000
+
+
+def _soma(deltas, chave, registros, quantidade):
+    atual = deltas.setdefault(chave, [0, 0])
+    atual[0] += registros
+    atual[1] += quantidade
+
+
+def _chave(entrega):
+    return (entrega.data_entrega_local, entrega.epi_id, entrega.colaborador_id, entrega.status)
+
+
+def _aplica_um(dia, epi_id, colaborador_id, status, registros, quantidade) -> None:
+    filtro = {"dia": dia, "epi_id": epi_id, "colaborador_id": colaborador_id, "status": status}
+    linhas = ResumoDiarioEntrega.objects.filter(**filtro)
+    incremento = {
+        "registros": F("registros") + registros,
+        "quantidade": F("quantidade") + quantidade,
+    }
+    if not linhas.update(**incremento):
+        try:
+            with transaction.atomic():
+                ResumoDiarioEntrega.objects.create(
+                    **filtro, registros=registros, quantidade=quantidade
+                )
+        except IntegrityError:  # criada por outra transação nesse meio-tempo
+            linhas.update(**incremento)
+
+
+def aplica(deltas: dict) -> None:
+    """
+    Soma os deltas {(dia, epi_id, colaborador_id, status): [registros, quantidade]}.
+    Número constante de consultas: um SELECT das chaves existentes, um
+    bulk_update com incrementos F() e um bulk_create das novas (com recuo
+    chave a chave se outra transação criar alguma delas antes, ou excluir
+    uma linha entre o SELECT e o bulk_update).
+    """
+    deltas = {chave: valores for chave, valores in deltas.items() if any(valores)}
+    if not deltas:
+        return
+    dias, epis, colaboradores, status = (set(c) for c in zip(*deltas))
+    existentes = {
+        (r.dia, r.epi_id, r.colaborador_id, r.status): r
+        for r in ResumoDiarioEntrega.objects.filter(
+            dia__in=dias, epi_id__in=epis, colaborador_id__in=colaboradores, status__in=status
+        )
+        if (r.dia, r.epi_id, r.colaborador_id, r.status) in deltas
+    }
+    alteradas = []
+    for chave, linha in existentes.items():
+        registros, quantidade = deltas[chave]
+        linha.registros = F("registros") + registros
+        linha.quantidade = F("quantidade") + quantidade
+        alteradas.append(linha)
+    atualizadas = ResumoDiarioEntrega.objects.bulk_update(
+        alteradas, ["registros", "quantidade"], batch_size=LOTE
+    )
+    if atualizadas < len(alteradas):
+        # Linhas excluídas por outra transação depois do SELECT: o UPDATE não
+        # as encontrou, então o delta vai chave a chave (recriando se preciso).
+        # As que o UPDATE achou ficam travadas até o commit e não somem mais.
+        restantes = set(
+            ResumoDiarioEntrega.objects.filter(
+                pk__in=[linha.pk for linha in alteradas]
+            ).values_list("pk", flat=True)
+        )
+        for chave, linha in existentes.items():
+            if linha.pk not in restantes:
+                alteradas.remove(linha)
+                if deltas[chave][0] > 0:
+                    _aplica_um(*chave, *deltas[chave])
+
+    # Chave ausente com delta negativo: nada a descontar (resumo já sem a linha).
+    novas = [c for c in deltas if c not in existentes and deltas[c][0] > 0]
+    try:
+        with transaction.atomic():
+            ResumoDiarioEntrega.objects.bulk_create(
+                (
+                    ResumoDiarioEntrega(
+                        dia=dia,
+                        epi_id=epi_id,
+                        colaborador_id=colaborador_id,
+                        status=st,
+                        registros=deltas[(dia, epi_id, colaborador_id, st)][0],
+                        quantidade=deltas[(dia, epi_id, colaborador_id, st)][1],
+                    )
+                    for dia, epi_id, colaborador_id, st in novas
+                ),
+                batch_size=LOTE,
+            )
+    except IntegrityError:
+        for chave in sorted(novas):
+            _aplica_um(*chave, *deltas[chave])
+
+    if any(registros < 0 for registros, _ in deltas.values()):
+        ResumoDiarioEntrega.objects.filter(
+            pk__in=[linha.pk for linha in alteradas], registros__lte=0
+        ).delete()
+
+
+def registra(entregas, sinal: int = 1) -> None:
+    deltas = {}
+    for e in entregas:
+        _soma(deltas, _chave(e), sinal, sinal * e.quantidade)
+    aplica(deltas)
+
+
+def reconstroi() -> int:
+    """Refaz o rollup inteiro a partir das Entregas. Retorna o nº de linhas."""
+    linhas = (
+        Entrega.objects.values("data_entrega_local", "epi_id", "colaborador_id", "status")
+        .annotate(registros=Count("id"), qtd=Sum("quantidade"))
+        .order_by()
+    )
+    with transaction.atomic():
+        ResumoDiarioEntrega.objects.all().delete()
+        criadas = ResumoDiarioEntrega.objects.bulk_create(
+            (
+                ResumoDiarioEntrega(
+                    dia=linha["data_entrega_local"],
+                    epi_id=linha["epi_id"],
+                    colaborador_id=linha["colaborador_id"],
+                    status=linha["status"],
+                    registros=linha["registros"],
+                    quantidade=linha["qtd"],
+                )
+                for linha in linhas.iterator(chunk_size=LOTE)
+            ),
+            batch_size=LOTE,
+        )
+    return len(criadas)
+
+
+# ----- Receptores (conectados em AppRelatoriosConfig.ready) -----
+def guarda_anterior(sender, instance, raw=False, **kwargs):
+    instance._resumo_anterior = None
+    if instance.pk and not raw:
+        instance._resumo_anterior = (
+            Entrega.objects.filter(pk=instance.pk)
+            .values_list("data_entrega_local", "epi_id", "colaborador_id", "status", "quantidade")
+            .first()
+        )
+
+
+def apos_salvar(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    deltas = {}
+    anterior = getattr(instance, "_resumo_anterior", None)
+    if anterior:
+        *chave, quantidade = anterior
+        _soma(deltas, tuple(chave), -1, -quantidade)
+    _soma(deltas, _chave(instance), 1, instance.quantidade)
+    aplica(deltas)
+
+
+def apos_excluir(sender, instance, **kwargs):
+    registra([instance], sinal=-1)
+
+
+def apos_lote(sender, entregas, **kwargs):
+    registra(entregas)
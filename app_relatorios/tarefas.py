@@ -0,0 +1,205 @@
+# app_relatorios/tarefas.py
+"""
+Exportações em segundo plano (TarefaExportacao).
+
+`solicita` grava a tarefa (ou devolve a igual que já está na fila);
+`processar_pendentes`, chamado pelo comando `processar_exportacoes`, pega
+cada tarefa com um UPDATE condicional (PENDENTE -> PROCESSANDO, então dois
+workers nunca pegam a mesma), gera o arquivo em MEDIA_ROOT/exportacoes/ em
+blocos, com o mesmo exportador da exportação direta, e registra o progresso
+a cada lote. O progresso também serve de heartbeat (`sinal_em`): uma tarefa
+PROCESSANDO sem sinal há PRAZO_SEM_SINAL (worker morto) volta para a fila, ou
+vira ERRO depois de MAX_TENTATIVAS, liberando a chave. Tarefas terminadas há
+mais que o período de retenção são apagadas com seus arquivos por `purgar`.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from app_core.paginacao import contagem_aproximada
+
+from . import exportacao
+from .filtros import filtra_entregas
+from .forms import RelatorioEntregasForm
+from .models import TarefaExportacao
+
+logger = logging.getLogger(__name__)
+
+PASTA = "exportacoes"
+PRAZO_SEM_SINAL = timedelta(minutes=10)
+MAX_TENTATIVAS = 3
+# Tarefas terminadas apagadas (com os arquivos) por DELETE em `purgar`.
+LOTE_PURGA = 500
+
+
+class TarefaPerdida(Exception):
+    """A tarefa foi recuperada por outro worker enquanto esta ainda a processava."""
+
+
+def chave(formato: str, filtros: dict) -> str:
+    bruto = json.dumps({"formato": formato, "filtros": filtros}, sort_keys=True)
+    return hashlib.md5(bruto.encode(), usedforsecurity=False).hexdigest()
+
+
+def solicita(formato: str, filtros: dict, usuario=None) -> tuple[TarefaExportacao, bool]:
+    """
+    (tarefa, criada). `filtros` são os do relatório já normalizados
+    (cache_relatorio.filtros_normalizados). Se uma tarefa igual estiver
+    pendente ou em andamento, ela é devolvida em vez de criar outra.
+    """
+    k = chave(formato, filtros)
+    try:
+        with transaction.atomic():
+            tarefa = TarefaExportacao.objects.create(
+                formato=formato, filtros=filtros, chave=k, chave_ativa=k, solicitante=usuario
+            )
+        return tarefa, True
+    except IntegrityError:
+        existente = TarefaExportacao.objects.filter(chave_ativa=k).first()
+        if existente is None:  # terminou entre o INSERT e a leitura: tenta de novo
+            return solicita(formato, filtros, usuario)
+        return existente, False
+
+
+def recupera_travadas() -> int:
+    """
+    Tarefas PROCESSANDO sem sinal há PRAZO_SEM_SINAL: voltam a PENDENTE ou, se
+    já esgotaram MAX_TENTATIVAS, viram ERRO e liberam a chave. Retorna quantas.
+    """
+    travadas = TarefaExportacao.objects.filter(
+        status=TarefaExportacao.Status.PROCESSANDO, sinal_em__lt=timezone.now() - PRAZO_SEM_SINAL
+    )
+    falhas = travadas.filter(tentativas__gte=MAX_TENTATIVAS).update(
+        status=TarefaExportacao.Status.ERRO,
+        erro="O worker parou de responder durante a exportação.",
+        chave_ativa=None,
+        concluido_em=timezone.now(),
+    )
+    return falhas + travadas.update(status=TarefaExportacao.Status.PENDENTE)
+
+
+def _reserva() -> TarefaExportacao | None:
+    """A tarefa pendente mais antiga, já marcada como PROCESSANDO por este worker."""
+    pendentes = TarefaExportacao.objects.filter(status=TarefaExportacao.Status.PENDENTE)
+    for pk in pendentes.order_by("id").values_list("pk", flat=True)[:10]:
+        agora = timezone.now()
+        if pendentes.filter(pk=pk).update(
+            status=TarefaExportacao.Status.PROCESSANDO,
+            iniciado_em=agora,
+            sinal_em=agora,
+            tentativas=F("tentativas") + 1,
+        ):
+            return TarefaExportacao.objects.get(pk=pk)
+    return None
+
+
+def _caminho(nome: str) -> Path:
+    return Path(settings.MEDIA_ROOT) / nome
+
+
+def processa(tarefa: TarefaExportacao) -> None:
+    """
+    Gera o arquivo da tarefa (já PROCESSANDO) e a marca como CONCLUIDA ou ERRO.
+    Cada atualização exige que a tarefa ainda seja desta tentativa: se ela foi
+    recuperada por outro worker, este desiste sem mexer no status.
+    """
+    exportador = exportacao.exportador_de(tarefa.formato)
+    nome = f"{PASTA}/relatorio_entregas_{tarefa.pk}.{exportador.extensao if exportador else 'x'}"
+    parcial = _caminho(f"{nome}.{tarefa.tentativas}.parcial")
+    tarefas = TarefaExportacao.objects.filter(
+        pk=tarefa.pk, status=TarefaExportacao.Status.PROCESSANDO, tentativas=tarefa.tentativas
+    )
+    try:
+        if exportador is None:
+            raise ValueError(f"Formato desconhecido: {tarefa.formato}")
+        qs = filtra_entregas(RelatorioEntregasForm(tarefa.filtros or None))
+        estimadas, _ = contagem_aproximada(qs)
+        if not tarefas.update(linhas_estimadas=estimadas, sinal_em=timezone.now()):
+            raise TarefaPerdida
+
+        feitas = 0
+
+        def progresso(n):
+            nonlocal feitas
+            feitas += n
+            if not tarefas.update(linhas_processadas=feitas, sinal_em=timezone.now()):
+                raise TarefaPerdida
+
+        parcial.parent.mkdir(parents=True, exist_ok=True)
+        with open(parcial, "wb") as destino:
+            destino.writelines(
+                bloco.encode() if isinstance(bloco, str) else bloco
+                for bloco in exportador.gerador(qs, progresso=progresso)
+            )
+        os.replace(parcial, _caminho(nome))
+    except TarefaPerdida:
+        logger.warning("Exportação #%s recuperada por outro worker; abandonando.", tarefa.pk)
+        parcial.unlink(missing_ok=True)
+        return
+    except Exception as exc:
+        logger.exception("Falha na exportação #%s", tarefa.pk)
+        parcial.unlink(missing_ok=True)
+        tarefas.update(
+            status=TarefaExportacao.Status.ERRO,
+            erro=str(exc)[:2000],
+            chave_ativa=None,
+            concluido_em=timezone.now(),
+        )
+        return
+    tarefas.update(
+        status=TarefaExportacao.Status.CONCLUIDA,
+        arquivo=nome,
+        chave_ativa=None,
+        concluido_em=timezone.now(),
+    )
+
+
+def processar_pendentes(limite: int | None = None) -> int:
+    """
+    Recupera as travadas e processa tarefas pendentes até esvaziar a fila (ou
+    até `limite`). Retorna quantas.
+    """
+    recupera_travadas()
+    feitas = 0
+    while limite is None or feitas < limite:
+        tarefa = _reserva()
+        if tarefa is None:
+            break
+        processa(tarefa)
+        feitas += 1
+    return feitas
+
+
+def _apaga_arquivos(pk: int) -> None:
+    """Arquivo final e parciais (de tentativas abandonadas) da tarefa `pk`."""
+    for arquivo in _caminho(PASTA).glob(f"relatorio_entregas_{pk}.*"):
+        arquivo.unlink(missing_ok=True)
+
+
+def purgar(reter: timedelta) -> int:
+    """
+    Apaga, em lotes, as tarefas CONCLUIDA/ERRO terminadas há mais de `reter`
+    e os seus arquivos. Pendentes e em andamento nunca são tocadas. Retorna quantas.
+    """
+    antigas = TarefaExportacao.objects.filter(
+        status__in=[TarefaExportacao.Status.CONCLUIDA, TarefaExportacao.Status.ERRO],
+        concluido_em__lt=timezone.now() - reter,
+    )
+    total = 0
+    while True:
+        ids = list(antigas.order_by("id").values_list("id", flat=True)[:LOTE_PURGA])
+        if not ids:
+            return total
+        # Arquivo primeiro: se o processo cair no meio, a tarefa continua e é apagada depois.
+        for pk in ids:
+            _apaga_arquivos(pk)
+        total += TarefaExportacao.objects.filter(id__in=ids).delete()[0]
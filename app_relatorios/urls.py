@@ -1,10 +1,14 @@
 from django.urls import path
 
-from .views import ExportarEntregasCSVView, RelatorioEntregasView
+from . import views
 
 app_name = "app_relatorios"
 
 urlpatterns = [
-    path("", RelatorioEntregasView.as_view(), name="index"),
-    path("exportar/", ExportarEntregasCSVView.as_view(), name="exportar"),
+    path("", views.RelatorioEntregasView.as_view(), name="index"),
+    path("exportar/", views.ExportarEntregasView.as_view(), name="exportar"),
+    path("exportacoes/", views.solicitar_exportacao, name="solicitar_exportacao"),
+    path("exportacoes/<int:pk>/", views.exportacao_detalhe, name="exportacao"),
+    path("exportacoes/<int:pk>/status/", views.exportacao_status, name="exportacao_status"),
+    path("exportacoes/<int:pk>/arquivo/", views.exportacao_arquivo, name="exportacao_arquivo"),
 ]
@@ -1,35 +1,31 @@
 # app_relatorios/views.py
-import csv
+import os
 
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required, permission_required
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
 from django.contrib.auth.views import redirect_to_login
 from django.core.exceptions import PermissionDenied
-from django.db.models import Case, Count, F, IntegerField, Sum, Value, When
-from django.http import HttpResponse
-from django.urls import reverse_lazy
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponseBadRequest,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse, reverse_lazy
+from django.views.decorators.http import require_POST
 from django.views.generic import TemplateView
 
-from app_entregas.models import Entrega
-
+from . import agregacao, cache_relatorio, exportacao, filtros, tarefas
 from .forms import RelatorioEntregasForm
+from .models import TarefaExportacao
 
 
 def _filtrar_qs(request):
     form = RelatorioEntregasForm(request.GET or None)
-    qs = Entrega.objects.select_related("epi", "colaborador")
-    if form.is_valid():
-        cd = form.cleaned_data
-        if cd.get("data_de"):
-            qs = qs.filter(data_entrega__date__gte=cd["data_de"])
-        if cd.get("data_ate"):
-            qs = qs.filter(data_entrega__date__lte=cd["data_ate"])
-        if cd.get("colaborador"):
-            qs = qs.filter(colaborador=cd["colaborador"])
-        if cd.get("epi"):
-            qs = qs.filter(epi=cd["epi"])
-        if cd.get("status"):
-            qs = qs.filter(status=cd["status"])
-    return form, qs.order_by("-data_entrega", "-id")
+    return form, filtros.filtra_entregas(form)
 
 
 class RelatorioEntregasView(LoginRequiredMixin, PermissionRequiredMixin, TemplateView):
@@ -42,78 +38,16 @@ class RelatorioEntregasView(LoginRequiredMixin, PermissionRequiredMixin, Templat
         ctx = super().get_context_data(**kwargs)
         form, qs = _filtrar_qs(self.request)
 
-        status_codes = [code for code, _ in Entrega.Status.choices]
-        # Tudo que não é DEVOLVIDO é considerado "fora do estoque"
-        fora_do_estoque = [s for s in status_codes if s != "DEVOLVIDO"]
-
-        agg = qs.aggregate(
-            registros=Count("id"),
-            quantidade_total=Sum("quantidade"),
-            total_entregue=Sum(
-                Case(
-                    When(status__in=fora_do_estoque, then=F("quantidade")),
-                    default=Value(0),
-                    output_field=IntegerField(),
-                )
-            ),
-            total_devolvido=Sum(
-                Case(
-                    When(status="DEVOLVIDO", then=F("quantidade")),
-                    default=Value(0),
-                    output_field=IntegerField(),
-                )
-            ),
-        )
-
-        por_epi = (
-            qs.values("epi__id", "epi__nome", "epi__codigo")
-            .annotate(
-                entregues=Sum(
-                    Case(
-                        When(status__in=fora_do_estoque, then=F("quantidade")),
-                        default=Value(0),
-                        output_field=IntegerField(),
-                    )
-                ),
-                devolvidos=Sum(
-                    Case(
-                        When(status="DEVOLVIDO", then=F("quantidade")),
-                        default=Value(0),
-                        output_field=IntegerField(),
-                    )
-                ),
-            )
-            .order_by("epi__nome", "epi__codigo")
-        )
-
-        por_colab = (
-            qs.values("colaborador__id", "colaborador__nome")
-            .annotate(
-                entregues=Sum(
-                    Case(
-                        When(status__in=fora_do_estoque, then=F("quantidade")),
-                        default=Value(0),
-                        output_field=IntegerField(),
-                    )
-                ),
-                devolvidos=Sum(
-                    Case(
-                        When(status="DEVOLVIDO", then=F("quantidade")),
-                        default=Value(0),
-                        output_field=IntegerField(),
-                    )
-                ),
-            )
-            .order_by("colaborador__nome")
-        )
-
         ctx.update(
             {
                 "form": form,
                 "qs": qs[:200],  # lista (slice) para não estourar tela
-                "agg": agg,
-                "por_epi": por_epi,
-                "por_colab": por_colab,
+                # agg, por_epi e por_colab: uma consulta agrupada no resumo diário
+                # e uma passagem em Python sobre o resultado, em cache por filtros.
+                **cache_relatorio.obtem(
+                    form,
+                    lambda: agregacao.agrega(agregacao.agrupa_resumo(filtros.filtra_resumo(form))),
+                ),
             }
         )
         return ctx
@@ -128,46 +62,26 @@ class RelatorioEntregasView(LoginRequiredMixin, PermissionRequiredMixin, Templat
         raise PermissionDenied
 
 
-class ExportarEntregasCSVView(LoginRequiredMixin, PermissionRequiredMixin, TemplateView):
+class ExportarEntregasView(LoginRequiredMixin, PermissionRequiredMixin, TemplateView):
+    """Exporta as Entregas filtradas em fluxo; `?formato=csv|xlsx|ndjson` (padrão csv)."""
+
     permission_required = "app_entregas.view_entrega"
     raise_exception = True
     login_url = reverse_lazy("app_colaboradores:entrar")
     template_name = ""
 
     def get(self, request, *args, **kwargs):
+        formato = request.GET.get("formato") or "csv"
+        exportador = exportacao.exportador_de(formato)
+        if exportador is None:
+            return HttpResponseBadRequest(
+                f"Formato desconhecido: use {', '.join(exportacao.formatos())}."
+            )
         form, qs = _filtrar_qs(request)
-        resp = HttpResponse(content_type="text/csv; charset=utf-8")
-        resp["Content-Disposition"] = 'attachment; filename="relatorio_entregas.csv"'
-        w = csv.writer(resp, delimiter=";")
-        w.writerow(
-            [
-                "Data Entrega",
-                "Data Devolução Prevista",
-                "Data Devolução",
-                "Colaborador",
-                "EPI",
-                "Quantidade",
-                "Status",
-                "Observação",
-            ]
+        resp = StreamingHttpResponse(exportador.gerador(qs), content_type=exportador.content_type)
+        resp["Content-Disposition"] = (
+            f'attachment; filename="relatorio_entregas.{exportador.extensao}"'
         )
-        for e in qs.iterator():
-            w.writerow(
-                [
-                    e.data_entrega.strftime("%d/%m/%Y %H:%M"),
-                    (
-                        e.data_prevista_devolucao.strftime("%d/%m/%Y %H:%M")
-                        if e.data_prevista_devolucao
-                        else "-"
-                    ),
-                    (e.data_devolucao.strftime("%d/%m/%Y %H:%M") if e.data_devolucao else "-"),
-                    e.colaborador.nome,
-                    f"{e.epi.nome} ({e.epi.codigo})",
-                    e.quantidade,
-                    e.get_status_display(),
-                    (e.observacao or "").replace("\n", " ").strip(),
-                ]
-            )
         return resp
 
     def handle_no_permission(self):
@@ -178,3 +92,66 @@ class ExportarEntregasCSVView(LoginRequiredMixin, PermissionRequiredMixin, Templ
                 self.get_redirect_field_name(),
             )
         raise PermissionDenied
+
+
+# ----- Exportação em segundo plano -----
+@require_POST
+@login_required
+@permission_required("app_entregas.view_entrega", raise_exception=True)
+def solicitar_exportacao(request):
+    """Enfileira a exportação com os filtros da querystring; `formato` vem no POST."""
+    formato = request.POST.get("formato") or "csv"
+    if exportacao.exportador_de(formato) is None:
+        return HttpResponseBadRequest(
+            f"Formato desconhecido: use {', '.join(exportacao.formatos())}."
+        )
+    form = RelatorioEntregasForm(request.GET or None)
+    tarefa, criada = tarefas.solicita(
+        formato, cache_relatorio.filtros_normalizados(form), request.user
+    )
+    if not criada:
+        messages.info(request, "Já existe uma exportação igual em andamento; acompanhe abaixo.")
+    return redirect("app_relatorios:exportacao", pk=tarefa.pk)
+
+
+@login_required
+@permission_required("app_entregas.view_entrega", raise_exception=True)
+def exportacao_detalhe(request, pk):
+    tarefa = get_object_or_404(TarefaExportacao, pk=pk)
+    return render(request, "app_relatorios/pages/exportacao.html", {"tarefa": tarefa})
+
+
+@login_required
+@permission_required("app_entregas.view_entrega", raise_exception=True)
+def exportacao_status(request, pk):
+    tarefa = get_object_or_404(TarefaExportacao, pk=pk)
+    concluida = tarefa.status == TarefaExportacao.Status.CONCLUIDA
+    return JsonResponse(
+        {
+            "id": tarefa.pk,
+            "formato": tarefa.formato,
+            "status": tarefa.status,
+            "linhas_processadas": tarefa.linhas_processadas,
+            "linhas_estimadas": tarefa.linhas_estimadas,
+            "progresso": tarefa.progresso,
+            "erro": tarefa.erro,
+            "download": (
+                reverse("app_relatorios:exportacao_arquivo", args=[tarefa.pk])
+                if concluida
+                else None
+            ),
+        }
+    )
+
+
+@login_required
+@permission_required("app_entregas.view_entrega", raise_exception=True)
+def exportacao_arquivo(request, pk):
+    tarefa = get_object_or_404(TarefaExportacao, pk=pk, status=TarefaExportacao.Status.CONCLUIDA)
+    if not tarefa.arquivo:
+        raise Http404
+    return FileResponse(
+        tarefa.arquivo.open("rb"),
+        as_attachment=True,
+        filename=os.path.basename(tarefa.arquivo.name),
+    )
@@ -0,0 +1,119 @@
+# app_relatorios/xlsx.py
+"""
+Planilha XLSX gerada em fluxo, sem dependências.
+
+O XML da planilha é escrito direto numa entrada do zip (deflate) conforme as
+linhas chegam, e o zip vai para um destino sem seek: o que o compressor
+produziu é devolvido a cada lote. Texto vai como `inlineStr` (sem tabela de
+strings compartilhadas) e números como valor, então a memória fica limitada
+a um lote de linhas mais o buffer do compressor.
+"""
+
+import io
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_NS_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_NS_PKG = "http://schemas.openxmlformats.org/package/2006/relationships"
+_TIPO = "application/vnd.openxmlformats-officedocument.spreadsheetml"
+CONTENT_TYPE = f"{_TIPO}.sheet"
+_CABECALHO_XML = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+
+# Caracteres de controle não são permitidos em XML 1.0.
+_INVALIDOS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+_PARTES_FIXAS = {
+    "[Content_Types].xml": (
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.'
+        'relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        f'<Override PartName="/xl/workbook.xml" ContentType="{_TIPO}.sheet.main+xml"/>'
+        f'<Override PartName="/xl/worksheets/sheet1.xml" ContentType="{_TIPO}.worksheet+xml"/>'
+        f'<Override PartName="/xl/styles.xml" ContentType="{_TIPO}.styles+xml"/>'
+        "</Types>"
+    ),
+    "_rels/.rels": (
+        f'<Relationships xmlns="{_NS_PKG}">'
+        f'<Relationship Id="rId1" Type="{_NS_REL}/officeDocument" Target="xl/workbook.xml"/>'
+        "</Relationships>"
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        f'<Relationships xmlns="{_NS_PKG}">'
+        f'<Relationship Id="rId1" Type="{_NS_REL}/worksheet" Target="worksheets/sheet1.xml"/>'
+        f'<Relationship Id="rId2" Type="{_NS_REL}/styles" Target="styles.xml"/>'
+        "</Relationships>"
+    ),
+    "xl/styles.xml": (
+        f'<styleSheet xmlns="{_NS}">'
+        '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+        '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+        '<fill><patternFill patternType="gray125"/></fill></fills>'
+        '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/>'
+        "</cellStyleXfs>"
+        '<cellXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+        "</cellXfs>"
+        "</styleSheet>"
+    ),
+}
+
+
+class _Destino(io.RawIOBase):
+    """Arquivo só de escrita e sem seek: acumula o que o zip escreve até ser esvaziado."""
+
+    def __init__(self):
+        self._partes = []
+
+    def writable(self):
+        return True
+
+    def write(self, dados):
+        self._partes.append(bytes(dados))
+        return len(dados)
+
+    def esvazia(self) -> bytes:
+        dados = b"".join(self._partes)
+        self._partes.clear()
+        return dados
+
+
+def _celula(valor) -> str:
+    if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+        return f"<c><v>{valor}</v></c>"
+    texto = escape(_INVALIDOS.sub("", str(valor)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{texto}</t></is></c>'
+
+
+def _linha(valores) -> str:
+    return "<row>" + "".join(_celula(v) for v in valores) + "</row>"
+
+
+def planilha(cabecalho, lotes, nome_aba: str = "Planilha"):
+    """
+    Bytes de um .xlsx com `cabecalho` e as linhas de `lotes` (iterável de
+    listas de tuplas), devolvidos em pedaços conforme cada lote é comprimido.
+    """
+    destino = _Destino()
+    with zipfile.ZipFile(destino, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for nome, conteudo in _PARTES_FIXAS.items():
+            zf.writestr(nome, _CABECALHO_XML + conteudo)
+        zf.writestr(
+            "xl/workbook.xml",
+            f'{_CABECALHO_XML}<workbook xmlns="{_NS}" xmlns:r="{_NS_REL}"><sheets>'
+            f'<sheet name="{escape(nome_aba)}" sheetId="1" r:id="rId1"/></sheets></workbook>',
+        )
+        with zf.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as aba:
+            aba.write(
+                f'{_CABECALHO_XML}<worksheet xmlns="{_NS}"><sheetData>{_linha(cabecalho)}'.encode()
+            )
+            yield destino.esvazia()
+            for linhas in lotes:
+                aba.write("".join(_linha(valores) for valores in linhas).encode())
+                pedaco = destino.esvazia()
+                if pedaco:
+                    yield pedaco
+            aba.write(b"</sheetData></worksheet>")
+    yield destino.esvazia()
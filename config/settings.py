@@ -48,6 +48,7 @@ INSTALLED_APPS = [
     "app_epis",
     "app_entregas",
     "app_relatorios",
+    "app_api",
 ]
 
 # --- Middleware ---
@@ -126,6 +127,27 @@ else:
         }
     }
 
+# --- Cache ---
+# Compartilhado entre processos/workers: a versão das Entregas, os contadores do
+# relatório e o cache dos EPIs fatiados precisam ser os mesmos em todos eles.
+# Com REDIS_URL usa o Redis (requer o pacote `redis`); senão, a tabela
+# `django_cache` no banco, criada pelo migrate. Nos testes, memória local.
+REDIS_URL = os.getenv("REDIS_URL", "")
+
+if IS_TEST or "pytest" in sys.modules:
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+elif REDIS_URL:
+    CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": REDIS_URL}
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+            "LOCATION": "django_cache",
+        }
+    }
+
 # --- Password validation ---
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
@@ -148,5 +170,13 @@ STATICFILES_DIRS = [BASE_DIR / "static"] if (BASE_DIR / "static").exists() else
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# --- Estoque ---
+# "imediato":    movimentações atualizam EPI.estoque na hora (lock na linha do EPI).
+# "condicional": um único UPDATE condicional por movimentação (sem lock explícito).
+# "ledger":      entradas só entram no livro-razão (sem lock); saídas são UPDATE condicional
+#                no snapshot. Rode `compactar_estoque` periodicamente.
+# Compare os engines com `python manage.py bench_estoque`.
+ESTOQUE_ENGINE = os.getenv("ESTOQUE_ENGINE", "imediato")
+
 # --- Primary key default ---
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
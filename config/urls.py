@@ -27,6 +27,7 @@ urlpatterns = [
     path("epis/", include("app_epis.urls")),
     path("entregas/", include("app_entregas.urls")),
     path("relatorios/", include("app_relatorios.urls")),
+    path("api/", include("app_api.urls")),
     path("admin/", admin.site.urls),
     path(
         "accounts/login/",
@@ -7,3 +7,13 @@ document.querySelectorAll('[data-confirm]').forEach((el) => {
     }
   });
 });
+
+// seleção em lote
+const selecionarTodas = document.getElementById('selecionar-todas');
+if (selecionarTodas) {
+  selecionarTodas.addEventListener('change', () => {
+    document.querySelectorAll('input[name="ids"][form="form-lote"]').forEach((cb) => {
+      cb.checked = selecionarTodas.checked;
+    });
+  });
+}
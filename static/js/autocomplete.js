@@ -0,0 +1,48 @@
+// Seletores "preguiçosos" (app_core.widgets.AutocompleteSelect/-Multiple):
+// o <select> vem só com a(s) opção(ões) selecionada(s); as demais são
+// buscadas no endpoint de autocomplete conforme o usuário digita.
+document.addEventListener('DOMContentLoaded', () => {
+  document.querySelectorAll('select[data-autocomplete]').forEach((select) => {
+    const busca = document.createElement('input');
+    busca.type = 'search';
+    busca.className = 'form-control form-control-sm mb-1';
+    busca.placeholder = 'Digite para buscar…';
+    busca.setAttribute('autocomplete', 'off');
+    select.parentNode.insertBefore(busca, select);
+
+    let timer = null;
+    let controller = null;
+
+    const carregar = async () => {
+      const url = new URL(select.dataset.autocomplete, window.location.origin);
+      url.searchParams.set('q', busca.value.trim());
+      if (select.dataset.autocompleteAtivos) url.searchParams.set('ativos', '1');
+      if (controller) controller.abort();
+      controller = new AbortController();
+      try {
+        const resp = await fetch(url, { signal: controller.signal, headers: { Accept: 'application/json' } });
+        if (!resp.ok) return;
+        const { resultados } = await resp.json();
+        const escolhidos = new Set(Array.from(select.selectedOptions, (opt) => opt.value));
+        // Mantém a opção vazia e as selecionadas; troca o resto pelos resultados.
+        Array.from(select.options).forEach((opt) => {
+          if (opt.value !== '' && !escolhidos.has(opt.value)) opt.remove();
+        });
+        resultados.forEach(({ id, texto }) => {
+          if (escolhidos.has(String(id))) return;
+          select.add(new Option(texto, id));
+        });
+      } catch (e) {
+        if (e.name !== 'AbortError') console.error(e);
+      }
+    };
+
+    busca.addEventListener('input', () => {
+      clearTimeout(timer);
+      timer = setTimeout(carregar, 250);
+    });
+    select.addEventListener('focus', () => {
+      if (select.options.length <= 2) carregar();
+    }, { once: true });
+  });
+});
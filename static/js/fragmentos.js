@@ -0,0 +1,50 @@
+// Filtros e paginação das listas sem recarregar o layout: o formulário com
+// data-fragmento-alvo="#id" e os links de paginação dentro do alvo buscam só
+// o fragmento (header X-Fragmento) e trocam o conteúdo do alvo.
+(function () {
+  const HEADER = 'X-Fragmento';
+
+  async function carregar(alvo, url, empilhar) {
+    alvo.setAttribute('aria-busy', 'true');
+    alvo.style.opacity = '0.6';
+    try {
+      const resp = await fetch(url, { headers: { [HEADER]: '1' }, credentials: 'same-origin' });
+      if (!resp.ok || resp.redirected) {
+        window.location.href = url;
+        return;
+      }
+      alvo.innerHTML = await resp.text();
+      if (empilhar) history.pushState({ fragmento: alvo.id }, '', url);
+    } catch (err) {
+      window.location.href = url;
+    } finally {
+      alvo.removeAttribute('aria-busy');
+      alvo.style.opacity = '';
+    }
+  }
+
+  document.querySelectorAll('form[data-fragmento-alvo]').forEach((form) => {
+    const alvo = document.querySelector(form.dataset.fragmentoAlvo);
+    if (!alvo || !alvo.id) return;
+    history.replaceState({ fragmento: alvo.id }, '', window.location.href);
+
+    form.addEventListener('submit', (ev) => {
+      ev.preventDefault();
+      const params = new URLSearchParams(new FormData(form)).toString();
+      const base = form.getAttribute('action') || window.location.pathname;
+      carregar(alvo, params ? `${base}?${params}` : base, true);
+    });
+
+    alvo.addEventListener('click', (ev) => {
+      const link = ev.target.closest('.pagination a, a[data-fragmento]');
+      if (!link || ev.ctrlKey || ev.metaKey || ev.shiftKey || ev.button !== 0) return;
+      ev.preventDefault();
+      carregar(alvo, link.href, true);
+    });
+  });
+
+  window.addEventListener('popstate', (ev) => {
+    const alvo = ev.state && ev.state.fragmento && document.getElementById(ev.state.fragmento);
+    if (alvo) carregar(alvo, window.location.href, false);
+  });
+})();
@@ -0,0 +1,140 @@
+# tests/test_api.py
+import json
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth.models import Permission, User
+from django.urls import reverse
+from django.utils import timezone
+
+from app_colaboradores.models import Colaborador
+from app_entregas.models import Entrega
+from app_entregas.services import (
+    _libera_reserva,
+    _reserva,
+    ajusta_estoque,
+    compactar_movimentacoes,
+    fatiar_estoque,
+    rebalancear_fatias,
+)
+from app_epis.models import EPI, CategoriaEPI
+
+
+@pytest.fixture
+def cenario():
+    cat = CategoriaEPI.objects.create(nome="Luvas")
+    epi = EPI.objects.create(codigo="L1", nome="Luva", categoria=cat, estoque=50)
+    col = Colaborador.objects.create(nome="Ana", email="a@x.com", matricula="A1")
+    entregas = [
+        Entrega.objects.create(colaborador=col, epi=epi, quantidade=1, status=status)
+        for status in ["EMPRESTADO", "FORNECIDO", "EMPRESTADO", "EM_USO", "EMPRESTADO"]
+    ]
+    return epi, col, entregas
+
+
+def _cliente(client, *codenames):
+    u = User.objects.create_user("bi", password="x")
+    u.user_permissions.add(*Permission.objects.filter(codename__in=codenames))
+    client.force_login(u)
+    return client
+
+
+def _url(recurso="entregas"):
+    return reverse("app_api:listar", args=[recurso])
+
+
+@pytest.mark.django_db
+def test_campos_esparsos_e_filtros_do_relatorio(client, cenario):
+    _, _, entregas = cenario
+    _cliente(client, "view_entrega")
+    r = client.get(_url(), {"fields": "id,status,epi_codigo", "status": "EMPRESTADO"})
+    assert r.status_code == 200
+    dados = r.json()["resultados"]
+    assert [d["id"] for d in dados] == [entregas[0].pk, entregas[2].pk, entregas[4].pk]
+    assert dados[0] == {"id": entregas[0].pk, "status": "EMPRESTADO", "epi_codigo": "L1"}
+
+    assert client.get(_url(), {"fields": "id,senha"}).status_code == 400
+    assert (
+        client.get(_url(), {"data_de": "2024-02-01", "data_ate": "2024-01-01"}).status_code == 400
+    )
+
+
+@pytest.mark.django_db
+def test_cursor_percorre_tudo_sem_repetir(client, cenario):
+    _, _, entregas = cenario
+    _cliente(client, "view_entrega")
+    vistos, cursor = [], None
+    while True:
+        params = {"fields": "id", "limit": 2, **({"cursor": cursor} if cursor else {})}
+        corpo = client.get(_url(), params).json()
+        vistos += [d["id"] for d in corpo["resultados"]]
+        cursor = corpo["proximo_cursor"]
+        if not cursor:
+            break
+    assert sorted(vistos) == sorted(e.pk for e in entregas)
+    assert len(vistos) == len(set(vistos))
+
+
+@pytest.mark.django_db
+def test_updated_since_e_ndjson(client, cenario):
+    _, _, entregas = cenario
+    _cliente(client, "view_entrega")
+    antigo = timezone.now() - timedelta(days=10)
+    Entrega.objects.exclude(pk=entregas[3].pk).update(updated_at=antigo)
+
+    desde = (timezone.now() - timedelta(days=1)).isoformat()
+    r = client.get(_url(), {"updated_since": desde, "fields": "id"})
+    assert r.json()["resultados"] == [{"id": entregas[3].pk}]
+    assert client.get(_url(), {"updated_since": "ontem"}).status_code == 400
+
+    r = client.get(_url(), {"format": "ndjson", "fields": "id,quantidade"})
+    assert r["Content-Type"] == "application/x-ndjson"
+    linhas = [json.loads(x) for x in b"".join(r.streaming_content).decode().splitlines()]
+    assert len(linhas) == 5
+    assert linhas[0] == {"id": entregas[0].pk, "quantidade": 1}
+
+
+@pytest.mark.django_db
+def test_autenticacao_permissao_e_recurso(client, cenario):
+    assert client.get(_url()).status_code == 401
+    _cliente(client, "view_epi")
+    assert client.get(_url()).status_code == 403
+    assert client.get(_url("usuarios")).status_code == 404
+    r = client.get(_url("epis"), {"fields": "codigo,estoque"})
+    assert r.json()["resultados"] == [{"codigo": "L1", "estoque": 50}]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("engine", ["imediato", "condicional", "ledger"])
+def test_updated_since_ve_mudancas_de_estoque_e_reserva(client, cenario, settings, engine):
+    """
+    Movimentações e reservas são UPDATEs em lote no EPI: também marcam updated_at
+    (no ledger, ao compactar; fatiado, ao rebalancear).
+    """
+    settings.ESTOQUE_ENGINE = engine
+    epi, _, _ = cenario
+    _cliente(client, "view_epi")
+    antigo = timezone.now() - timedelta(days=10)
+    desde = (timezone.now() - timedelta(days=1)).isoformat()
+
+    def alterados():
+        return client.get(_url("epis"), {"updated_since": desde, "fields": "id"}).json()[
+            "resultados"
+        ]
+
+    for altera in [
+        lambda: ajusta_estoque(epi.pk, -2),
+        lambda: _reserva(epi.pk, 3),
+        lambda: _libera_reserva(epi.pk, 3),
+    ]:
+        EPI.objects.update(updated_at=antigo)
+        altera()
+        if engine == "ledger":
+            compactar_movimentacoes()
+        assert alterados() == [{"id": epi.pk}]
+
+    fatiar_estoque(epi.pk, 4)
+    EPI.objects.update(updated_at=antigo)
+    ajusta_estoque(epi.pk, 1)
+    rebalancear_fatias(epi.pk)
+    assert alterados() == [{"id": epi.pk}]
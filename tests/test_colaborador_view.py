@@ -21,7 +21,7 @@ def criar_usuario_com_permissao(*codenames):
     return usuario
 
 
-@pytest.mark.django_db
+@pytest.mark.django_db(transaction=True)
 def test_lista_colaboradores_requer_permissao_e_aplica_filtros(client):
     """
     Testa se a listagem de colaboradores requer permissão específica
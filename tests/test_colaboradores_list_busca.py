@@ -6,7 +6,7 @@ from django.urls import reverse
 from app_colaboradores.models import Colaborador
 
 
-@pytest.mark.django_db
+@pytest.mark.django_db(transaction=True)
 def test_busca_colaborador_por_nome_filtra_resultados_corretamente(client):
     """
     Testa se a busca de colaboradores por nome filtra corretamente os resultados,
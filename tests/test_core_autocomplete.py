@@ -0,0 +1,81 @@
+# tests/test_core_autocomplete.py
+import pytest
+from django.contrib.auth.models import Permission, User
+from django.core.cache import cache
+from django.urls import reverse
+
+from app_colaboradores.models import Colaborador
+from app_entregas.forms import EntregaForm
+from app_epis.models import EPI, CategoriaEPI
+
+
+@pytest.fixture
+def logado(client):
+    cache.clear()
+    u = User.objects.create_user("u", password="x")
+    u.user_permissions.add(
+        *Permission.objects.filter(codename__in=["view_colaborador", "view_epi"])
+    )
+    client.force_login(u)
+    yield client
+    cache.clear()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_autocomplete_prefixo_limite_e_ativos(logado):
+    """
+    Casa por prefixo de palavra, sem acento; respeita o limite e o filtro de ativos.
+    """
+    cat = CategoriaEPI.objects.create(nome="Luvas")
+    for i in range(25):
+        EPI.objects.create(codigo=f"L{i:02}", nome=f"Luva nitrílica {i:02}", categoria=cat)
+    EPI.objects.create(codigo="LX", nome="Luva inativa", categoria=cat, ativo=False)
+    EPI.objects.create(codigo="C1", nome="Capacete", categoria=cat)
+    url = reverse("app_core:autocomplete", args=["epis"])
+
+    r = logado.get(url, {"q": "nitri"})
+    assert len(r.json()["resultados"]) == 20
+
+    textos = [o["texto"] for o in logado.get(url, {"q": "luv", "ativos": "1"}).json()["resultados"]]
+    assert "Luva inativa (LX)" not in textos
+    assert (
+        logado.get(url, {"q": "luva ina"}).json()["resultados"][0]["texto"] == "Luva inativa (LX)"
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_autocomplete_exige_login_e_fonte_valida(client, logado):
+    Colaborador.objects.create(nome="Ana Souza", email="a@x.com", matricula="M1")
+    r = logado.get(reverse("app_core:autocomplete", args=["colaboradores"]), {"q": "sou"})
+    assert [o["id"] for o in r.json()["resultados"]] == [Colaborador.objects.get().pk]
+    assert logado.get(reverse("app_core:autocomplete", args=["usuarios"])).status_code == 404
+
+    logado.logout()
+    r = logado.get(reverse("app_core:autocomplete", args=["epis"]))
+    assert r.status_code == 302
+
+
+@pytest.mark.django_db
+def test_autocomplete_exige_permissao_de_visualizacao_da_fonte(client):
+    """
+    Quem só vê EPIs (ex.: grupo Colaborador) não lista colaboradores.
+    """
+    u = User.objects.create_user("c", password="x")
+    u.user_permissions.add(Permission.objects.get(codename="view_epi"))
+    client.force_login(u)
+
+    assert client.get(reverse("app_core:autocomplete", args=["epis"])).status_code == 200
+    assert client.get(reverse("app_core:autocomplete", args=["colaboradores"])).status_code == 403
+
+
+@pytest.mark.django_db
+def test_form_renderiza_apenas_opcao_selecionada():
+    """
+    O <select> não carrega todos os EPIs: só a opção vazia e a selecionada.
+    """
+    cat = CategoriaEPI.objects.create(nome="Luvas")
+    epis = [EPI.objects.create(codigo=f"L{i}", nome=f"Luva {i}", categoria=cat) for i in range(5)]
+    html = str(EntregaForm(initial={"epi": epis[3].pk})["epi"])
+    assert html.count("<option") == 2
+    assert f'value="{epis[3].pk}" selected' in html
+    assert 'data-autocomplete="/autocomplete/epis/"' in html
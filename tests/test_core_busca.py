@@ -0,0 +1,93 @@
+# tests/test_core_busca.py
+from types import SimpleNamespace
+
+import pytest
+from django.db import connection
+from django.db.models import Q
+from django.urls import reverse
+from django.utils import timezone
+
+from app_colaboradores.models import Colaborador
+from app_core import busca
+from app_entregas.models import Entrega
+from app_epis.models import EPI, CategoriaEPI
+
+
+def test_normaliza_remove_acentos_e_caixa():
+    assert busca.normaliza("Proteção AUDITIVA") == "protecao auditiva"
+    assert busca.documento("Luva Nitrílica", "LUV-010", None) == "luva nitrilica luv 010"
+    assert busca.termos(" João  da_Silva ") == ["joao", "da", "silva"]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_documento_atualizado_no_save_e_ao_renomear_categoria():
+    cat = CategoriaEPI.objects.create(nome="Proteção auditiva")
+    epi = EPI.objects.create(codigo="PA-1", nome="Protetor Plug", categoria=cat)
+    assert epi.busca == "protetor plug pa 1 protecao auditiva"
+
+    cat.nome = "Audição"
+    cat.save()
+    epi.refresh_from_db()
+    assert epi.busca.endswith("audicao")
+    assert list(busca.filtra(EPI.objects.all(), "AUDIÇÃO")) == [epi]
+
+
+@pytest.mark.django_db
+def test_sqlite_usa_fts5():
+    """
+    No SQLite a condição consulta a tabela FTS5 mantida por triggers.
+    """
+    if connection.vendor != "sqlite":
+        pytest.skip("FTS5 é específico do SQLite")
+    Colaborador.objects.create(nome="José Araújo", email="jose@x.com", matricula="J1")
+    cond = busca.condicao(Colaborador, "arau")
+    assert "_fts" in str(Colaborador.objects.filter(cond).query)
+    assert Colaborador.objects.filter(cond).get().nome == "José Araújo"
+
+
+def test_mysql_termo_curto_nao_vira_like_sem_ancora(monkeypatch):
+    """
+    No MySQL, termo curto sozinho casa pelo início do documento (índice de
+    prefixo); junto de um termo do FULLTEXT, só refina o resultado dele.
+    """
+    monkeypatch.setattr(busca, "connections", {"default": SimpleNamespace(vendor="mysql")})
+
+    assert busca.condicao(Colaborador, "jo") == Q(busca__startswith="jo")
+    assert busca.condicao(Colaborador, "jo", restrito=True) == (
+        Q(busca__startswith="jo") | Q(busca__contains=" jo")
+    )
+    assert "MATCH" in str(busca.condicao(Colaborador, "silva").children[0][1].sql)
+    assert busca._restringe(["jo", "silva"]) and not busca._restringe(["jo", "da"])
+
+
+@pytest.mark.django_db(transaction=True)
+def test_lista_de_entregas_exige_todos_os_termos_em_colaborador_ou_epi(admin_client):
+    """
+    "ana nitrilica": "ana" casa no colaborador e "nitrilica" no EPI da mesma entrega.
+    """
+    cat = CategoriaEPI.objects.create(nome="Luvas")
+    nitrilica = EPI.objects.create(codigo="L1", nome="Luva Nitrílica", categoria=cat)
+    termica = EPI.objects.create(codigo="L2", nome="Luva Térmica", categoria=cat)
+    ana = Colaborador.objects.create(nome="Ana Souza", email="ana@x.com", matricula="A1")
+    bruno = Colaborador.objects.create(nome="Bruno", email="b@x.com", matricula="B1")
+    agora = timezone.now()
+    alvo = Entrega.objects.create(colaborador=ana, epi=nitrilica, data_entrega=agora)
+    Entrega.objects.create(colaborador=ana, epi=termica, data_entrega=agora)
+    Entrega.objects.create(colaborador=bruno, epi=nitrilica, data_entrega=agora)
+
+    r = admin_client.get(reverse("app_entregas:lista"), {"q": "ana nitrilica"})
+    assert [e.pk for e in r.context["entregas"]] == [alvo.pk]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_reindexar_busca_preenche_linhas_criadas_sem_save():
+    """
+    bulk_create não passa pelo save(): o comando recalcula os documentos.
+    """
+    from django.core.management import call_command
+
+    Colaborador.objects.bulk_create([Colaborador(nome="Márcia", email="m@x.com", matricula="M1")])
+    assert not busca.filtra(Colaborador.objects.all(), "marcia").exists()
+
+    call_command("reindexar_busca", stdout=None)
+    assert busca.filtra(Colaborador.objects.all(), "marcia").exists()
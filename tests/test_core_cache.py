@@ -0,0 +1,32 @@
+# tests/test_core_cache.py
+import pytest
+from django.core.cache import caches
+from django.db import connection
+
+from app_core.apps import cria_tabela_cache
+from app_entregas import versao
+
+CACHE_BANCO = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "cache_teste",
+    }
+}
+
+
+@pytest.mark.django_db
+def test_versao_das_entregas_no_cache_do_banco(settings):
+    """
+    Com o DatabaseCache (padrão fora dos testes), o post_migrate cria a tabela e
+    a versão das Entregas fica no banco, visível a todos os processos.
+    """
+    settings.CACHES = CACHE_BANCO
+    cria_tabela_cache()
+    assert "cache_teste" in connection.introspection.table_names()
+
+    inicial = versao.atual()
+    caches["default"].incr(versao.CHAVE)
+    with connection.cursor() as cur:
+        cur.execute("SELECT COUNT(*) FROM cache_teste")
+        assert cur.fetchone()[0] == 1
+    assert versao.atual() == inicial + 1
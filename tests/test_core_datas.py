@@ -0,0 +1,89 @@
+# tests/test_core_datas.py
+from datetime import UTC, date, datetime
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from app_colaboradores.models import Colaborador
+from app_core import datas
+from app_entregas.models import Entrega
+from app_entregas.services import entrega_em_lote
+from app_epis.models import EPI, CategoriaEPI
+from app_relatorios.filtros import filtra_entregas
+from app_relatorios.forms import RelatorioEntregasForm
+
+
+def _local(*args):
+    return timezone.make_aware(datetime(*args))
+
+
+def test_periodo_vira_intervalo_semiaberto_no_fuso_local():
+    assert datas.intervalo(date(2025, 3, 1), date(2025, 3, 31)) == (
+        _local(2025, 3, 1),
+        _local(2025, 4, 1),
+    )
+    assert datas.intervalo(ate=date(2025, 3, 1)) == (None, _local(2025, 3, 2))
+    assert datas.intervalo_mes(date(2024, 12, 15)) == (_local(2024, 12, 1), _local(2025, 1, 1))
+    assert datas.intervalo_mes(date(2024, 2, 29)) == (_local(2024, 2, 1), _local(2024, 3, 1))
+    assert str(datas.filtro_periodo("data_entrega")) == "(AND: )"
+
+
+@pytest.fixture
+def cenario():
+    cat = CategoriaEPI.objects.create(nome="Proteção")
+    epi = EPI.objects.create(codigo="L1", nome="Luva", categoria=cat, estoque=10)
+    col = Colaborador.objects.create(nome="Ana", email="a@x.com", matricula="A1")
+    return epi, col
+
+
+@pytest.mark.django_db
+def test_data_local_mantida_no_save_e_no_lote(cenario):
+    """
+    23h30 em São Paulo já é o dia seguinte em UTC: a coluna guarda o dia
+    local. update_fields com data_entrega também a atualiza.
+    """
+    epi, col = cenario
+    noite = _local(2025, 3, 10, 23, 30)
+    entrega = Entrega.objects.create(colaborador=col, epi=epi, data_entrega=noite)
+    assert noite.astimezone(UTC).date() == date(2025, 3, 11)
+    assert entrega.data_entrega_local == date(2025, 3, 10)
+
+    entrega.data_entrega = _local(2025, 3, 12, 8)
+    entrega.save(update_fields=["data_entrega"])
+    entrega.refresh_from_db()
+    assert entrega.data_entrega_local == date(2025, 3, 12)
+
+    entrega_em_lote([col.pk], epi.pk, 1)
+    assert Entrega.objects.filter(data_entrega_local=timezone.localdate()).count() == 1
+
+
+@pytest.mark.django_db
+def test_filtros_de_periodo_sem_funcao_na_coluna(client, admin_user, cenario):
+    """
+    data_ate inclui o dia inteiro (até 23h59 local) e nada do dia seguinte;
+    nem o relatório nem a home aplicam conversão de fuso/DATE() na coluna.
+    """
+    epi, col = cenario
+    for instante in [
+        _local(2025, 3, 9, 23, 59),
+        _local(2025, 3, 10, 0, 0),
+        _local(2025, 3, 10, 23, 30),
+        _local(2025, 3, 11, 0, 0),
+    ]:
+        Entrega.objects.create(colaborador=col, epi=epi, data_entrega=instante)
+
+    form = RelatorioEntregasForm({"data_de": "2025-03-10", "data_ate": "2025-03-10"})
+    qs = filtra_entregas(form)
+    assert sorted(e.data_entrega for e in qs) == [
+        _local(2025, 3, 10, 0, 0),
+        _local(2025, 3, 10, 23, 30),
+    ]
+    assert "django_datetime" not in str(qs.query)
+
+    client.force_login(admin_user)
+    with CaptureQueriesContext(connection) as ctx:
+        assert client.get(reverse("app_core:home")).status_code == 200
+    assert not any("django_datetime" in q["sql"] for q in ctx.captured_queries)
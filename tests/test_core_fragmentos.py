@@ -0,0 +1,58 @@
+# tests/test_core_fragmentos.py
+import pytest
+from django.contrib.auth.models import Permission, User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from app_colaboradores.models import Colaborador
+from app_entregas.models import Entrega
+from app_epis.models import EPI, CategoriaEPI
+
+FRAGMENTO = {"HTTP_X_FRAGMENTO": "1"}
+
+
+@pytest.fixture
+def cenario(client):
+    cat = CategoriaEPI.objects.create(nome="Luvas")
+    epi = EPI.objects.create(codigo="L1", nome="Luva nitrílica", categoria=cat, estoque=10)
+    col = Colaborador.objects.create(nome="Ana Souza", email="a@x.com", matricula="A1")
+    Entrega.objects.create(colaborador=col, epi=epi, quantidade=1)
+    u = User.objects.create_user("almox", password="x")
+    u.user_permissions.add(*Permission.objects.filter(codename__in=["view_colaborador"]))
+    client.force_login(u)
+    return client
+
+
+@pytest.mark.parametrize(
+    "url_name, texto",
+    [
+        ("app_entregas:lista", "Ana Souza"),
+        ("app_epis:lista", "Luva nitrílica"),
+        ("app_colaboradores:lista", "Ana Souza"),
+    ],
+)
+@pytest.mark.django_db
+def test_fragmento_traz_so_a_tabela(cenario, url_name, texto):
+    """
+    Com o header, a resposta é só a tabela/paginação: sem layout nem filtros.
+    Sem o header, a página inteira continua igual.
+    """
+    url = reverse(url_name)
+    r = cenario.get(url, **FRAGMENTO)
+    html = r.content.decode()
+    assert r.status_code == 200
+    assert texto in html and "<table" in html
+    assert "<html" not in html and 'method="get"' not in html
+    assert "X-Fragmento" in r["Vary"]
+
+    pagina = cenario.get(url).content.decode()
+    assert "<html" in pagina and "data-fragmento-alvo" in pagina
+
+
+@pytest.mark.django_db
+def test_fragmento_da_lista_de_epis_nao_consulta_categorias(cenario):
+    """O fragmento pula o que só o formulário usa (categorias dos filtros)."""
+    with CaptureQueriesContext(connection) as ctx:
+        cenario.get(reverse("app_epis:lista"), **FRAGMENTO)
+    assert not any("app_epis_categoriaepi" in q["sql"] and "DISTINCT" in q["sql"] for q in ctx)
@@ -0,0 +1,118 @@
+# tests/test_core_paginador_aproximado.py
+from types import SimpleNamespace
+
+import pytest
+from django.contrib.auth.models import Permission, User
+from django.core.paginator import EmptyPage
+from django.db import connection
+from django.urls import reverse
+
+from app_colaboradores.models import Colaborador
+from app_core.paginacao import (
+    PaginadorAproximado,
+    _estimativa_plano,
+    contagem_aproximada,
+)
+
+
+def _colaboradores(n):
+    Colaborador.objects.bulk_create(
+        Colaborador(nome=f"C{i:03}", email=f"c{i}@x.com", matricula=f"M{i:03}", ativo=i % 2 == 0)
+        for i in range(n)
+    )
+
+
+@pytest.mark.django_db
+def test_abaixo_do_limite_conta_exato():
+    _colaboradores(15)
+    p = PaginadorAproximado(Colaborador.objects.order_by("id"), 10)
+    assert (p.count, p.exato, p.num_pages) == (15, True, 2)
+
+
+@pytest.mark.django_db
+def test_tabela_grande_usa_estatistica_sem_filtro():
+    """
+    Acima do limite, sem filtro, o total vem do sqlite_stat1 (após ANALYZE),
+    mesmo que a tabela tenha mudado desde então.
+    """
+    if connection.vendor != "sqlite":
+        pytest.skip("ANALYZE/sqlite_stat1 são específicos do SQLite")
+    _colaboradores(30)
+    with connection.cursor() as cur:
+        cur.execute("ANALYZE")
+    Colaborador.objects.create(nome="Novo", email="n@x.com", matricula="N1", ativo=False)
+
+    assert contagem_aproximada(Colaborador.objects.all(), limite=10) == (30, False)
+    # Com filtro o SQLite não estima: cai no COUNT(*) exato.
+    assert contagem_aproximada(Colaborador.objects.filter(ativo=True), limite=10) == (15, True)
+
+
+@pytest.mark.django_db
+def test_lista_exibe_total_aproximado(client, monkeypatch):
+    if connection.vendor != "sqlite":
+        pytest.skip("ANALYZE/sqlite_stat1 são específicos do SQLite")
+    _colaboradores(25)
+    with connection.cursor() as cur:
+        cur.execute("ANALYZE")
+    monkeypatch.setattr(PaginadorAproximado, "limite_exato", 10)
+    u = User.objects.create_user("rh", password="x")
+    u.user_permissions.add(Permission.objects.get(codename="view_colaborador"))
+    client.force_login(u)
+
+    r = client.get(reverse("app_colaboradores:lista"))
+    assert "~25 resultados" in r.content.decode()
+    assert "Página 1 de ~3" in r.content.decode()
+
+
+@pytest.mark.django_db
+def test_estimativa_baixa_nao_esconde_paginas_reais():
+    """
+    Estatística desatualizada (30 linhas para 50 reais): as páginas além da
+    estimativa continuam acessíveis e `has_next` vem das linhas buscadas.
+    """
+    if connection.vendor != "sqlite":
+        pytest.skip("ANALYZE/sqlite_stat1 são específicos do SQLite")
+    _colaboradores(30)
+    with connection.cursor() as cur:
+        cur.execute("ANALYZE")
+    Colaborador.objects.bulk_create(
+        Colaborador(nome=f"D{i:03}", email=f"d{i}@x.com", matricula=f"D{i:03}") for i in range(20)
+    )
+    p = PaginadorAproximado(Colaborador.objects.order_by("id"), 10)
+    p.limite_exato = 10
+    assert (p.count, p.exato) == (30, False)
+
+    terceira = p.page(3)
+    assert terceira.has_next()
+    quinta = p.page(5)
+    assert [c.nome for c in quinta][-1] == "D019"
+    assert not quinta.has_next()
+    assert (quinta.start_index(), quinta.end_index()) == (41, 50)
+    assert p.num_pages == 5
+    with pytest.raises(EmptyPage):
+        p.page(6)
+
+
+def test_estimativa_do_plano_ignora_subconsultas():
+    """Só as linhas do SELECT principal entram no produto das estimativas do EXPLAIN."""
+
+    class Cursor:
+        description = [("id",), ("select_type",), ("rows",), ("filtered",)]
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def execute(self, sql, params):
+            pass
+
+        def fetchall(self):
+            return [
+                (1, "PRIMARY", 2000, 50.0),
+                (2, "DEPENDENT SUBQUERY", 300, 100.0),
+            ]
+
+    conn = SimpleNamespace(vendor="mysql", cursor=Cursor)
+    assert _estimativa_plano(conn, Colaborador.objects.filter(ativo=True)) == 1000
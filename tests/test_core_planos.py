@@ -0,0 +1,53 @@
+# tests/test_core_planos.py
+import pytest
+from django.db import connection
+
+from app_core import planos
+
+
+@pytest.mark.django_db
+def test_planos_iguais_ao_snapshot():
+    """
+    As consultas das telas principais mantêm os planos do snapshot (índices
+    usados, sem novas varreduras). Se a mudança for intencional, atualize com
+    `python manage.py analisar_consultas --atualizar`.
+    """
+    snapshot = planos.le_snapshot(connection.vendor)
+    if snapshot is None:
+        pytest.skip(f"Sem snapshot de planos para {connection.vendor}")
+    atual = planos.analisa(planos.semear())
+    assert planos.regressoes(atual, snapshot) == []
+
+
+@pytest.mark.django_db
+def test_consultas_filtradas_por_status_usam_indice():
+    if connection.vendor != "sqlite":
+        pytest.skip("Nomes de índice do plano dependem do banco")
+    atual = planos.analisa(planos.semear(entregas=50))
+    assert any(
+        "solicitacao_status_criado_idx" in c["indices"] for c in atual["solicitacoes_gerenciar"]
+    )
+    assert "entrega_status_data_idx" in atual["entregas_lista_status"][0]["indices"]
+    assert planos.sugere_indices(atual) == []
+
+
+def test_sugere_indice_composto_para_varredura():
+    """Igualdades do WHERE seguidas do ORDER BY; prefixos redundantes somem."""
+    base = '"app_entregas_solicitacao"'
+    sql = (
+        f"SELECT * FROM {base} WHERE {base}.\"status\" = 'PENDENTE' "
+        f'ORDER BY {base}."criado_em" DESC'
+    )
+    contagem = f"SELECT COUNT(*) FROM {base} WHERE {base}.\"status\" = 'PENDENTE'"
+    consulta = {"varreduras": ["app_entregas_solicitacao"], "indices": []}
+    atual = {
+        "x": [
+            {"sql": contagem, **consulta, "ordenacao_temporaria": False},
+            {"sql": sql, **consulta, "ordenacao_temporaria": True},
+        ]
+    }
+    sugestoes = planos.sugere_indices(atual)
+    # status+criado_em já existe (solicitacao_status_criado_idx): nada a sugerir.
+    assert sugestoes == []
+    atual["x"][1]["sql"] = sql.replace('"criado_em"', '"quantidade"')
+    assert planos.sugere_indices(atual) == [("app_entregas.Solicitacao", ["status", "quantidade"])]
@@ -0,0 +1,75 @@
+# tests/test_entregas_facetas.py
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+
+from app_colaboradores.models import Colaborador
+from app_entregas import facetas
+from app_entregas.models import Entrega
+from app_entregas.services import entrega_em_lote
+from app_epis.models import EPI, CategoriaEPI
+
+
+@pytest.fixture
+def cenario():
+    cache.clear()
+    cat = CategoriaEPI.objects.create(nome="Proteção")
+    luva = EPI.objects.create(codigo="L1", nome="Luva", categoria=cat, estoque=100)
+    bota = EPI.objects.create(codigo="B1", nome="Bota", categoria=cat, estoque=100)
+    ana = Colaborador.objects.create(nome="Ana", email="a@x.com", matricula="A1")
+    bia = Colaborador.objects.create(nome="Bia", email="b@x.com", matricula="B1")
+    for col, epi, status in [
+        (ana, luva, "EMPRESTADO"),
+        (ana, luva, "DEVOLVIDO"),
+        (ana, bota, "EMPRESTADO"),
+        (bia, luva, "EMPRESTADO"),
+    ]:
+        Entrega.objects.create(colaborador=col, epi=epi, status=status, quantidade=1)
+    yield luva, bota, ana, bia
+    cache.clear()
+
+
+def _totais(resultado, dimensao):
+    return {f["rotulo"]: f["total"] for f in resultado[dimensao]}
+
+
+@pytest.mark.django_db
+def test_facetas_ignoram_o_proprio_filtro(cenario, django_assert_num_queries):
+    """
+    Com status=EMPRESTADO, a faceta de status ainda mostra os demais status,
+    e as outras facetas contam só as EMPRESTADAS. Uma consulta por dimensão.
+    """
+    filtros = facetas.filtros_da_requisicao({"status": "EMPRESTADO"})
+    with django_assert_num_queries(len(facetas.DIMENSOES)):
+        resultado = facetas.calcula(filtros)
+    assert _totais(resultado, "status") == {"Emprestado": 3, "Devolvido": 1}
+    assert _totais(resultado, "epi") == {"Luva (L1)": 2, "Bota (B1)": 1}
+    assert _totais(resultado, "colaborador") == {"Ana": 2, "Bia": 1}
+
+
+@pytest.mark.django_db
+def test_cache_e_invalidacao(
+    cenario, django_assert_num_queries, django_capture_on_commit_callbacks
+):
+    """
+    A segunda leitura vem do cache; criar entregas (inclusive em lote) invalida.
+    """
+    luva, _, ana, bia = cenario
+    filtros = facetas.filtros_da_requisicao({})
+    facetas.facetas(filtros)
+    with django_assert_num_queries(0):
+        facetas.facetas(filtros)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        entrega_em_lote([ana.pk, bia.pk], luva.pk, 1)
+    assert _totais(facetas.facetas(filtros), "epi")["Luva (L1)"] == 5
+
+
+@pytest.mark.django_db
+def test_lista_mostra_facetas_com_links(client, cenario):
+    luva, *_ = cenario
+    r = client.get(reverse("app_entregas:lista"), {"epi": luva.pk})
+    itens = {f["rotulo"]: f for f in r.context["facetas"]["epi"]}
+    assert itens["Luva (L1)"]["ativo"] and "epi=" not in itens["Luva (L1)"]["query"]
+    assert f"epi={cenario[1].pk}" in itens["Bota (B1)"]["query"]
+    assert "Luva (L1) <span" in r.content.decode()
@@ -0,0 +1,142 @@
+# tests/test_entregas_fatias_estoque.py
+import io
+
+import pytest
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db.models import QuerySet
+from django.urls import reverse
+
+from app_colaboradores.models import Colaborador
+from app_entregas.models import FatiaEstoque, MovimentacaoEstoque, Solicitacao
+from app_entregas.services import (
+    ajusta_estoque,
+    altera_status_solicitacao,
+    fatiar_estoque,
+    rebalancear_fatias,
+    saldo_estoque,
+)
+from app_epis.models import EPI, CategoriaEPI
+
+
+@pytest.fixture
+def epi():
+    cache.clear()
+    cat = CategoriaEPI.objects.create(nome="Descartáveis")
+    epi = EPI.objects.create(codigo="LUV-D", nome="Luva descartável", categoria=cat, estoque=10)
+    yield epi
+    cache.clear()
+
+
+@pytest.mark.django_db
+def test_fatiar_reparte_e_movimenta_so_as_fatias(epi):
+    """
+    O saldo vai para as fatias; saídas e entradas não tocam a linha do EPI.
+    """
+    fatiar_estoque(epi.pk, 4)
+    assert sorted(FatiaEstoque.objects.values_list("saldo", flat=True)) == [2, 2, 3, 3]
+
+    ajusta_estoque(epi.pk, -2)
+    ajusta_estoque(epi.pk, 5)
+    epi.refresh_from_db()
+    assert epi.estoque == 0
+    assert saldo_estoque(epi.pk) == 13
+    assert MovimentacaoEstoque.objects.filter(epi=epi, compactada=True).count() == 2
+
+
+@pytest.mark.django_db
+def test_saida_maior_que_qualquer_fatia_usa_caminho_lento(epi):
+    """
+    Nenhuma fatia tem 9 unidades, mas o total cobre: a saída consome várias
+    fatias sem deixar nenhuma negativa. Acima do total, falha.
+    """
+    fatiar_estoque(epi.pk, 4)
+    ajusta_estoque(epi.pk, -9)
+    assert saldo_estoque(epi.pk) == 1
+    assert not FatiaEstoque.objects.filter(saldo__lt=0).exists()
+
+    with pytest.raises(ValidationError):
+        ajusta_estoque(epi.pk, -2)
+    assert saldo_estoque(epi.pk) == 1
+
+
+@pytest.mark.django_db
+def test_rebalancear_e_desligar(epi):
+    """
+    Rebalancear iguala as fatias; desligar devolve tudo a EPI.estoque.
+    """
+    fatiar_estoque(epi.pk, 2)
+    FatiaEstoque.objects.filter(epi=epi, indice=0).update(saldo=0)
+    FatiaEstoque.objects.filter(epi=epi, indice=1).update(saldo=8)
+    assert rebalancear_fatias(epi.pk) == 8
+    assert list(FatiaEstoque.objects.values_list("saldo", flat=True)) == [4, 4]
+
+    call_command("fatiar_estoque", str(epi.pk), "--fatias", "0")
+    epi.refresh_from_db()
+    assert epi.estoque == 8
+    assert not FatiaEstoque.objects.exists()
+
+
+@pytest.mark.django_db
+def test_rebalancear_pula_a_rodada_com_fatia_em_uso(epi, monkeypatch):
+    """
+    Uma fatia travada por uma saída (skip_locked a deixa de fora) faz o
+    rebalanceamento pular a rodada em vez de esperar: nada é alterado.
+    """
+    fatiar_estoque(epi.pk, 2)
+    FatiaEstoque.objects.filter(epi=epi, indice=1).update(saldo=10)
+    FatiaEstoque.objects.filter(epi=epi, indice=0).update(saldo=0)
+    original = QuerySet.select_for_update
+
+    def simula_fatia_travada(qs, *args, **kwargs):
+        qs = original(qs, *args, **kwargs)
+        if qs.model is FatiaEstoque and kwargs.get("skip_locked"):
+            qs = qs.exclude(indice=0)
+        return qs
+
+    monkeypatch.setattr(QuerySet, "select_for_update", simula_fatia_travada)
+    assert rebalancear_fatias(epi.pk) is None
+    assert list(FatiaEstoque.objects.order_by("indice").values_list("saldo", flat=True)) == [0, 10]
+
+    out = io.StringIO()
+    call_command("rebalancear_estoque", "--epi", str(epi.pk), stdout=out)
+    assert "pulados): 1" in out.getvalue()
+
+
+@pytest.mark.django_db
+def test_lista_de_epis_filtra_e_ordena_pelo_saldo_somado(client, epi):
+    """
+    A listagem mostra, filtra ("abaixo do mínimo") e ordena pelo saldo das
+    fatias, não pelo EPI.estoque zerado.
+    """
+    EPI.objects.filter(pk=epi.pk).update(estoque_minimo=5)
+    outro = EPI.objects.create(
+        codigo="LUV-X", nome="Luva X", categoria=epi.categoria, estoque=3, estoque_minimo=5
+    )
+    fatiar_estoque(epi.pk, 3)
+    url = reverse("app_epis:lista")
+
+    r = client.get(url, {"ordenar": "-estoque"})
+    assert [(e.pk, e.saldo, e.abaixo_min) for e in r.context["epis"]] == [
+        (epi.pk, 10, False),
+        (outro.pk, 3, True),
+    ]
+    assert [e.pk for e in client.get(url, {"abaixo": "1"}).context["epis"]] == [outro.pk]
+
+
+@pytest.mark.django_db
+def test_reserva_de_epi_fatiado_usa_o_saldo_somado(epi):
+    """
+    Aprovar uma solicitação de EPI fatiado reserva contra o saldo das fatias
+    (a linha do EPI está zerada); acima do disponível, recusa.
+    """
+    col = Colaborador.objects.create(nome="Ana", email="a@x.com", matricula="A1")
+    fatiar_estoque(epi.pk, 3)
+    s1, s2 = (Solicitacao.objects.create(colaborador=col, epi=epi, quantidade=6) for _ in "12")
+
+    altera_status_solicitacao(s1, Solicitacao.Status.APROVADA)
+    with pytest.raises(ValidationError):
+        altera_status_solicitacao(s2, Solicitacao.Status.APROVADA)
+    epi.refresh_from_db()
+    assert (epi.estoque, epi.reservado) == (0, 6)
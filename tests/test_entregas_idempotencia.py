@@ -0,0 +1,102 @@
+# tests/test_entregas_idempotencia.py
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth.models import Permission, User
+from django.urls import reverse
+from django.utils import timezone
+
+from app_colaboradores.models import Colaborador
+from app_entregas.models import ChaveIdempotencia, Entrega, MovimentacaoEstoque
+from app_epis.models import EPI, CategoriaEPI
+
+
+def _login(client, *codenames):
+    u = User.objects.create_user("almox", password="x")
+    u.user_permissions.add(*Permission.objects.filter(codename__in=codenames))
+    client.force_login(u)
+    return u
+
+
+@pytest.fixture
+def cenario():
+    cat = CategoriaEPI.objects.create(nome="Luvas")
+    epi = EPI.objects.create(codigo="L1", nome="Luva", categoria=cat, estoque=10)
+    col = Colaborador.objects.create(nome="Z", email="z@x.com", matricula="Z1", ativo=True)
+    return epi, col
+
+
+def _dados(epi, col, **extra):
+    return {
+        "colaborador": col.pk,
+        "epi": epi.pk,
+        "quantidade": 2,
+        "status": Entrega.Status.EMPRESTADO,
+        "data_prevista_devolucao": (timezone.now() + timedelta(days=3)).strftime("%Y-%m-%dT%H:%M"),
+        **extra,
+    }
+
+
+@pytest.mark.django_db
+def test_criar_entrega_reenviada_nao_duplica(client, cenario):
+    """
+    O mesmo formulário enviado duas vezes cria uma única Entrega e baixa o
+    estoque uma vez; o reenvio recebe o mesmo redirect.
+    """
+    _login(client, "add_entrega")
+    epi, col = cenario
+    url = reverse("app_entregas:criar")
+    chave = client.get(url).context["chave_idempotencia"]
+
+    r1 = client.post(url, data=_dados(epi, col, chave_idempotencia=chave))
+    r2 = client.post(url, data=_dados(epi, col, chave_idempotencia=chave))
+
+    assert r1.status_code == r2.status_code == 302
+    assert r1["Location"] == r2["Location"]
+    assert Entrega.objects.count() == 1
+    epi.refresh_from_db()
+    assert epi.estoque == 8
+
+
+@pytest.mark.django_db
+def test_formulario_invalido_nao_consome_a_chave(client, cenario):
+    """
+    Falhas não são guardadas: corrigir o formulário e reenviar com a mesma chave funciona.
+    """
+    _login(client, "add_entrega")
+    epi, col = cenario
+    url = reverse("app_entregas:criar")
+
+    r = client.post(url, data=_dados(epi, col, quantidade=50, chave_idempotencia="abc"))
+    assert r.status_code == 200
+    assert not ChaveIdempotencia.objects.exists()
+
+    r = client.post(url, data=_dados(epi, col, chave_idempotencia="abc"))
+    assert r.status_code == 302
+    assert Entrega.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_marcar_devolvido_reenviado_nao_relanca(client, cenario):
+    """
+    Reenvio de "Devolver" (mesma chave) não gera novo lançamento de estoque.
+    Sem chave, o comportamento é o de sempre.
+    """
+    _login(client, "change_entrega")
+    epi, col = cenario
+    e = Entrega.objects.create(
+        colaborador=col,
+        epi=epi,
+        quantidade=1,
+        status=Entrega.Status.EMPRESTADO,
+        data_prevista_devolucao=timezone.now() + timedelta(days=1),
+    )
+    url = reverse("app_entregas:marcar_devolvido", args=[e.pk])
+
+    client.post(url, data={"chave_idempotencia": "k1"})
+    movs = MovimentacaoEstoque.objects.count()
+    r = client.post(url, data={"chave_idempotencia": "k1"}, follow=True)
+
+    assert MovimentacaoEstoque.objects.count() == movs
+    assert "Entrega marcada como DEVOLVIDA" in r.content.decode()
+    assert ChaveIdempotencia.objects.count() == 1
@@ -8,7 +8,7 @@ from app_entregas.models import Entrega
 from app_epis.models import EPI, CategoriaEPI
 
 
-@pytest.mark.django_db
+@pytest.mark.django_db(transaction=True)
 def test_lista_filtra_por_q_colaborador_epi_status_e_monta_base_query(client, django_user_model):
     """
     Lista de entregas: aplica filtros por q/colaborador/epi/status e constrói 'base_query' sem 'page'.
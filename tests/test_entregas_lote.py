@@ -0,0 +1,162 @@
+# tests/test_entregas_lote.py
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth.models import Permission, User
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from app_colaboradores.models import Colaborador
+from app_entregas.forms import EntregaLoteForm
+from app_entregas.models import Entrega, MovimentacaoEstoque
+from app_entregas.services import entrega_em_lote, epis_fatiados
+from app_epis.models import EPI, CategoriaEPI
+
+
+@pytest.fixture
+def epi():
+    categoria = CategoriaEPI.objects.create(nome="Luvas")
+    return EPI.objects.create(codigo="L1", nome="Luva", categoria=categoria, estoque=5000)
+
+
+def criar_colaboradores(n, setor="Obra", cargo="Servente"):
+    return Colaborador.objects.bulk_create(
+        Colaborador(
+            nome=f"Colab {setor} {i}",
+            email=f"{setor.lower()}{i}@x.com",
+            matricula=f"{setor[:3].upper()}{i}",
+            setor=setor,
+            cargo=cargo,
+        )
+        for i in range(n)
+    )
+
+
+@pytest.mark.django_db
+def test_entrega_em_lote_mil_colaboradores_com_queries_constantes(epi):
+    """
+    1.200 destinatários: um único delta no estoque e INSERTs em lotes
+    (nenhuma query por colaborador além dos lotes de bulk_create).
+    """
+    criar_colaboradores(1200)
+    ids = list(Colaborador.objects.values_list("pk", flat=True))
+    epis_fatiados()  # aquece o cache dos contadores fatiados
+
+    with CaptureQueriesContext(connection) as ctx:
+        total = entrega_em_lote(ids, epi.pk, quantidade=2, status=Entrega.Status.FORNECIDO)
+    inserts = [q for q in ctx.captured_queries if 'INSERT INTO "app_entregas_entrega"' in q["sql"]]
+    resumo = [q for q in ctx.captured_queries if '"app_relatorios_resumodiarioentrega"' in q["sql"]]
+    assert len(inserts) < 1200 / 50
+    assert len(resumo) <= len(inserts)  # resumo diário: também em lotes
+    # inclui o evento do outbox e o savepoint do resumo diário
+    assert len(ctx.captured_queries) - len(inserts) - len(resumo) <= 11
+
+    assert total == 1200
+    assert Entrega.objects.filter(epi=epi).count() == 1200
+    epi.refresh_from_db()
+    assert epi.estoque == 5000 - 2400
+    assert MovimentacaoEstoque.objects.get().quantidade == -2400
+
+
+@pytest.mark.django_db
+def test_entrega_em_lote_estoque_insuficiente_nao_cria_nada(epi):
+    """
+    Se o estoque não cobre o lote inteiro, nenhuma entrega é criada.
+    """
+    criar_colaboradores(3)
+    ids = list(Colaborador.objects.values_list("pk", flat=True))
+    EPI.objects.filter(pk=epi.pk).update(estoque=5)
+
+    with pytest.raises(ValidationError):
+        entrega_em_lote(ids, epi.pk, quantidade=2, status=Entrega.Status.FORNECIDO)
+
+    assert not Entrega.objects.exists()
+    epi.refresh_from_db()
+    assert epi.estoque == 5
+
+
+@pytest.mark.django_db
+def test_view_entrega_lote_por_setor(client, epi):
+    """
+    A tela de entrega em lote atende todos os colaboradores ativos do setor
+    escolhido (mais os selecionados explicitamente).
+    """
+    usuario = User.objects.create_user("almox", password="x")
+    usuario.user_permissions.add(Permission.objects.get(codename="add_entrega"))
+    client.force_login(usuario)
+
+    criar_colaboradores(4, setor="Obra")
+    extra = criar_colaboradores(2, setor="Escritorio", cargo="Analista")
+    inativo = Colaborador.objects.get(matricula="OBR0")
+    inativo.ativo = False
+    inativo.save()
+
+    url = reverse("app_entregas:criar_lote")
+    assert client.get(url).status_code == 200
+
+    resp = client.post(
+        url,
+        data={
+            "epi": epi.pk,
+            "quantidade": 1,
+            "status": Entrega.Status.EMPRESTADO,
+            "data_prevista_devolucao": (timezone.now() + timedelta(days=3)).strftime(
+                "%Y-%m-%dT%H:%M"
+            ),
+            "setor": "Obra",
+            "colaboradores": [Colaborador.objects.get(matricula=extra[0].matricula).pk],
+        },
+        follow=True,
+    )
+    assert resp.status_code == 200
+    assert Entrega.objects.count() == 3 + 1
+    assert not Entrega.objects.filter(colaborador=inativo).exists()
+    epi.refresh_from_db()
+    assert epi.estoque == 5000 - 4
+
+
+@pytest.mark.django_db
+def test_view_entrega_lote_exige_criterio(client, epi):
+    """
+    Sem setor, cargo ou lista de colaboradores o formulário é inválido.
+    """
+    usuario = User.objects.create_user("almox", password="x")
+    usuario.user_permissions.add(Permission.objects.get(codename="add_entrega"))
+    client.force_login(usuario)
+
+    resp = client.post(
+        reverse("app_entregas:criar_lote"),
+        data={"epi": epi.pk, "quantidade": 1, "status": Entrega.Status.FORNECIDO},
+    )
+    assert resp.status_code == 200
+    assert resp.context["form"].non_field_errors()
+    assert not Entrega.objects.exists()
+
+
+@pytest.mark.django_db
+def test_form_lote_renderiza_so_os_escolhidos_e_valida_ids(epi):
+    """
+    EPI e colaboradores usam o autocomplete: o HTML traz só as opções
+    escolhidas, e ids fora do queryset (inativos) continuam rejeitados.
+    """
+    ativos = criar_colaboradores(30)
+    inativo = Colaborador.objects.create(nome="Inativo", matricula="X1", ativo=False)
+
+    html = str(EntregaLoteForm()["colaboradores"])
+    assert "data-autocomplete" in html and "multiple" in html
+    assert "<option" not in html
+    assert "<option" in str(EntregaLoteForm()["epi"])  # só a opção vazia
+    assert epi.nome not in str(EntregaLoteForm()["epi"])
+
+    dados = {"epi": epi.pk, "quantidade": 1, "status": Entrega.Status.FORNECIDO}
+    form = EntregaLoteForm(data={**dados, "colaboradores": [ativos[0].pk, ativos[1].pk]})
+    assert form.is_valid(), form.errors
+    html = str(form["colaboradores"])
+    assert html.count("<option") == 2 and html.count("selected") == 2
+
+    form = EntregaLoteForm(data={**dados, "colaboradores": [inativo.pk]})
+    assert not form.is_valid()
+    assert "colaboradores" in form.errors
@@ -0,0 +1,176 @@
+# tests/test_entregas_movimentacao_estoque.py
+import io
+
+import pytest
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from app_colaboradores.models import Colaborador
+from app_entregas.models import Entrega, EventoOutbox, MovimentacaoEstoque, Solicitacao
+from app_entregas.services import (
+    ajusta_estoque,
+    anota_saldo,
+    compactar_movimentacoes,
+    movimenta_por_entrega,
+    movimenta_por_exclusao,
+    saldo_estoque,
+)
+from app_epis.models import EPI, CategoriaEPI
+
+
+@pytest.fixture
+def epi():
+    categoria = CategoriaEPI.objects.create(nome="Luvas")
+    return EPI.objects.create(codigo="L1", nome="Luva", categoria=categoria, estoque=10)
+
+
+@pytest.fixture
+def colaborador():
+    return Colaborador.objects.create(nome="Ana", email="ana@x.com", matricula="A1")
+
+
+@pytest.mark.django_db
+def test_engine_imediato_registra_lancamento_compactado(epi, colaborador):
+    """
+    No modo padrão o estoque é atualizado na hora e cada movimentação
+    fica registrada no livro-razão já compactada.
+    """
+    entrega = Entrega.objects.create(
+        colaborador=colaborador, epi=epi, quantidade=3, status=Entrega.Status.EMPRESTADO
+    )
+    movimenta_por_entrega(entrega, antiga=None)
+
+    epi.refresh_from_db()
+    assert epi.estoque == 7
+    mov = MovimentacaoEstoque.objects.get()
+    assert mov.quantidade == -3
+    assert mov.tipo == MovimentacaoEstoque.Tipo.SAIDA
+    assert mov.origem == MovimentacaoEstoque.Origem.ENTREGA
+    assert mov.entrega_id == entrega.pk
+    assert mov.compactada is True
+    assert saldo_estoque(epi.pk) == 7
+
+
+@pytest.mark.django_db
+def test_exclusao_mantem_historico_e_origem_solicitacao(epi, colaborador):
+    """
+    Lançamentos de entregas vindas de solicitação têm origem SOLICITACAO, e
+    excluir a entrega preserva o histórico (FK fica nula).
+    """
+    s = Solicitacao.objects.create(colaborador=colaborador, epi=epi, quantidade=2)
+    entrega = Entrega.objects.create(colaborador=colaborador, epi=epi, quantidade=2, solicitacao=s)
+    movimenta_por_entrega(entrega, antiga=None)
+    movimenta_por_exclusao(entrega)
+    entrega.delete()
+
+    movs = list(MovimentacaoEstoque.objects.order_by("id"))
+    assert [m.quantidade for m in movs] == [-2, 2]
+    assert {m.origem for m in movs} == {MovimentacaoEstoque.Origem.SOLICITACAO}
+    assert all(m.entrega_id is None for m in movs)
+    epi.refresh_from_db()
+    assert epi.estoque == 10
+
+
+@pytest.mark.django_db
+def test_engine_ledger_entradas_pendentes_e_saidas_condicionais(settings, epi, colaborador):
+    """
+    No modo ledger as entradas só entram no livro-razão (pendentes até
+    `compactar_estoque`); as saídas são um UPDATE condicional no snapshot, sem
+    travar o EPI, e compactam o EPI só quando o snapshot sozinho não cobre.
+    """
+    settings.ESTOQUE_ENGINE = "ledger"
+    with CaptureQueriesContext(connection) as ctx:
+        movimenta_por_entrega(Entrega(colaborador=colaborador, epi=epi, quantidade=2), antiga=None)
+    sqls = [q["sql"] for q in ctx.captured_queries if "SAVEPOINT" not in q["sql"]]
+    assert [sql.split()[0] for sql in sqls] == ["UPDATE", "INSERT", "INSERT"]
+    for _ in range(2):
+        movimenta_por_entrega(Entrega(colaborador=colaborador, epi=epi, quantidade=2), antiga=None)
+    ajusta_estoque(epi.pk, 5, observacao="Inventário")
+
+    epi.refresh_from_db()
+    assert epi.estoque == 4
+    assert saldo_estoque(epi.pk) == 10 - 6 + 5
+    assert MovimentacaoEstoque.objects.filter(compactada=False).count() == 1
+
+    with pytest.raises(ValidationError):
+        movimenta_por_entrega(Entrega(colaborador=colaborador, epi=epi, quantidade=10), antiga=None)
+    assert MovimentacaoEstoque.objects.filter(compactada=False).count() == 1
+
+    # O snapshot (4) não cobre 6: compacta a entrada pendente e aplica a saída.
+    movimenta_por_entrega(Entrega(colaborador=colaborador, epi=epi, quantidade=6), antiga=None)
+    epi.refresh_from_db()
+    assert epi.estoque == 3
+    assert saldo_estoque(epi.pk) == 3
+    assert not MovimentacaoEstoque.objects.filter(compactada=False).exists()
+    assert compactar_movimentacoes() == 0
+
+    ajusta_estoque(epi.pk, 2)
+    call_command("compactar_estoque")
+    epi.refresh_from_db()
+    assert epi.estoque == 5
+
+
+@pytest.mark.django_db
+def test_engine_ledger_telas_e_api_leem_o_saldo_do_livro_razao(
+    settings, client, admin_user, epi, colaborador
+):
+    """
+    Com lançamentos ainda não compactados, lista de EPIs, home e API mostram
+    o saldo do livro-razão, não a coluna EPI.estoque.
+    """
+    settings.ESTOQUE_ENGINE = "ledger"
+    ajusta_estoque(epi.pk, -4)
+    ajusta_estoque(epi.pk, 3)
+    epi.refresh_from_db()
+    assert epi.estoque == 6
+
+    assert anota_saldo(EPI.objects.filter(pk=epi.pk)).get().saldo == 9
+    client.force_login(admin_user)
+    lista = client.get(reverse("app_epis:lista"))
+    assert [(e.pk, e.saldo, e.disponivel) for e in lista.context["epis"]] == [(epi.pk, 9, 9)]
+    assert client.get(reverse("app_core:home")).context["estoque_total"] == 9
+    api = client.get(reverse("app_api:listar", args=["epis"]), {"fields": "id,estoque"}).json()
+    assert api["resultados"] == [{"id": epi.pk, "estoque": 9}]
+
+
+@pytest.mark.django_db
+def test_engine_condicional_update_unico_e_sem_estoque_negativo(settings, epi, colaborador):
+    """
+    O engine condicional decrementa com um único UPDATE condicional (+ INSERT
+    no livro-razão) e recusa saídas que deixariam o estoque negativo.
+    """
+    settings.ESTOQUE_ENGINE = "condicional"
+    entrega = Entrega(colaborador=colaborador, epi=epi, quantidade=4)
+    with CaptureQueriesContext(connection) as ctx:
+        movimenta_por_entrega(entrega, antiga=None)
+    sqls = [q["sql"] for q in ctx.captured_queries if "SAVEPOINT" not in q["sql"]]
+    # UPDATE condicional + lançamento no livro-razão + evento no outbox
+    assert [sql.split()[0] for sql in sqls] == ["UPDATE", "INSERT", "INSERT"]
+    assert "app_entregas_eventooutbox" in sqls[2]
+    epi.refresh_from_db()
+    assert epi.estoque == 6
+
+    with pytest.raises(ValidationError):
+        movimenta_por_entrega(Entrega(colaborador=colaborador, epi=epi, quantidade=7))
+    epi.refresh_from_db()
+    assert epi.estoque == 6
+    assert MovimentacaoEstoque.objects.count() == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_bench_estoque_reporta_engines_e_remove_epi_de_teste():
+    """
+    O benchmark roda todos os engines pelo _apply_delta (com outbox), confere o
+    saldo final de cada um e limpa o EPI e os eventos criados.
+    """
+    out = io.StringIO()
+    call_command("bench_estoque", workers=2, ops=3, stdout=out)
+    saida = out.getvalue()
+    for engine in ("imediato", "condicional", "ledger"):
+        assert engine in saida
+    assert saida.count("ok") == 3
+    assert not EPI.objects.filter(codigo="BENCH-ESTOQUE").exists()
+    assert not EventoOutbox.objects.exists()
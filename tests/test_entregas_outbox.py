@@ -0,0 +1,112 @@
+# tests/test_entregas_outbox.py
+from datetime import timedelta
+
+import pytest
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.utils import timezone
+
+from app_entregas import outbox
+from app_entregas.models import EventoOutbox
+from app_entregas.services import ajusta_estoque
+from app_epis.models import EPI, CategoriaEPI
+
+
+@pytest.fixture
+def epi():
+    cat = CategoriaEPI.objects.create(nome="Luvas")
+    return EPI.objects.create(codigo="L1", nome="Luva", categoria=cat, estoque=5, estoque_minimo=3)
+
+
+@pytest.mark.django_db
+def test_evento_gravado_na_mesma_transacao(epi):
+    """
+    Movimentação bem-sucedida publica o evento; uma que falha não deixa evento.
+    """
+    ajusta_estoque(epi.pk, -1)
+    with pytest.raises(ValidationError):
+        ajusta_estoque(epi.pk, -50)
+
+    [evento] = EventoOutbox.objects.all()
+    assert evento.tipo == outbox.ESTOQUE_MOVIMENTADO
+    assert evento.payload["epi_id"] == epi.pk
+    assert evento.payload["delta"] == -1
+    assert evento.processado_em is None
+
+
+@pytest.mark.django_db
+def test_processar_outbox_consome_e_alerta_estoque_baixo(epi, caplog):
+    """
+    O worker processa os pendentes em lotes; saída que atinge o mínimo gera aviso.
+    """
+    ajusta_estoque(epi.pk, 1)
+    ajusta_estoque(epi.pk, -3)
+
+    call_command("processar_outbox", "--lote", "1")
+
+    assert not EventoOutbox.objects.filter(processado_em__isnull=True).exists()
+    assert "Estoque baixo" in caplog.text
+
+
+@pytest.mark.django_db
+def test_falha_no_consumidor_conta_tentativa(epi, monkeypatch):
+    """
+    Erro em um consumidor não derruba o lote: o evento fica pendente com o erro.
+    """
+
+    def quebra(payload):
+        raise RuntimeError("fora do ar")
+
+    monkeypatch.setitem(outbox._consumidores, "teste", [quebra])
+    outbox.publicar("teste", x=1)
+    ajusta_estoque(epi.pk, 1)
+
+    assert outbox.processar_lote() == (1, 1)
+    falho = EventoOutbox.objects.get(tipo="teste")
+    assert (falho.tentativas, falho.erro, falho.processado_em) == (1, "fora do ar", None)
+
+
+@pytest.mark.django_db
+def test_evento_com_falha_espera_o_backoff(monkeypatch):
+    """
+    Uma falha adia o evento: o lote seguinte não o repete até vencer a espera,
+    que dobra a cada tentativa.
+    """
+    chamadas = []
+
+    def quebra(payload):
+        chamadas.append(payload)
+        raise RuntimeError("fora do ar")
+
+    monkeypatch.setitem(outbox._consumidores, "teste", [quebra])
+    outbox.publicar("teste", x=1)
+
+    assert outbox.processar_lote() == (0, 1)
+    assert outbox.processar_lote() == (0, 0)
+    assert len(chamadas) == 1
+
+    evento = EventoOutbox.objects.get()
+    assert evento.proxima_tentativa > timezone.now()
+    EventoOutbox.objects.update(proxima_tentativa=timezone.now() - timedelta(seconds=1))
+    assert outbox.processar_lote() == (0, 1)
+    evento.refresh_from_db()
+    assert evento.tentativas == 2
+    assert evento.proxima_tentativa - timezone.now() > outbox.BACKOFF_BASE
+
+
+@pytest.mark.django_db
+def test_purga_apaga_so_processados_antigos(epi):
+    ajusta_estoque(epi.pk, 1)
+    ajusta_estoque(epi.pk, 1)
+    ajusta_estoque(epi.pk, 1)
+    outbox.processar_lote()
+    antigo, _, pendente = EventoOutbox.objects.order_by("id")
+    EventoOutbox.objects.filter(pk=antigo.pk).update(
+        processado_em=timezone.now() - timedelta(days=10)
+    )
+    EventoOutbox.objects.filter(pk=pendente.pk).update(processado_em=None)
+
+    call_command("processar_outbox", "--reter-dias", "7")
+
+    assert not EventoOutbox.objects.filter(pk=antigo.pk).exists()
+    assert EventoOutbox.objects.count() == 2
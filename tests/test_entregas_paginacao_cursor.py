@@ -0,0 +1,64 @@
+# tests/test_entregas_paginacao_cursor.py
+from datetime import timedelta
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from app_colaboradores.models import Colaborador
+from app_entregas.models import Entrega
+from app_epis.models import EPI, CategoriaEPI
+
+
+@pytest.fixture
+def entregas():
+    cat = CategoriaEPI.objects.create(nome="Luvas")
+    epi = EPI.objects.create(codigo="L1", nome="Luva", categoria=cat, estoque=100)
+    col = Colaborador.objects.create(nome="Ana", email="a@x.com", matricula="A1", ativo=True)
+    base = timezone.now()
+    # Datas repetidas de 3 em 3: o desempate por id precisa funcionar.
+    return [
+        Entrega.objects.create(
+            colaborador=col, epi=epi, quantidade=1, data_entrega=base - timedelta(hours=i // 3)
+        )
+        for i in range(25)
+    ]
+
+
+def _ids(resposta):
+    return [e.pk for e in resposta.context["entregas"]]
+
+
+@pytest.mark.django_db
+def test_cursor_percorre_todas_sem_repetir_e_volta(admin_client, entregas):
+    """
+    Avançar pelos cursores visita cada entrega uma vez, na ordem do modelo;
+    o cursor "anterior" devolve exatamente a página anterior.
+    """
+    url = reverse("app_entregas:lista")
+    esperado = list(Entrega.objects.values_list("pk", flat=True))
+
+    paginas, r = [], admin_client.get(url)
+    paginas.append(_ids(r))
+    while r.context["page_obj"].has_next():
+        r = admin_client.get(url, {"cursor": r.context["page_obj"].next_cursor})
+        paginas.append(_ids(r))
+
+    assert [len(p) for p in paginas] == [10, 10, 5]
+    assert sum(paginas, []) == esperado
+
+    r = admin_client.get(url, {"cursor": r.context["page_obj"].previous_cursor})
+    assert _ids(r) == paginas[1]
+
+
+@pytest.mark.django_db
+def test_cursor_invalido_volta_para_o_inicio_e_total_aproximado(admin_client, entregas):
+    """
+    Cursor adulterado não quebra a página; total=1 mostra a contagem limitada.
+    """
+    url = reverse("app_entregas:lista")
+    r = admin_client.get(url, {"cursor": "nao-e-um-cursor", "total": "1"})
+    assert r.status_code == 200
+    assert len(_ids(r)) == 10
+    assert r.context["total"] == (25, True)
+    assert "cursor=" not in r.context["base_query"]
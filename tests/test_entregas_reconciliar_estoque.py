@@ -0,0 +1,159 @@
+# tests/test_entregas_reconciliar_estoque.py
+import csv
+import io
+import json
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+
+from app_colaboradores.models import Colaborador
+from app_entregas.models import Entrega, MovimentacaoEstoque
+from app_entregas.services import fatiar_estoque, movimenta_por_entrega, saldo_estoque
+from app_epis.models import EPI, CategoriaEPI
+
+
+@pytest.fixture
+def cenario():
+    """
+    EPI A: uma entrega registrada pelo serviço (sem drift) e uma criada "por fora"
+    (como nos seeds), que não movimentou o estoque. EPI B: sem entregas.
+    Os dois têm o saldo inicial lançado no livro-razão.
+    """
+    cat = CategoriaEPI.objects.create(nome="Luvas")
+    epi_a = EPI.objects.create(codigo="L1", nome="Luva", categoria=cat, estoque=10)
+    epi_b = EPI.objects.create(codigo="L2", nome="Luva 2", categoria=cat, estoque=4)
+    for epi in (epi_a, epi_b):
+        MovimentacaoEstoque.objects.create(
+            epi=epi,
+            tipo=MovimentacaoEstoque.Tipo.ENTRADA,
+            origem=MovimentacaoEstoque.Origem.MANUAL,
+            quantidade=epi.estoque,
+            compactada=True,
+        )
+    col = Colaborador.objects.create(nome="Ana", email="a@x.com", matricula="A1")
+
+    ok = Entrega.objects.create(colaborador=col, epi=epi_a, quantidade=2)
+    movimenta_por_entrega(ok, antiga=None)
+    Entrega.objects.create(colaborador=col, epi=epi_a, quantidade=3)
+    Entrega.objects.create(
+        colaborador=col, epi=epi_a, quantidade=5, status=Entrega.Status.DEVOLVIDO
+    )
+    return epi_a, epi_b
+
+
+def _rodar(**kwargs):
+    out, err = io.StringIO(), io.StringIO()
+    call_command("reconciliar_estoque", stdout=out, stderr=err, **kwargs)
+    return out.getvalue(), err.getvalue()
+
+
+@pytest.mark.django_db
+def test_relatorio_csv_lista_somente_divergencias(cenario):
+    """
+    O relatório traz apenas EPIs com drift, usando as regras de _mov_value
+    (DEVOLVIDO não conta), e não altera nada sem --aplicar.
+    """
+    epi_a, _ = cenario
+    saida, _ = _rodar()
+    linhas = list(csv.reader(io.StringIO(saida), delimiter=";"))
+
+    assert linhas[0][0] == "epi_id"
+    assert len(linhas) == 2
+    assert linhas[1][0] == str(epi_a.pk)
+    assert linhas[1][-3:] == ["-5", "-2", "-3"]
+    epi_a.refresh_from_db()
+    assert epi_a.estoque == 8
+
+
+@pytest.mark.django_db
+def test_aplicar_corrige_e_zera_divergencia(cenario):
+    """
+    --aplicar lança o ajuste no livro-razão; uma nova execução não acha drift.
+    """
+    epi_a, _ = cenario
+    _, resumo = _rodar(aplicar=True, formato="json")
+    assert "corrigidos: 1" in resumo
+
+    epi_a.refresh_from_db()
+    assert epi_a.estoque == 5
+    ajuste = MovimentacaoEstoque.objects.get(
+        origem=MovimentacaoEstoque.Origem.ENTREGA, tipo=MovimentacaoEstoque.Tipo.AJUSTE
+    )
+    assert ajuste.quantidade == -3
+
+    saida, resumo = _rodar(formato="json", todos=True)
+    linhas = [json.loads(linha) for linha in saida.splitlines()]
+    assert {linha["drift"] for linha in linhas} == {0}
+    assert "divergência: 0" in resumo
+
+
+@pytest.mark.django_db
+def test_epi_fatiado_reporta_e_corrige_o_saldo_somado(cenario):
+    """
+    Com o estoque nas fatias, o relatório mostra o saldo somado e o ajuste
+    do --aplicar vai para as fatias, sem deixar nova divergência.
+    """
+    epi_a, _ = cenario
+    cache.clear()
+    fatiar_estoque(epi_a.pk, 4)
+
+    saida, _ = _rodar(formato="json")
+    [linha] = [json.loads(linha) for linha in saida.splitlines()]
+    assert (linha["estoque"], linha["drift"]) == (8, -3)
+
+    _rodar(aplicar=True)
+    epi_a.refresh_from_db()
+    assert (epi_a.estoque, saldo_estoque(epi_a.pk)) == (0, 5)
+    saida, resumo = _rodar(formato="json")
+    assert saida == ""
+    assert "divergência: 0" in resumo
+    cache.clear()
+
+
+@pytest.mark.django_db
+def test_checkpoint_retoma_varredura_e_e_removido(cenario, tmp_path):
+    """
+    Com --chunk e --checkpoint a varredura é retomada do último id salvo e o
+    arquivo é removido ao final.
+    """
+    epi_a, _ = cenario
+    ids = list(Entrega.objects.order_by("id").values_list("id", flat=True))
+    checkpoint = tmp_path / "reconciliar.json"
+    # Simula uma execução interrompida após a primeira Entrega (efeito -2).
+    checkpoint.write_text(
+        json.dumps({"ultimo_id": ids[0], "corte": ids[-1], "esperado": {str(epi_a.pk): -2}})
+    )
+
+    saida, resumo = _rodar(chunk=1, checkpoint=str(checkpoint))
+    assert "Retomando" in resumo
+    linhas = list(csv.reader(io.StringIO(saida), delimiter=";"))
+    assert linhas[1][-1] == "-3"
+    assert not checkpoint.exists()
+
+
+@pytest.mark.django_db
+def test_saldo_alterado_fora_do_livro_e_reportado_e_registrado(cenario):
+    """
+    EPI.estoque gravado direto (admin/shell) diverge da soma do livro-razão:
+    o relatório mostra a diferença e o --aplicar só a lança no livro, sem
+    mexer no estoque.
+    """
+    _, epi_b = cenario
+    EPI.objects.filter(pk=epi_b.pk).update(estoque=7)
+
+    saida, _ = _rodar(formato="json")
+    linhas = {linha["epi_id"]: linha for linha in map(json.loads, saida.splitlines())}
+    assert (linhas[epi_b.pk]["saldo_livro"], linhas[epi_b.pk]["drift_livro"]) == (4, 3)
+    assert linhas[epi_b.pk]["drift"] == 0
+
+    _, resumo = _rodar(aplicar=True)
+    assert "corrigidos: 2" in resumo
+    epi_b.refresh_from_db()
+    assert epi_b.estoque == 7
+    registro = MovimentacaoEstoque.objects.filter(epi=epi_b).latest("id")
+    assert (registro.quantidade, registro.compactada) == (3, True)
+
+    saida, resumo = _rodar(formato="json")
+    assert saida == ""
+    assert "divergência: 0" in resumo
@@ -4,8 +4,12 @@ from django.core.exceptions import ValidationError
 from django.utils import timezone
 
 from app_colaboradores.models import Colaborador
-from app_entregas.models import Entrega
-from app_entregas.services import movimenta_por_entrega, movimenta_por_exclusao
+from app_entregas.models import Entrega, MovimentacaoEstoque
+from app_entregas.services import (
+    movimenta_em_lote,
+    movimenta_por_entrega,
+    movimenta_por_exclusao,
+)
 from app_epis.models import EPI, CategoriaEPI
 
 
@@ -100,3 +104,54 @@ def test_movimenta_por_entrega_troca_de_epi_reverte_delta_no_antigo_e_aplica_no_
     epi_b.refresh_from_db()
     assert epi_a.estoque == 10
     assert epi_b.estoque == 20 - 2
+
+
+@pytest.mark.django_db
+def test_movimenta_em_lote_soma_deltas_por_epi(django_assert_max_num_queries):
+    """
+    Garante que movimenta_em_lote aplica o delta líquido por EPI (criações e
+    atualizações misturadas) com número de queries independente do nº de entregas.
+    """
+    cat = CategoriaEPI.objects.create(nome="Luvas")
+    epi_a = EPI.objects.create(codigo="L1", nome="Luva A", categoria=cat, estoque=100)
+    epi_b = EPI.objects.create(codigo="L2", nome="Luva B", categoria=cat, estoque=100)
+
+    pares = [(Entrega(epi=epi_a, quantidade=1), None) for _ in range(30)]
+    pares += [(Entrega(epi=epi_b, quantidade=2), None) for _ in range(20)]
+    # devolução de uma entrega antiga de A (+3) e troca de EPI B → A (q=1)
+    pares.append(
+        (
+            Entrega(epi=epi_a, quantidade=3, status=Entrega.Status.DEVOLVIDO),
+            Entrega(epi=epi_a, quantidade=3, status=Entrega.Status.EMPRESTADO),
+        )
+    )
+    pares.append((Entrega(epi=epi_a, quantidade=1), Entrega(epi=epi_b, quantidade=1)))
+
+    # +1: eventos do outbox gravados em um único bulk_create
+    with django_assert_max_num_queries(7):
+        saldos = movimenta_em_lote(pares)
+
+    epi_a.refresh_from_db()
+    epi_b.refresh_from_db()
+    assert epi_a.estoque == 100 - 30 + 3 - 1
+    assert epi_b.estoque == 100 - 40 + 1
+    assert saldos == {epi_a.pk: epi_a.estoque, epi_b.pk: epi_b.estoque}
+    assert MovimentacaoEstoque.objects.count() == 30 + 20 + 1 + 2
+
+
+@pytest.mark.django_db
+def test_movimenta_em_lote_e_atomico_quando_falta_estoque():
+    """
+    Se qualquer EPI do lote ficaria negativo, nada é aplicado.
+    """
+    cat = CategoriaEPI.objects.create(nome="Capacete")
+    epi_a = EPI.objects.create(codigo="C1", nome="Cap A", categoria=cat, estoque=10)
+    epi_b = EPI.objects.create(codigo="C2", nome="Cap B", categoria=cat, estoque=1)
+
+    pares = [(Entrega(epi=epi_a, quantidade=2), None), (Entrega(epi=epi_b, quantidade=2), None)]
+    with pytest.raises(ValidationError):
+        movimenta_em_lote(pares)
+
+    epi_a.refresh_from_db()
+    assert epi_a.estoque == 10
+    assert not MovimentacaoEstoque.objects.exists()
@@ -4,6 +4,8 @@ from django.contrib.auth.models import Permission, User
 from django.db.models.deletion import ProtectedError
 from django.urls import reverse
 
+from app_entregas.models import MovimentacaoEstoque
+from app_entregas.services import ajusta_estoque, fatiar_estoque, saldo_estoque
 from app_epis.models import EPI, CategoriaEPI
 
 
@@ -18,7 +20,7 @@ def login_com_permissoes(client, *codenames):
     return usuario
 
 
-@pytest.mark.django_db
+@pytest.mark.django_db(transaction=True)
 def test_lista_epi_filtra_por_nome_categoria_ativos_e_estoque(client):
     """
     Testa a lista de EPIs filtrando por nome, categoria,
@@ -127,6 +129,85 @@ def test_editar_epi_sucesso_exibe_mensagem(client):
     assert "atualizado com sucesso" in resp.content.decode().lower()
 
 
+def _dados_edicao(epi, **extra):
+    return {
+        "nome": epi.nome,
+        "codigo": epi.codigo,
+        "categoria": epi.categoria_id,
+        "tamanho": "",
+        "ativo": "on",
+        "estoque_minimo": 0,
+        **extra,
+    }
+
+
+@pytest.mark.django_db
+def test_criar_epi_lanca_estoque_inicial_como_ajuste(client):
+    """
+    O estoque informado no cadastro entra como ajuste no livro de movimentações.
+    """
+    login_com_permissoes(client, "add_epi")
+    cat = CategoriaEPI.objects.create(nome="Luvas")
+    client.post(
+        reverse("app_epis:criar"),
+        data={
+            "nome": "Luva Neo",
+            "codigo": "LUV-9",
+            "categoria": cat.id,
+            "tamanho": "",
+            "ativo": "on",
+            "estoque": 5,
+            "estoque_minimo": 0,
+        },
+    )
+    epi = EPI.objects.get(codigo="LUV-9")
+    assert saldo_estoque(epi.pk) == 5
+    mov = MovimentacaoEstoque.objects.get(epi=epi)
+    assert (mov.tipo, mov.quantidade) == (MovimentacaoEstoque.Tipo.AJUSTE, 5)
+
+
+@pytest.mark.django_db
+def test_editar_epi_aplica_diferenca_sobre_o_saldo_exibido(client):
+    """
+    A edição lança apenas a diferença para o saldo exibido: uma movimentação
+    feita entre abrir e salvar o formulário não é sobrescrita.
+    """
+    login_com_permissoes(client, "change_epi")
+    cat = CategoriaEPI.objects.create(nome="Luvas")
+    epi = EPI.objects.create(codigo="L1", nome="Luva", categoria=cat, estoque=10)
+    fatiar_estoque(epi.pk, 2)
+    url = reverse("app_epis:editar", kwargs={"pk": epi.pk})
+
+    form = client.get(url).context["form"]
+    assert form.initial["estoque"] == 10
+    assert form.initial["estoque_exibido"] == 10
+
+    ajusta_estoque(epi.pk, -3)  # saída concorrente
+    client.post(url, data=_dados_edicao(epi, estoque=12, estoque_exibido=10))
+
+    assert saldo_estoque(epi.pk) == 9
+    assert MovimentacaoEstoque.objects.filter(epi=epi, quantidade=2).exists()
+
+
+@pytest.mark.django_db
+def test_editar_epi_sem_saldo_suficiente_mostra_erro(client):
+    """
+    Se o ajuste deixaria o saldo negativo, nada é gravado e o erro vai para o campo.
+    """
+    login_com_permissoes(client, "change_epi")
+    cat = CategoriaEPI.objects.create(nome="Luvas")
+    epi = EPI.objects.create(codigo="L1", nome="Luva", categoria=cat, estoque=2)
+    url = reverse("app_epis:editar", kwargs={"pk": epi.pk})
+
+    resp = client.post(
+        url, data=_dados_edicao(epi, nome="Outro nome", estoque=0, estoque_exibido=5)
+    )
+    assert resp.status_code == 200
+    assert "estoque" in resp.context["form"].errors
+    epi.refresh_from_db()
+    assert (epi.nome, epi.estoque) == ("Luva", 2)
+
+
 @pytest.mark.django_db
 def test_excluir_epi_sucesso_exibe_mensagem(client):
     """
@@ -1,16 +1,21 @@
 # tests/test_relatorios.py
 import csv
 import io
+import json
+import zipfile
 from datetime import timedelta
+from xml.etree import ElementTree
 
 import pytest
 from django.contrib.auth.models import Permission, User
+from django.core.cache import cache
 from django.urls import reverse
 from django.utils import timezone
 
 from app_colaboradores.models import Colaborador
 from app_entregas.models import Entrega
 from app_epis.models import EPI, CategoriaEPI
+from app_relatorios import exportacao, xlsx
 from app_relatorios.forms import RelatorioEntregasForm
 
 
@@ -99,6 +104,7 @@ def test_agregacoes_e_filtros_contexto_relatorio(client):
         data_devolucao=agora,
     )
 
+    cache.clear()  # totais do relatório ficam em cache por filtros
     usuario = criar_usuario_com_permissao_view_entrega()
     client.force_login(usuario)
     url = reverse("app_relatorios:index")
@@ -152,7 +158,7 @@ def test_exportacao_csv_relatorio(client):
     assert resp.status_code == 200
     assert "text/csv" in resp["Content-Type"]
 
-    conteudo = resp.content.decode("utf-8")
+    conteudo = b"".join(resp.streaming_content).decode("utf-8")
     leitor = csv.reader(io.StringIO(conteudo), delimiter=";")
     linhas = list(leitor)
 
@@ -174,3 +180,70 @@ def test_exportacao_csv_relatorio(client):
     assert linha_dado[5] == "4"
     assert linha_dado[6].lower() == "devolvido"
     assert "linha" in linha_dado[7] and "\n" not in linha_dado[7]
+
+
+@pytest.mark.django_db
+def test_exportacao_csv_em_blocos_por_lote(django_assert_num_queries):
+    """
+    O cabeçalho sai antes de qualquer consulta; depois, uma consulta e um
+    bloco de texto por lote, na ordem do relatório (mais recentes primeiro).
+    """
+    categoria = CategoriaEPI.objects.create(nome="Óculos")
+    epi = EPI.objects.create(codigo="O1", nome="Óculos", categoria=categoria, estoque=10)
+    colaborador = Colaborador.objects.create(nome="Caio", email="c@x.com", matricula="C1")
+    agora = timezone.now()
+    for i in range(5):
+        Entrega.objects.create(
+            colaborador=colaborador,
+            epi=epi,
+            quantidade=i + 1,
+            status=Entrega.Status.FORNECIDO,
+            data_entrega=agora - timedelta(days=i),
+        )
+
+    blocos = exportacao.csv_em_blocos(Entrega.objects.all(), lote=2)
+    with django_assert_num_queries(0):
+        assert next(blocos).startswith("Data Entrega;")
+    with django_assert_num_queries(3):
+        resto = list(blocos)
+
+    assert len(resto) == 3
+    linhas = list(csv.reader(io.StringIO("".join(resto)), delimiter=";"))
+    assert [linha[5] for linha in linhas] == ["1", "2", "3", "4", "5"]
+    assert {linha[6] for linha in linhas} == {"Fornecido"}
+
+
+@pytest.mark.django_db
+def test_exportacao_xlsx_e_ndjson(client, admin_user):
+    """
+    `formato=xlsx` gera um zip com a planilha (texto inline, quantidade numérica);
+    `formato=ndjson`, um objeto por linha; formato desconhecido dá 400.
+    """
+    categoria = CategoriaEPI.objects.create(nome="Luvas")
+    epi = EPI.objects.create(codigo="L9", nome="Luva <nitrílica>", categoria=categoria)
+    colaborador = Colaborador.objects.create(nome="Dora", email="d@x.com", matricula="D1")
+    for qtd in (2, 7):
+        Entrega.objects.create(colaborador=colaborador, epi=epi, quantidade=qtd)
+    client.force_login(admin_user)
+    url = reverse("app_relatorios:exportar")
+
+    resp = client.get(url, {"formato": "xlsx"})
+    assert resp["Content-Type"] == xlsx.CONTENT_TYPE
+    assert resp["Content-Disposition"].endswith('relatorio_entregas.xlsx"')
+    with zipfile.ZipFile(io.BytesIO(b"".join(resp.streaming_content))) as zf:
+        assert zf.testzip() is None
+        aba = ElementTree.fromstring(zf.read("xl/worksheets/sheet1.xml"))
+    ns = {"s": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+    linhas = aba.findall("s:sheetData/s:row", ns)
+    assert len(linhas) == 3
+    celulas = linhas[1].findall("s:c", ns)
+    assert celulas[4].find("s:is/s:t", ns).text == "Luva <nitrílica> (L9)"
+    assert celulas[5].find("s:v", ns).text == "7"
+
+    resp = client.get(url, {"formato": "ndjson"})
+    assert resp["Content-Type"] == "application/x-ndjson"
+    objetos = [json.loads(linha) for linha in b"".join(resp.streaming_content).splitlines()]
+    assert [o["quantidade"] for o in objetos] == [7, 2]
+    assert objetos[0]["status"] == "EMPRESTADO" and objetos[0]["epi_codigo"] == "L9"
+
+    assert client.get(url, {"formato": "pdf"}).status_code == 400
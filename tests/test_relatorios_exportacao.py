@@ -0,0 +1,153 @@
+# tests/test_relatorios_exportacao.py
+import io
+from datetime import timedelta
+from pathlib import Path
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+
+from app_colaboradores.models import Colaborador
+from app_entregas.models import Entrega
+from app_epis.models import EPI, CategoriaEPI
+from app_relatorios import tarefas
+from app_relatorios.models import TarefaExportacao
+
+
+@pytest.fixture
+def entregas(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    cat = CategoriaEPI.objects.create(nome="Proteção")
+    epi = EPI.objects.create(codigo="L1", nome="Luva", categoria=cat, estoque=100)
+    col = Colaborador.objects.create(nome="Ana", email="a@x.com", matricula="A1")
+    for status in ("EMPRESTADO", "EMPRESTADO", "DEVOLVIDO"):
+        Entrega.objects.create(colaborador=col, epi=epi, status=status, quantidade=1)
+    return epi
+
+
+@pytest.mark.django_db
+def test_tarefas_iguais_sao_deduplicadas_enquanto_ativas(entregas, django_user_model):
+    outro = django_user_model.objects.create_user("outro", password="x")
+    primeira, criada = tarefas.solicita("csv", {"status": "EMPRESTADO"})
+    segunda, criada_de_novo = tarefas.solicita("csv", {"status": "EMPRESTADO"}, outro)
+    assert criada and not criada_de_novo and segunda == primeira
+    assert tarefas.solicita("xlsx", {"status": "EMPRESTADO"})[1]
+
+    assert tarefas.processar_pendentes() == 2
+    # Concluída deixa de bloquear: um novo pedido gera outra tarefa.
+    nova, criada = tarefas.solicita("csv", {"status": "EMPRESTADO"})
+    assert criada and nova != primeira
+
+
+@pytest.mark.django_db
+def test_worker_gera_arquivo_com_progresso(client, admin_user, entregas, settings):
+    """
+    POST enfileira com os filtros da querystring; o comando gera o arquivo
+    em MEDIA_ROOT, o status mostra o progresso e o download entrega o CSV.
+    """
+    client.force_login(admin_user)
+    url = reverse("app_relatorios:solicitar_exportacao") + "?status=EMPRESTADO"
+    resp = client.post(url, {"formato": "csv"})
+    tarefa = TarefaExportacao.objects.get()
+    assert resp.url == reverse("app_relatorios:exportacao", args=[tarefa.pk])
+    assert tarefa.filtros == {"status": "EMPRESTADO"} and tarefa.solicitante == admin_user
+
+    status_url = reverse("app_relatorios:exportacao_status", args=[tarefa.pk])
+    assert client.get(status_url).json()["status"] == "PENDENTE"
+    assert "Exportação CSV" in client.get(resp.url).content.decode()
+
+    out = io.StringIO()
+    call_command("processar_exportacoes", stdout=out)
+    assert "Exportações processadas: 1" in out.getvalue()
+
+    status = client.get(status_url).json()
+    assert status["status"] == "CONCLUIDA" and status["progresso"] == 100
+    assert status["linhas_processadas"] == status["linhas_estimadas"] == 2
+    arquivo = client.get(status["download"])
+    linhas = b"".join(arquivo.streaming_content).decode().splitlines()
+    assert linhas[0].startswith("Data Entrega;") and len(linhas) == 3
+    # Só o arquivo final fica na pasta (o .parcial foi renomeado).
+    pasta = Path(settings.MEDIA_ROOT) / "exportacoes"
+    assert [p.name for p in pasta.iterdir()] == [f"relatorio_entregas_{tarefa.pk}.csv"]
+    assert TarefaExportacao.objects.get().chave_ativa is None
+
+
+@pytest.mark.django_db
+def test_falha_fica_registrada_e_libera_a_chave(entregas):
+    tarefa, _ = tarefas.solicita("pdf", {})
+    tarefas.processar_pendentes()
+    tarefa.refresh_from_db()
+    assert tarefa.status == TarefaExportacao.Status.ERRO and "pdf" in tarefa.erro
+    assert tarefa.chave_ativa is None
+
+
+def _sem_sinal(tarefa, **campos):
+    velho = timezone.now() - tarefas.PRAZO_SEM_SINAL - timedelta(minutes=1)
+    TarefaExportacao.objects.filter(pk=tarefa.pk).update(sinal_em=velho, **campos)
+
+
+@pytest.mark.django_db
+def test_tarefa_de_worker_morto_volta_para_a_fila(entregas):
+    """
+    PROCESSANDO sem heartbeat além do prazo volta a PENDENTE e é refeita;
+    depois de MAX_TENTATIVAS vira ERRO e libera a chave.
+    """
+    tarefa, _ = tarefas.solicita("csv", {})
+    tarefas._reserva()
+    _sem_sinal(tarefa)
+    assert tarefas.processar_pendentes() == 1
+    tarefa.refresh_from_db()
+    assert (tarefa.status, tarefa.tentativas) == (TarefaExportacao.Status.CONCLUIDA, 2)
+
+    outra, _ = tarefas.solicita("csv", {"status": "EMPRESTADO"})
+    tarefas._reserva()
+    _sem_sinal(outra, tentativas=tarefas.MAX_TENTATIVAS)
+    assert tarefas.recupera_travadas() == 1
+    outra.refresh_from_db()
+    assert outra.status == TarefaExportacao.Status.ERRO and outra.chave_ativa is None
+    assert tarefas.solicita("csv", {"status": "EMPRESTADO"})[1]
+
+
+@pytest.mark.django_db
+def test_worker_lento_desiste_da_tarefa_recuperada(entregas, settings):
+    """
+    Se outro worker já pegou a tarefa de novo, o antigo não grava status nem arquivo.
+    """
+    tarefas.solicita("csv", {})
+    antiga = tarefas._reserva()
+    TarefaExportacao.objects.filter(pk=antiga.pk).update(tentativas=2)
+
+    tarefas.processa(antiga)
+
+    atual = TarefaExportacao.objects.get()
+    assert atual.status == TarefaExportacao.Status.PROCESSANDO and not atual.arquivo
+    assert not list((Path(settings.MEDIA_ROOT) / "exportacoes").glob("*"))
+
+
+@pytest.mark.django_db
+def test_exportacoes_antigas_sao_apagadas_com_os_arquivos(entregas, settings):
+    """
+    O worker apaga as tarefas terminadas há mais de --reter-dias, com o arquivo
+    e os parciais abandonados; as recentes e as ativas ficam.
+    """
+    velha, _ = tarefas.solicita("csv", {})
+    recente, _ = tarefas.solicita("csv", {"status": "EMPRESTADO"})
+    tarefas.processar_pendentes()
+    pasta = Path(settings.MEDIA_ROOT) / "exportacoes"
+    (pasta / f"relatorio_entregas_{velha.pk}.csv.1.parcial").write_text("x")
+    TarefaExportacao.objects.filter(pk=velha.pk).update(
+        concluido_em=timezone.now() - timedelta(days=8)
+    )
+    ativa, _ = tarefas.solicita("xlsx", {})
+    tarefas._reserva()  # em andamento em outro worker
+    TarefaExportacao.objects.filter(pk=ativa.pk).update(
+        criado_em=timezone.now() - timedelta(days=30)
+    )
+
+    out = io.StringIO()
+    call_command("processar_exportacoes", reter_dias=7, stdout=out)
+    assert "apagadas: 1" in out.getvalue()
+
+    assert set(TarefaExportacao.objects.values_list("pk", flat=True)) == {recente.pk, ativa.pk}
+    assert [p.name for p in pasta.glob("*")] == [f"relatorio_entregas_{recente.pk}.csv"]
@@ -0,0 +1,207 @@
+# tests/test_relatorios_resumo.py
+import io
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from app_colaboradores.models import Colaborador
+from app_entregas.models import Entrega
+from app_entregas.services import entrega_em_lote
+from app_epis.models import EPI, CategoriaEPI
+from app_relatorios import agregacao, cache_relatorio, resumo
+from app_relatorios.models import ResumoDiarioEntrega
+
+
+@pytest.fixture
+def cenario():
+    cache.clear()
+    cat = CategoriaEPI.objects.create(nome="Proteção")
+    luva = EPI.objects.create(codigo="L1", nome="Luva", categoria=cat, estoque=100)
+    bota = EPI.objects.create(codigo="B1", nome="Bota", categoria=cat, estoque=100)
+    ana = Colaborador.objects.create(nome="Ana", email="a@x.com", matricula="A1")
+    bia = Colaborador.objects.create(nome="Bia", email="b@x.com", matricula="B1")
+    return luva, bota, ana, bia
+
+
+def _linhas():
+    return sorted(
+        ResumoDiarioEntrega.objects.values_list(
+            "dia", "epi_id", "colaborador_id", "status", "registros", "quantidade"
+        )
+    )
+
+
+@pytest.mark.django_db
+def test_resumo_acompanha_criacao_alteracao_e_exclusao(cenario):
+    """
+    Criar soma na chave (dia, EPI, colaborador, status); mudar o status move
+    o registro de chave; excluir tira — e a linha zerada some.
+    """
+    luva, _, ana, _ = cenario
+    hoje = timezone.localdate()
+    e1 = Entrega.objects.create(colaborador=ana, epi=luva, quantidade=2)
+    Entrega.objects.create(colaborador=ana, epi=luva, quantidade=3)
+    assert _linhas() == [(hoje, luva.pk, ana.pk, "EMPRESTADO", 2, 5)]
+
+    e1.status = Entrega.Status.DEVOLVIDO
+    e1.save()
+    assert _linhas() == [
+        (hoje, luva.pk, ana.pk, "DEVOLVIDO", 1, 2),
+        (hoje, luva.pk, ana.pk, "EMPRESTADO", 1, 3),
+    ]
+
+    e1.delete()
+    assert _linhas() == [(hoje, luva.pk, ana.pk, "EMPRESTADO", 1, 3)]
+
+
+@pytest.mark.django_db
+def test_resumo_inclui_entregas_em_lote_e_reconstrucao_confere(cenario):
+    """
+    As entregas do bulk_create entram via sinal; reconstruir do zero dá o
+    mesmo resultado que a manutenção incremental.
+    """
+    luva, bota, ana, bia = cenario
+    entrega_em_lote([ana.pk, bia.pk], luva.pk, 2)
+    antiga = Entrega.objects.create(colaborador=bia, epi=bota, quantidade=1)
+    antiga.data_entrega = timezone.now() - timedelta(days=10)
+    antiga.save()
+
+    incremental = _linhas()
+    assert sum(linha[4] for linha in incremental) == 3
+    assert len(incremental) == 3
+
+    ResumoDiarioEntrega.objects.all().delete()
+    call_command("reconstruir_resumo", stdout=io.StringIO())
+    assert _linhas() == incremental
+    assert resumo.reconstroi() == 3
+
+
+@pytest.mark.django_db
+def test_relatorio_le_totais_do_resumo(client, admin_user, cenario):
+    """
+    Os totais do relatório vêm do resumo: com a tabela de Entregas intacta,
+    zerar o resumo zera os totais.
+    """
+    luva, bota, ana, bia = cenario
+    Entrega.objects.create(colaborador=ana, epi=luva, quantidade=2)
+    Entrega.objects.create(colaborador=bia, epi=bota, quantidade=1, status="DEVOLVIDO")
+    client.force_login(admin_user)
+    url = reverse("app_relatorios:index")
+
+    ctx = client.get(url).context
+    assert ctx["agg"]["total_entregue"] == 2
+    assert ctx["agg"]["total_devolvido"] == 1
+    assert {r["epi__nome"]: r["entregues"] for r in ctx["por_epi"]} == {"Bota": 0, "Luva": 2}
+
+    ResumoDiarioEntrega.objects.all().delete()
+    ctx = client.get(url, {"status": "EMPRESTADO"}).context
+    assert ctx["agg"]["registros"] == 0
+    assert list(ctx["por_colab"]) == []
+
+
+@pytest.mark.django_db
+def test_passagem_unica_igual_as_tres_consultas(cenario, django_assert_num_queries):
+    """
+    agrega() sobre uma consulta agrupada (Entregas ou resumo) dá os mesmos
+    totais e quadros que a implementação anterior de três consultas.
+    """
+    luva, bota, ana, bia = cenario
+    for col, epi, status, qtd in [
+        (ana, luva, "EMPRESTADO", 2),
+        (ana, luva, "DEVOLVIDO", 1),
+        (ana, bota, "PERDIDO", 3),
+        (bia, luva, "EMPRESTADO", 4),
+    ]:
+        Entrega.objects.create(colaborador=col, epi=epi, status=status, quantidade=qtd)
+
+    referencia = agregacao.agrega_tres_consultas(Entrega.objects.all())
+    with django_assert_num_queries(1):
+        unica = agregacao.agrega(agregacao.agrupa_entregas(Entrega.objects.all()))
+    with django_assert_num_queries(1):
+        do_resumo = agregacao.agrega(agregacao.agrupa_resumo(ResumoDiarioEntrega.objects.all()))
+
+    assert unica == do_resumo == referencia
+    assert unica["agg"] == {
+        "registros": 4,
+        "quantidade_total": 10,
+        "total_entregue": 9,
+        "total_devolvido": 1,
+    }
+
+
+@pytest.mark.django_db
+def test_bench_relatorio_compara_estrategias():
+    out = io.StringIO()
+    call_command("bench_relatorio", tamanhos="300", epis=3, colaboradores=5, stdout=out)
+    linhas = [
+        linha.split() for linha in out.getvalue().splitlines() if linha.startswith("      300")
+    ]
+    assert [(lin[1], lin[2], lin[-1]) for lin in linhas] == [
+        ("tres_consultas", "3", "ok"),
+        ("passagem_unica", "1", "ok"),
+        ("resumo_diario", "1", "ok"),
+    ]
+    assert not Entrega.objects.exists()
+
+
+@pytest.mark.django_db
+def test_cache_do_relatorio_por_filtros_e_versao(
+    client, admin_user, cenario, django_capture_on_commit_callbacks
+):
+    """
+    Mesmos filtros (em outra ordem) acertam o cache sem consultar o resumo;
+    uma escrita de Entrega muda a versão e o próximo acesso recalcula.
+    """
+    luva, _, ana, _ = cenario
+    Entrega.objects.create(colaborador=ana, epi=luva, quantidade=2)
+    client.force_login(admin_user)
+    url = reverse("app_relatorios:index")
+    cache_relatorio.zera_estatisticas()
+
+    assert (
+        client.get(url, {"status": "EMPRESTADO", "epi": luva.pk}).context["agg"]["quantidade_total"]
+        == 2
+    )
+    with CaptureQueriesContext(connection) as ctx:
+        client.get(f"{url}?epi={luva.pk}&status=EMPRESTADO&data_de=")
+    assert not any("resumodiarioentrega" in q["sql"] for q in ctx.captured_queries)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Entrega.objects.create(colaborador=ana, epi=luva, quantidade=3)
+    resp = client.get(url, {"status": "EMPRESTADO", "epi": luva.pk})
+    assert resp.context["agg"]["quantidade_total"] == 5
+    assert cache_relatorio.estatisticas() == {"acertos": 1, "falhas": 2, "taxa_acerto": 1 / 3}
+
+    out = io.StringIO()
+    call_command("cache_relatorio", zerar=True, stdout=out)
+    assert "Acertos: 1  Falhas: 2" in out.getvalue()
+    assert cache_relatorio.estatisticas()["falhas"] == 0
+
+
+@pytest.mark.django_db
+def test_aplica_recria_linha_excluida_entre_select_e_update(cenario, monkeypatch):
+    """
+    Se outra transação exclui a linha depois do SELECT, o bulk_update não a
+    encontra: o delta não se perde, vai pelo recuo chave a chave.
+    """
+    luva, _, ana, _ = cenario
+    hoje = timezone.localdate()
+    chave = (hoje, luva.pk, ana.pk, Entrega.Status.FORNECIDO)
+    resumo.aplica({chave: [1, 2]})
+
+    original = ResumoDiarioEntrega.objects.bulk_update
+
+    def exclui_antes(objs, *args, **kwargs):
+        ResumoDiarioEntrega.objects.all().delete()  # "outra transação"
+        return original(objs, *args, **kwargs)
+
+    monkeypatch.setattr(ResumoDiarioEntrega.objects, "bulk_update", exclui_antes)
+    resumo.aplica({chave: [1, 3]})
+
+    assert _linhas() == [(*chave, 1, 3)]
@@ -0,0 +1,105 @@
+# tests/test_solicitacoes_lote.py
+import pytest
+from django.contrib.auth.models import Permission, User
+from django.urls import reverse
+
+from app_colaboradores.models import Colaborador
+from app_entregas.models import Entrega, Solicitacao
+from app_epis.models import EPI, CategoriaEPI
+
+
+def _login(client, *codenames):
+    u = User.objects.create_user("gestor", password="x")
+    u.user_permissions.add(*Permission.objects.filter(codename__in=codenames))
+    client.force_login(u)
+    return u
+
+
+@pytest.fixture
+def cenario():
+    cat = CategoriaEPI.objects.create(nome="Luvas")
+    epi = EPI.objects.create(codigo="L1", nome="Luva", categoria=cat, estoque=5)
+    col = Colaborador.objects.create(nome="Ana", email="a@x.com", matricula="A1", ativo=True)
+    sols = [Solicitacao.objects.create(colaborador=col, epi=epi, quantidade=2) for _ in range(3)]
+    return epi, sols
+
+
+@pytest.mark.django_db
+def test_aprovar_em_lote_somente_pendentes(client, cenario):
+    """
+    Aprovação em lote altera apenas as PENDENTES e relata as demais.
+    """
+    _login(client, "change_solicitacao")
+    _, sols = cenario
+    Solicitacao.objects.filter(pk=sols[2].pk).update(status=Solicitacao.Status.REPROVADA)
+
+    r = client.post(
+        reverse("app_entregas:solicitacoes_em_lote"),
+        data={"acao": "aprovar", "ids": [s.pk for s in sols]},
+        HTTP_ACCEPT="application/json",
+    )
+    assert r.status_code == 200
+    resultados = {item["id"]: item["ok"] for item in r.json()["resultados"]}
+    assert resultados == {sols[0].pk: True, sols[1].pk: True, sols[2].pk: False}
+    assert Solicitacao.objects.filter(status=Solicitacao.Status.APROVADA).count() == 2
+
+
+@pytest.mark.django_db
+def test_atender_em_lote_parcial_prioriza_mais_antigas(client, cenario):
+    """
+    Estoque 5 e três solicitações de 2: as duas mais antigas são atendidas,
+    a terceira falha por estoque insuficiente.
+    """
+    _login(client, "change_solicitacao")
+    epi, sols = cenario
+
+    r = client.post(
+        reverse("app_entregas:solicitacoes_em_lote"),
+        data={"acao": "atender", "ids": [s.pk for s in sols]},
+        follow=True,
+    )
+    assert r.status_code == 200
+    epi.refresh_from_db()
+    assert epi.estoque == 1
+    assert Entrega.objects.filter(solicitacao__in=sols[:2]).count() == 2
+    assert Solicitacao.objects.filter(status=Solicitacao.Status.ATENDIDA).count() == 2
+    assert Solicitacao.objects.get(pk=sols[2].pk).status == Solicitacao.Status.PENDENTE
+
+
+@pytest.mark.django_db
+def test_atender_em_lote_tudo_ou_nada_nao_aplica_nada(client, cenario):
+    """
+    No modo tudo-ou-nada, uma falha cancela o lote inteiro.
+    """
+    _login(client, "change_solicitacao")
+    epi, sols = cenario
+
+    r = client.post(
+        reverse("app_entregas:solicitacoes_em_lote"),
+        data={"acao": "atender", "ids": [s.pk for s in sols], "modo": "tudo"},
+        HTTP_ACCEPT="application/json",
+    )
+    assert all(not item["ok"] for item in r.json()["resultados"])
+    epi.refresh_from_db()
+    assert epi.estoque == 5
+    assert not Entrega.objects.exists()
+    assert not Solicitacao.objects.exclude(status=Solicitacao.Status.PENDENTE).exists()
+
+
+@pytest.mark.django_db
+def test_lote_exige_permissao_e_acao_valida(client, cenario):
+    """
+    Sem permissão => 403; ação desconhecida => redirect sem alterações.
+    """
+    _, sols = cenario
+    url = reverse("app_entregas:solicitacoes_em_lote")
+    _login(client)
+    assert client.post(url, data={"acao": "aprovar", "ids": [sols[0].pk]}).status_code == 403
+
+    gestor = User.objects.create_user("gestor2", password="x")
+    gestor.user_permissions.add(Permission.objects.get(codename="change_solicitacao"))
+    client.force_login(gestor)
+    r = client.post(url, data={"acao": "apagar", "ids": [sols[0].pk], "status": "PENDENTE"})
+    assert r.status_code == 302
+    assert r["Location"].endswith("?status=PENDENTE")
+    assert not Solicitacao.objects.exclude(status=Solicitacao.Status.PENDENTE).exists()
@@ -0,0 +1,186 @@
+# tests/test_solicitacoes_reservas.py
+import pytest
+from django.contrib.auth.models import Permission, User
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from app_colaboradores.models import Colaborador
+from app_entregas import services
+from app_entregas.models import Entrega, Solicitacao
+from app_entregas.services import (
+    atende_solicitacoes_em_lote,
+    decide_solicitacoes_em_lote,
+    entrega_em_lote,
+    saldo_estoque,
+)
+from app_epis.models import EPI, CategoriaEPI
+
+
+@pytest.fixture
+def cenario():
+    cat = CategoriaEPI.objects.create(nome="Luvas")
+    epi = EPI.objects.create(codigo="L1", nome="Luva", categoria=cat, estoque=5)
+    col = Colaborador.objects.create(nome="Ana", email="a@x.com", matricula="A1", ativo=True)
+    sols = [Solicitacao.objects.create(colaborador=col, epi=epi, quantidade=2) for _ in range(3)]
+    return epi, col, sols
+
+
+def _gestor(client):
+    u = User.objects.create_user("gestor", password="x")
+    u.user_permissions.add(Permission.objects.get(codename="change_solicitacao"))
+    client.force_login(u)
+    return u
+
+
+@pytest.mark.django_db
+def test_aprovar_reserva_e_reprovar_nao(client, cenario):
+    """
+    Aprovar reserva a quantidade; o disponível cai, o estoque não.
+    """
+    epi, _, sols = cenario
+    _gestor(client)
+    client.post(reverse("app_entregas:aprovar_solicitacao", args=[sols[0].pk]))
+    client.post(reverse("app_entregas:reprovar_solicitacao", args=[sols[1].pk]))
+    epi.refresh_from_db()
+    assert (epi.estoque, epi.reservado, epi.disponivel) == (5, 2, 3)
+
+
+@pytest.mark.django_db
+def test_aprovar_em_lote_respeita_disponivel(cenario):
+    """
+    Com 5 unidades, só duas solicitações de 2 cabem; a mais nova falha.
+    """
+    epi, _, sols = cenario
+    res = decide_solicitacoes_em_lote([s.pk for s in sols], Solicitacao.Status.APROVADA)
+    assert [r["ok"] for r in res] == [True, True, False]
+    assert "disponível" in res[2]["mensagem"]
+    epi.refresh_from_db()
+    assert epi.reservado == 4
+    assert Solicitacao.objects.get(pk=sols[2].pk).status == Solicitacao.Status.PENDENTE
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("tudo_ou_nada", [False, True])
+def test_aprovar_em_lote_falha_de_reserva_vira_resultado_do_item(
+    monkeypatch, cenario, tudo_ou_nada
+):
+    """
+    Se a reserva de um EPI falhar na hora de gravar, só as solicitações dele
+    falham; no modo tudo-ou-nada nada é reservado nem aprovado.
+    """
+    epi, col, sols = cenario
+    outro = EPI.objects.create(codigo="L2", nome="Luva 2", categoria=epi.categoria, estoque=5)
+    s_outro = Solicitacao.objects.create(colaborador=col, epi=outro, quantidade=1)
+    reserva = services._reserva
+
+    def reserva_falha_no_outro(epi_id, quantidade):
+        if epi_id == outro.pk:
+            raise ValidationError("Estoque disponível insuficiente para reservar.")
+        reserva(epi_id, quantidade)
+
+    monkeypatch.setattr(services, "_reserva", reserva_falha_no_outro)
+    res = decide_solicitacoes_em_lote(
+        [sols[0].pk, s_outro.pk], Solicitacao.Status.APROVADA, tudo_ou_nada
+    )
+
+    assert [r["ok"] for r in res] == [not tudo_ou_nada, False]
+    assert "reservar" in res[1]["mensagem"]
+    epi.refresh_from_db()
+    assert epi.reservado == (0 if tudo_ou_nada else 2)
+    aprovadas = Solicitacao.objects.filter(status=Solicitacao.Status.APROVADA)
+    assert list(aprovadas.values_list("pk", flat=True)) == ([] if tudo_ou_nada else [sols[0].pk])
+
+
+@pytest.mark.django_db
+def test_atender_libera_reserva_e_pendente_nao_consome_reserva(cenario):
+    """
+    Atender uma APROVADA baixa estoque e reserva; uma PENDENTE não pode usar
+    unidades reservadas para outra solicitação.
+    """
+    epi, _, sols = cenario
+    decide_solicitacoes_em_lote([sols[0].pk, sols[1].pk], Solicitacao.Status.APROVADA)
+    EPI.objects.filter(pk=epi.pk).update(estoque=4)  # disponível = 0
+
+    res = atende_solicitacoes_em_lote([sols[2].pk, sols[0].pk])
+    ok = {r["id"]: r["ok"] for r in res}
+    assert ok == {sols[0].pk: True, sols[2].pk: False}
+    epi.refresh_from_db()
+    assert (epi.estoque, epi.reservado) == (2, 2)
+
+
+@pytest.mark.django_db
+def test_cancelar_pelo_colaborador_libera_reserva(client, cenario):
+    """
+    O próprio colaborador cancela a solicitação aprovada; a reserva é liberada.
+    Outro usuário sem permissão recebe 403.
+    """
+    epi, col, sols = cenario
+    decide_solicitacoes_em_lote([sols[0].pk], Solicitacao.Status.APROVADA)
+    url = reverse("app_entregas:cancelar_solicitacao", args=[sols[0].pk])
+
+    client.force_login(User.objects.create_user("outro", password="x"))
+    assert client.post(url).status_code == 403
+
+    dono = User.objects.create_user("ana", password="x")
+    col.user = dono
+    col.save()
+    client.force_login(dono)
+    r = client.post(url)
+    assert r.status_code == 302
+    assert Solicitacao.objects.get(pk=sols[0].pk).status == Solicitacao.Status.CANCELADA
+    epi.refresh_from_db()
+    assert epi.reservado == 0
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("engine", ["imediato", "condicional", "ledger"])
+def test_entregas_avulsas_e_em_lote_nao_consomem_reserva(client, settings, cenario, engine):
+    """
+    Com 4 das 5 unidades reservadas, uma entrega avulsa de 2 (tela ou lote)
+    é recusada; a de 1 cabe no disponível. Vale para os três engines.
+    """
+    settings.ESTOQUE_ENGINE = engine
+    epi, col, sols = cenario
+    decide_solicitacoes_em_lote([sols[0].pk, sols[1].pk], Solicitacao.Status.APROVADA)
+    outro = Colaborador.objects.create(nome="Bia", email="b@x.com", matricula="B1", ativo=True)
+    u = User.objects.create_user("almox", password="x")
+    u.user_permissions.add(Permission.objects.get(codename="add_entrega"))
+    client.force_login(u)
+
+    def entrega(quantidade):
+        dados = {"colaborador": col.pk, "epi": epi.pk, "quantidade": quantidade}
+        return client.post(reverse("app_entregas:criar"), {**dados, "status": "FORNECIDO"})
+
+    assert entrega(2).status_code == 200  # formulário de volta com o erro
+    with pytest.raises(ValidationError):
+        entrega_em_lote([col.pk, outro.pk], epi.pk, 1)
+    epi.refresh_from_db()
+    assert (saldo_estoque(epi.pk), epi.reservado) == (5, 4)
+    assert not Entrega.objects.exists()
+
+    assert entrega(1).status_code == 302
+    assert saldo_estoque(epi.pk) == 4
+
+
+@pytest.mark.django_db
+def test_gerenciar_calcula_disponivel_na_propria_consulta(client, cenario):
+    """
+    O disponível da tela de gerenciar vem da consulta das solicitações, sem
+    subconsulta por linha; só EPIs fatiados somam as fatias (CASE pelos ids).
+    """
+    epi, _, sols = cenario
+    decide_solicitacoes_em_lote([sols[0].pk], Solicitacao.Status.APROVADA)
+    _gestor(client)
+    url = reverse("app_entregas:solicitacoes_gerenciar")
+
+    with CaptureQueriesContext(connection) as ctx:
+        r = client.get(url, {"status": "APROVADA"})
+    [sql] = [q["sql"] for q in ctx.captured_queries if "app_entregas_solicitacao" in q["sql"]][1:]
+    assert sql.count("SELECT") == 1
+    assert [s.epi.disponivel for s in r.context["solicitacoes"]] == [3]
+
+    services.fatiar_estoque(epi.pk, 2)
+    r = client.get(url, {"status": "APROVADA"})
+    assert [s.epi.disponivel for s in r.context["solicitacoes"]] == [3]